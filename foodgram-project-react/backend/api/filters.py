@@ -1,16 +1,11 @@
 from django.contrib.auth import get_user_model
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
 
 from recipes import models
 
 User = get_user_model()
 
 
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
-
-
 class RecipeFilter(FilterSet):
     tags = filters.ModelMultipleChoiceFilter(
         field_name='tags__slug',
@@ -0,0 +1,74 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, urlencode
+from rest_framework.renderers import JSONRenderer
+
+from recipes import reference_cache
+
+
+class CachedReadOnlyMixin:
+    """
+    Кэширует ответы list и retrieve готовыми байтами JSON.
+
+    Ключ строится из версии справочника cache_namespace, действия,
+    аргументов URL и отсортированных параметров запроса. При изменении
+    справочника версия сдвигается (см. recipes.signals), и старые ответы
+    больше не читаются. Ответ содержит ETag и Last-Modified, на условный
+    GET с совпадающими значениями возвращается 304.
+    """
+
+    cache_namespace = None
+
+    def get_cache_key(self, request, version):
+        params = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.blake2b(
+            f'{self.action}:{sorted(self.kwargs.items())}:{params}'.encode(),
+            digest_size=16,
+        ).hexdigest()
+        return f'reference:{self.cache_namespace}:{version}:{digest}'
+
+    def get_cached_response(self, request, render):
+        version = reference_cache.get_version(self.cache_namespace)
+        key = self.get_cache_key(request, version)
+        cached = cache.get(key)
+        if cached is None:
+            content = render()
+            etag = '"{}"'.format(
+                hashlib.blake2b(content, digest_size=16).hexdigest()
+            )
+            cached = (content, etag)
+            cache.set(key, cached, settings.REFERENCE_CACHE_TIMEOUT)
+        content, etag = cached
+        response = get_conditional_response(
+            request, etag=etag, last_modified=version
+        )
+        if response is None:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(version)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    def render_list(self, request, *args, **kwargs):
+        return JSONRenderer().render(
+            super().list(request, *args, **kwargs).data
+        )
+
+    def render_retrieve(self, request, *args, **kwargs):
+        return JSONRenderer().render(
+            super().retrieve(request, *args, **kwargs).data
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, lambda: self.render_list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, lambda: self.render_retrieve(request, *args, **kwargs)
+        )
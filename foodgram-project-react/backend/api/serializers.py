@@ -5,8 +5,8 @@ from djoser.serializers import UserSerializer as DjoserUserSerializer
 
 from .fields import Base64ImageField
 from recipes.models import (Ingredient, IngredientRecipe, Recipe, Favorites,
-                            ShoppingList, Tag)
-from users.models import CustomUser, Follow
+                            ShoppingList, ShoppingListItem, Tag)
+from users.models import CustomUser
 
 
 class UserSerializer(DjoserUserSerializer):
@@ -25,6 +25,9 @@ class UserSerializer(DjoserUserSerializer):
         )
 
     def get_is_subscribed(self, author):
+        # Флаг из аннотации RecipeQuerySet.with_related.
+        if hasattr(author, 'is_subscribed'):
+            return author.is_subscribed
         user = self.context.get('request').user
 
         return (
@@ -41,9 +44,13 @@ class RecipeFollowSerializer(serializers.ModelSerializer):
 
 
 class FollowSerializer(serializers.ModelSerializer):
-    is_subscribed = serializers.SerializerMethodField()
-    recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    """
+    Ожидает автора из UserViewSet.get_subscriptions_queryset:
+    с аннотациями is_subscribed, recipes_count и рецептами в recipes.
+    """
+    is_subscribed = serializers.BooleanField(read_only=True)
+    recipes = RecipeFollowSerializer(many=True, read_only=True)
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = CustomUser
@@ -58,25 +65,6 @@ class FollowSerializer(serializers.ModelSerializer):
             'recipes_count',
         )
 
-    def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-
-        if user.is_authenticated:
-            return Follow.objects.filter(user=user, author=obj).exists()
-        return False
-
-    def get_recipes(self, user):
-        request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=user)
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
-        serializer = RecipeFollowSerializer(recipes, many=True)
-        return serializer.data
-
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.id).count()
-
 
 class FavoritesSerializer(serializers.ModelSerializer):
     name = serializers.ReadOnlyField(
@@ -230,6 +218,9 @@ class CreateUpdateRecipeSerializer(serializers.ModelSerializer):
         recipe.ingredients.clear()
         self.create_ingredients(recipe=recipe,
                                 ingredients=ingredients)
+        ShoppingListItem.objects.rebuild(
+            ShoppingList.objects.filter(recipe=recipe).values('author')
+        )
         return super().update(recipe, validate_data)
 
     def to_representation(self, instance):
@@ -1,33 +1,23 @@
-import io
+from django.http import StreamingHttpResponse
 
-from django.http import FileResponse
-from django.db.models import Sum
+from recipes.models import ShoppingListItem
 
-from recipes.models import IngredientRecipe
+SHOPPING_LIST_FILENAME = 'shopping_list.txt'
 
 
-def get_shopping_list(self, request, author) -> io.BytesIO:
-    ingredients = IngredientRecipe.objects.filter(
-        recipe__shopping_cart_recipe__author=author
-    ).values(
-        'ingredient__name', 'ingredient__measurement_unit'
-    ).annotate(
-        amounts=Sum('amount', distinct=True)).order_by('amounts')
+def get_shopping_list(self, request, author) -> StreamingHttpResponse:
+    items = ShoppingListItem.objects.filter(author=author).values_list(
+        'ingredient__name', 'ingredient__measurement_unit', 'amount'
+    ).order_by('amount', 'ingredient__name')
 
-    shopping_list = ''
-
-    for ingredient in ingredients:
-        shopping_list += (
-            f'{ingredient["ingredient__name"]} - '
-            f'{ingredient["amounts"]} '
-            f'{ingredient["ingredient__measurement_unit"]}\n'
-        )
-    filename = 'shopping_list.txt'
-    response = FileResponse(
-        shopping_list,
-        as_attachment=True,
-        filename=filename,
-        content_type='text/plain'
+    lines = (
+        f'{name} - {amount} {measurement_unit}\n'
+        for name, measurement_unit, amount in items.iterator()
+    )
+    response = StreamingHttpResponse(
+        lines, content_type='text/plain; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename={SHOPPING_LIST_FILENAME}'
     )
-    response['Content-Disposition'] = f'attachment; filename={filename}'
     return response
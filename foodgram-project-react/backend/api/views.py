@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Subquery
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -5,10 +8,12 @@ from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from djoser.views import UserViewSet
 
+from recipes.ingredient_index import ingredient_index
 from recipes.models import (Ingredient, Recipe, Favorites,
-                            ShoppingList, Tag)
+                            ShoppingList, ShoppingListItem, Tag)
 from users.models import CustomUser, Follow
-from api.filters import RecipeFilter, IngredientSearchFilter
+from api.filters import RecipeFilter
+from api.mixins import CachedReadOnlyMixin
 from api.permissions import IsAuthorOrReadOnly
 from api.services import get_shopping_list
 from . import paginations, serializers
@@ -37,6 +42,41 @@ class UserViewSet(UserViewSet):
             return serializers.FollowSerializer
         return super().get_serializer_class()
 
+    def get_recipes_limit(self):
+        try:
+            recipes_limit = int(self.request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return None
+        return recipes_limit if recipes_limit >= 0 else None
+
+    def get_subscriptions_queryset(self):
+        """
+        Авторы с флагом подписки, числом рецептов и рецептами для
+        FollowSerializer: страница собирается за постоянное число
+        запросов. Рецепты ограничиваются recipes_limit для каждого
+        автора подзапросом с LIMIT.
+        """
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time', 'author'
+        )
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('pk')[:recipes_limit]
+            ))
+        return CustomUser.objects.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(
+                    user=self.request.user, author=OuterRef('pk')
+                )
+            ),
+            recipes_count=Count('recipe'),
+        ).order_by('id').prefetch_related(
+            Prefetch('recipe_set', queryset=recipes, to_attr='recipes')
+        )
+
     @action(detail=True, methods=('post',), pagination_class=None)
     def subscribe(self, request, id):
         if not CustomUser.objects.filter(pk=id).exists():
@@ -63,7 +103,8 @@ class UserViewSet(UserViewSet):
 
         Follow.objects.create(user=user, author=author)
         serializer = serializers.FollowSerializer(
-            author, context={'request': request}
+            self.get_subscriptions_queryset().get(pk=author.pk),
+            context={'request': request}
         )
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -95,7 +136,9 @@ class UserViewSet(UserViewSet):
         pagination_class=paginations.LimitPageNumberPagination,
     )
     def subscriptions(self, request):
-        queryset = CustomUser.objects.filter(author__user=self.request.user)
+        queryset = self.get_subscriptions_queryset().filter(
+            author__user=self.request.user
+        )
         serializer = serializers.FollowSerializer(
             self.paginate_queryset(queryset),
             context=dict(request=request),
@@ -104,21 +147,45 @@ class UserViewSet(UserViewSet):
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedReadOnlyMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'tags'
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
     permission_classes = (AllowAny, )
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReadOnlyMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
     permission_classes = (AllowAny, )
-    filter_backends = (IngredientSearchFilter,)
-    search_fields = ('^name',)
     pagination_class = None
 
+    def get_search_limit(self):
+        """
+        Число подсказок из параметра limit, не больше
+        INGREDIENT_SEARCH_MAX_LIMIT. Без поискового запроса
+        возвращаются все ингредиенты.
+        """
+        if not self.request.query_params.get('name'):
+            return None
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return settings.INGREDIENT_SEARCH_LIMIT
+        return min(max(limit, 1), settings.INGREDIENT_SEARCH_MAX_LIMIT)
+
+    def render_list(self, request, *args, **kwargs):
+        """
+        Поиск по началу названия без учета регистра и различия е/ё.
+        Ответ собирается из индекса в памяти без запросов к БД.
+        """
+        entries = ingredient_index.search(
+            request.query_params.get('name', ''), self.get_search_limit()
+        )
+        return b'[' + b','.join(entries) + b']'
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthorOrReadOnly,)
@@ -128,12 +195,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'delete', 'patch']
 
     def get_queryset(self):
-        user = self.request.user
-        if user and user.is_authenticated:
-            return Recipe.objects.with_annotations(user).select_related(
-                'author'
-            )
-        return Recipe.objects.select_related('author').prefetch_related('tags')
+        return Recipe.objects.with_related(self.request.user)
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
@@ -143,6 +205,16 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        authors = list(
+            ShoppingList.objects.filter(recipe=instance).values_list(
+                'author', flat=True
+            )
+        )
+        instance.delete()
+        ShoppingListItem.objects.rebuild(authors)
+
     def create_connection(self, model, user, pk):
         if not Recipe.objects.filter(id=pk).exists():
             return Response(
@@ -185,14 +257,21 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=True, methods=('POST', 'DELETE'),)
+    @transaction.atomic
     def shopping_cart(self, request, pk=None):
         if request.method == 'POST':
-            return self.create_connection(
+            response = self.create_connection(
                 ShoppingList, request.user, pk
             )
-        return self.delete_connection(
+            if response.status_code == status.HTTP_201_CREATED:
+                ShoppingListItem.objects.add_recipe(request.user, pk)
+            return response
+        response = self.delete_connection(
             ShoppingList, request.user, pk
         )
+        if response.status_code == status.HTTP_204_NO_CONTENT:
+            ShoppingListItem.objects.remove_recipe(request.user, pk)
+        return response
 
     @action(detail=False,
             methods=['get'],
@@ -100,6 +100,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The local-memory cache is per process: changes made by management
+# commands reach the server only after REFERENCE_CACHE_TIMEOUT seconds.
+# Use a shared backend, e.g.
+# django.core.cache.backends.filebased.FileBasedCache with a directory
+# in CACHE_LOCATION, so invalidation reaches every process at once.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT', 300))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -188,3 +208,8 @@ SIMPLE_JWT = {
 
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
+
+# Ingredient search
+
+INGREDIENT_SEARCH_LIMIT = 10
+INGREDIENT_SEARCH_MAX_LIMIT = 50
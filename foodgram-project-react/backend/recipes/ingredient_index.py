@@ -0,0 +1,81 @@
+import json
+import threading
+from bisect import bisect_left
+
+from recipes import reference_cache
+
+
+def normalize_name(name):
+    """Приводит название к виду для поиска: без регистра, ё -> е."""
+    return ' '.join(name.casefold().replace('ё', 'е').split())
+
+
+class IngredientIndex:
+    """
+    Индекс ингредиентов для автодополнения в памяти процесса.
+
+    Нормализованные названия хранятся в отсортированном списке, поиск
+    по префиксу — двоичный, а ответ собирается из заранее
+    сериализованных в JSON записей. Индекс загружается при первом
+    обращении и перечитывается, когда меняется версия справочника
+    ингредиентов в reference_cache: при сигналах модели,
+    import_ingredients, clear_reference_cache и не реже чем раз
+    в REFERENCE_CACHE_TIMEOUT секунд.
+    """
+
+    def __init__(self):
+        self._state = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self):
+        return (
+            self._state is not None
+            and self._version == reference_cache.get_version('ingredients')
+        )
+
+    def _load(self):
+        from recipes.models import Ingredient
+
+        # Версия читается до загрузки: изменение во время загрузки
+        # приведет к повторной загрузке при следующем поиске.
+        version = reference_cache.get_version('ingredients')
+        rows = sorted(
+            (normalize_name(name), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.order_by(
+            ).values_list('id', 'name', 'measurement_unit')
+        )
+        keys = [row[0] for row in rows]
+        entries = [
+            json.dumps(
+                {'id': pk, 'name': name, 'measurement_unit': unit},
+                ensure_ascii=False, separators=(',', ':'),
+            ).encode()
+            for _, pk, name, unit in rows
+        ]
+        self._state = (keys, entries)
+        self._version = version
+
+    def _snapshot(self):
+        if not self._is_fresh():
+            with self._lock:
+                if not self._is_fresh():
+                    self._load()
+        return self._state
+
+    def search(self, prefix, limit=None):
+        """
+        Возвращает записи JSON (bytes) ингредиентов, названия которых
+        начинаются с prefix, не более limit.
+        """
+        keys, entries = self._snapshot()
+        prefix = normalize_name(prefix)
+        start = bisect_left(keys, prefix)
+        stop = len(keys) if limit is None else min(len(keys), start + limit)
+        end = start
+        while end < stop and keys[end].startswith(prefix):
+            end += 1
+        return entries[start:end]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import reference_cache
+
+NAMESPACES = ('ingredients', 'tags')
+
+
+class Command(BaseCommand):
+    help = 'Invalidate cached tag and ingredient responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'namespaces', nargs='*',
+            help='Reference data to invalidate: ingredients, tags '
+                 '(all by default)',
+        )
+
+    def handle(self, *args, **options):
+        namespaces = options['namespaces'] or NAMESPACES
+        unknown = set(namespaces) - set(NAMESPACES)
+        if unknown:
+            raise CommandError(f'Unknown reference data: {", ".join(unknown)}')
+        reference_cache.invalidate(*namespaces)
+        self.stdout.write(self.style.SUCCESS(
+            f'Cache invalidated: {", ".join(namespaces)}'
+        ))
@@ -2,6 +2,7 @@ import csv
 
 from django.core.management.base import BaseCommand
 
+from recipes import reference_cache
 from recipes.models import Ingredient
 
 PATH_CSV = 'data/ingredients.csv'
@@ -17,4 +18,6 @@ class Command(BaseCommand):
             for row in csv_reader:
                 objects_to_create.append(Ingredient(**row))
         Ingredient.objects.bulk_create(objects_to_create, batch_size=500)
+        # bulk_create не отправляет post_save, кэш сбрасывается явно.
+        reference_cache.invalidate('ingredients')
         self.stdout.write(self.style.SUCCESS('Data imported successfully'))
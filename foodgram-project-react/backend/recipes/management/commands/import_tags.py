@@ -2,6 +2,7 @@ import csv
 
 from django.core.management.base import BaseCommand
 
+from recipes import reference_cache
 from recipes.models import Tag
 
 PATH_CSV = 'data/recipes_tag.csv'
@@ -17,4 +18,6 @@ class Command(BaseCommand):
             for row in csv_reader:
                 objects_to_create.append(Tag(**row))
         Tag.objects.bulk_create(objects_to_create, batch_size=100)
+        # bulk_create не отправляет post_save, кэш сбрасывается явно.
+        reference_cache.invalidate('tags')
         self.stdout.write(self.style.SUCCESS('Data imported successfully'))
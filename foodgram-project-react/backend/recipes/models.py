@@ -1,10 +1,11 @@
 from colorfield.fields import ColorField
 
-from django.db import models
-from django.db.models import OuterRef, Exists, constraints
+from django.db import IntegrityError, models, transaction
+from django.db.models import (F, OuterRef, Exists, Prefetch, Sum,
+                              constraints)
 from django.core.validators import MinValueValidator
 
-from users.models import CustomUser
+from users.models import CustomUser, Follow
 
 
 class Ingredient(models.Model):
@@ -70,6 +71,36 @@ class RecipeQuerySet(models.QuerySet):
             ),
         )
 
+    def with_related(self, user):
+        """
+        Загружает все, что нужно RecipeListSerializer, за постоянное
+        число запросов: теги и ингредиенты — через Prefetch, флаг
+        подписки на автора — аннотацией в запросе авторов.
+        """
+        queryset = self.prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredientrecipes',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+        if not user.is_authenticated:
+            return queryset.select_related('author')
+        return queryset.with_annotations(user).prefetch_related(
+            Prefetch(
+                'author',
+                queryset=CustomUser.objects.annotate(
+                    is_subscribed=Exists(
+                        Follow.objects.filter(
+                            user=user, author=OuterRef('pk')
+                        )
+                    )
+                ),
+            )
+        )
+
 
 class RecipeManager(models.Manager):
 
@@ -212,6 +243,131 @@ class ShoppingList(models.Model):
         return f'{self.user} добавил: {self.recipe}'
 
 
+class ShoppingListItemQuerySet(models.QuerySet):
+    """
+    Поддерживает сводный список покупок: суммы ингредиентов по всем
+    рецептам в корзине пользователя. Добавление и удаление рецепта
+    меняют только строки его ингредиентов; при изменении состава
+    рецепта списки затронутых пользователей пересчитываются.
+    """
+
+    def add_recipe(self, author, recipe):
+        self._apply(author, recipe, 1)
+
+    def remove_recipe(self, author, recipe):
+        self._apply(author, recipe, -1)
+
+    @transaction.atomic
+    def _apply(self, author, recipe, sign):
+        amounts = dict(
+            IngredientRecipe.objects.filter(recipe=recipe).values_list(
+                'ingredient_id', 'amount'
+            )
+        )
+        items = {
+            item.ingredient_id: item
+            for item in self.select_for_update().filter(
+                author=author, ingredient_id__in=amounts
+            )
+        }
+        created, changed, emptied = [], [], []
+        for ingredient_id, amount in amounts.items():
+            item = items.get(ingredient_id)
+            if item is None:
+                if sign > 0:
+                    created.append(self.model(
+                        author=author,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                    ))
+                continue
+            item.amount += sign * amount
+            (changed if item.amount > 0 else emptied).append(item)
+        self._create(author, created)
+        self.bulk_update(changed, ('amount',))
+        self.filter(pk__in=[item.pk for item in emptied]).delete()
+
+    def _create(self, author, items):
+        try:
+            with transaction.atomic():
+                self.bulk_create(items)
+        except IntegrityError:
+            # Параллельный запрос уже добавил строки этих ингредиентов:
+            # к ним прибавляется количество, остальные создаются.
+            for item in items:
+                updated = self.filter(
+                    author=author, ingredient_id=item.ingredient_id
+                ).update(amount=F('amount') + item.amount)
+                if not updated:
+                    item.save(force_insert=True)
+
+    @transaction.atomic
+    def rebuild(self, authors=None):
+        """
+        Пересчитывает списки покупок пользователей authors (id или
+        подзапрос) или, если они не указаны, всех пользователей.
+        """
+        # Условие на корзину задается одним filter(): иначе для
+        # многозначной связи добавится второе соединение и суммы удвоятся.
+        if authors is None:
+            items = self.all()
+            carts = {'recipe__shopping_cart_recipe__isnull': False}
+        else:
+            items = self.filter(author__in=authors)
+            carts = {'recipe__shopping_cart_recipe__author__in': authors}
+        items.delete()
+        totals = IngredientRecipe.objects.filter(**carts).values(
+            'recipe__shopping_cart_recipe__author', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by()
+        self.bulk_create(
+            (
+                self.model(
+                    author_id=total['recipe__shopping_cart_recipe__author'],
+                    ingredient_id=total['ingredient'],
+                    amount=total['total'],
+                )
+                for total in totals.iterator()
+            ),
+            batch_size=500,
+        )
+
+
+class ShoppingListItem(models.Model):
+
+    objects = ShoppingListItemQuerySet.as_manager()
+
+    author = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Автор',
+    )
+
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент',
+    )
+
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['author', 'ingredient'],
+                name='unique_shopping_list_item'
+            )
+        ]
+        verbose_name = 'Ингредиент из списка покупок'
+        verbose_name_plural = 'Ингредиенты из списка покупок'
+
+    def __str__(self):
+        return f'{self.ingredient} {self.amount}'
+
+
 class Favorites(models.Model):
 
     author = models.ForeignKey(
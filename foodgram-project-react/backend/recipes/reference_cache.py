@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_KEY = 'reference:{}:version'
+
+
+def get_version(namespace):
+    """
+    Версия данных справочника: время последнего изменения в целых
+    секундах, оно же Last-Modified ответов. Хранится в кэше, поэтому
+    при общем кэше (файловом и т.п.) видна всем процессам сервера.
+
+    Версия живет не дольше REFERENCE_CACHE_TIMEOUT и затем создается
+    заново. Так изменения, о которых процесс не узнал (локальный кэш
+    и команды manage.py в другом процессе), доходят до него не позже
+    чем через этот срок.
+    """
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = int(time.time())
+        cache.add(key, version, settings.REFERENCE_CACHE_TIMEOUT)
+        version = cache.get(key, version)
+    return version
+
+
+def invalidate(*namespaces):
+    """
+    Сдвигает версию справочников, делая устаревшими их ответы в кэше.
+    Новая версия хотя бы на секунду больше прежней, иначе клиент,
+    получивший ответ в ту же секунду, по If-Modified-Since получил бы
+    304 на измененные данные.
+    """
+    now = int(time.time())
+    for namespace in namespaces:
+        key = VERSION_KEY.format(namespace)
+        cache.set(
+            key,
+            max(now, cache.get(key, 0) + 1),
+            settings.REFERENCE_CACHE_TIMEOUT,
+        )
@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.fixture
+def make_recipes():
+    from recipes.models import Recipe
+
+    def make_recipes(author, count):
+        return [
+            Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {number}',
+                image='recipes/images/test.png',
+                text='Описание рецепта',
+                cooking_time=number + 1,
+            )
+            for number in range(count)
+        ]
+    return make_recipes
+
+
+@pytest.fixture
+def make_subscriptions(user, make_author, make_recipes):
+    from users.models import Follow
+
+    def make_subscriptions(authors_count, recipes_count):
+        authors = []
+        for number in range(authors_count):
+            author = make_author(number)
+            make_recipes(author, recipes_count)
+            Follow.objects.create(user=user, author=author)
+            authors.append(author)
+        return authors
+    return make_subscriptions
+
+
+@pytest.fixture
+def make_full_recipes(make_author, make_recipes):
+    from recipes.models import Ingredient, IngredientRecipe, Tag
+
+    def make_full_recipes(authors_count, recipes_count):
+        tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        authors = [make_author(number) for number in range(authors_count)]
+        recipes = []
+        for author in authors:
+            for recipe in make_recipes(author, recipes_count):
+                recipe.tags.set(tags[:2])
+                IngredientRecipe.objects.bulk_create(
+                    IngredientRecipe(
+                        recipe=recipe, ingredient=ingredient, amount=10
+                    )
+                    for ingredient in ingredients[:3]
+                )
+                recipes.append(recipe)
+        return authors, recipes
+    return make_full_recipes
+
+
+@pytest.fixture
+def ingredients():
+    from recipes import reference_cache
+    from recipes.models import Ingredient
+
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit=unit)
+        for name, unit in (
+            ('Ёрш', 'шт.'),
+            ('ерш речной', 'г'),
+            ('Яблоко', 'шт.'),
+            ('яблочный сок', 'мл'),
+            ('яблочное пюре', 'г'),
+            ('Сахар', 'г'),
+        )
+    )
+    reference_cache.invalidate('ingredients')
+    return ingredients
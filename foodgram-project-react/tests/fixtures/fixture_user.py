@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        email='test@foodgram.ru',
+        username='TestUser',
+        first_name='Test',
+        last_name='User',
+        password='1234567',
+    )
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def make_author(django_user_model):
+    def make_author(number):
+        return django_user_model.objects.create_user(
+            email=f'author{number}@foodgram.ru',
+            username=f'Author{number}',
+            first_name='Author',
+            last_name=str(number),
+            password='1234567',
+        )
+    return make_author
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestIngredientSearch:
+
+    url = '/api/ingredients/'
+
+    def get_names(self, client, params):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` возвращает статус 200.'
+        )
+        return [ingredient['name'] for ingredient in response.json()]
+
+    def test_prefix_search_ignores_case_and_yo(self, client, ingredients):
+        assert self.get_names(client, {'name': 'ЯБЛ'}) == [
+            'Яблоко', 'яблочное пюре', 'яблочный сок'
+        ]
+        assert self.get_names(client, {'name': 'ерш'}) == [
+            'Ёрш', 'ерш речной'
+        ]
+        assert self.get_names(client, {'name': 'сок'}) == []
+
+    def test_response_fields(self, client, ingredients):
+        from recipes.models import Ingredient
+
+        response = client.get(self.url, {'name': 'сахар'})
+
+        sugar = Ingredient.objects.get(name='Сахар')
+        assert response.json() == [{
+            'id': sugar.id, 'name': 'Сахар', 'measurement_unit': 'г'
+        }]
+
+    def test_limit(self, client, ingredients, settings):
+        settings.INGREDIENT_SEARCH_LIMIT = 2
+        settings.INGREDIENT_SEARCH_MAX_LIMIT = 1
+
+        assert len(self.get_names(client, {'name': 'я'})) == 2
+        assert len(self.get_names(client, {'name': 'я', 'limit': 5})) == 1
+        assert len(self.get_names(client, {})) == len(ingredients)
+
+    def test_search_does_not_query_database(self, client, ingredients):
+        client.get(self.url, {'name': 'я'})
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_names(client, {'name': 'яб'})
+
+        assert not context.captured_queries, (
+            'Поиск ингредиентов не должен обращаться к БД.'
+        )
+
+    def test_etag(self, client, ingredients):
+        from recipes.models import Ingredient
+
+        etag = client.get(self.url, {'name': 'я'})['ETag']
+
+        response = client.get(
+            self.url, {'name': 'я'}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert client.get(self.url, {'name': 'с'})['ETag'] != etag
+
+        Ingredient.objects.create(name='Ягоды', measurement_unit='г')
+        response = client.get(
+            self.url, {'name': 'я'}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'Ягоды' in [item['name'] for item in response.json()]
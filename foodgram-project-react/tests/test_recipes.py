@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestRecipeQueries:
+
+    url = '/api/recipes/'
+
+    def get_queries(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200.'
+        )
+        return response, len(context.captured_queries)
+
+    @pytest.mark.parametrize('authenticated', [False, True])
+    def test_list_queries_do_not_depend_on_page_size(
+        self, client, user_client, make_full_recipes, authenticated
+    ):
+        make_full_recipes(authors_count=3, recipes_count=4)
+        api_client = user_client if authenticated else client
+
+        queries = {
+            limit: self.get_queries(api_client, self.url, {'limit': limit})[1]
+            for limit in (1, 6, 12)
+        }
+
+        assert len(set(queries.values())) == 1, (
+            'Число запросов к БД для списка рецептов не должно зависеть '
+            f'от размера страницы: {queries}.'
+        )
+
+    def test_detail_queries(self, user_client, make_full_recipes):
+        _, recipes = make_full_recipes(authors_count=1, recipes_count=1)
+
+        _, queries = self.get_queries(
+            user_client, f'{self.url}{recipes[0].id}/'
+        )
+
+        assert queries <= 4, (
+            'Рецепт должен загружаться не более чем за 4 запроса '
+            f'(рецепт, автор, теги, ингредиенты), выполнено: {queries}.'
+        )
+
+    def test_list_data(self, user, user_client, make_full_recipes):
+        from users.models import Follow
+
+        authors, _ = make_full_recipes(authors_count=2, recipes_count=1)
+        Follow.objects.create(user=user, author=authors[0])
+
+        response, _ = self.get_queries(user_client, self.url)
+
+        results = response.json()['results']
+        subscriptions = {
+            recipe['author']['id']: recipe['author']['is_subscribed']
+            for recipe in results
+        }
+        assert subscriptions == {authors[0].id: True, authors[1].id: False}
+        for recipe in results:
+            assert len(recipe['tags']) == 2
+            assert len(recipe['ingredients']) == 3
+            assert recipe['ingredients'][0]['measurement_unit'] == 'г'
@@ -0,0 +1,163 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def tags():
+    from recipes.models import Tag
+
+    return [
+        Tag.objects.create(
+            name=f'Тег {number}', color=f'#00000{number}', slug=f'tag{number}'
+        )
+        for number in range(3)
+    ]
+
+
+@pytest.fixture(params=['locmem', 'filebased'])
+def cache_backend(request, settings, tmp_path):
+    if request.param == 'filebased':
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+    return request.param
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('cache_backend')
+class TestReferenceCache:
+
+    url = '/api/tags/'
+
+    def get(self, client, url, params=None, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, params, **headers)
+        return response, len(context.captured_queries)
+
+    def test_cached_without_queries(self, client, tags):
+        first, _ = self.get(client, self.url)
+        second, queries = self.get(client, self.url)
+
+        assert second.status_code == HTTPStatus.OK
+        assert queries == 0, (
+            'Повторный запрос к списку тегов не должен обращаться к БД.'
+        )
+        assert second.content == first.content
+        assert [tag['slug'] for tag in second.json()] == [
+            'tag0', 'tag1', 'tag2'
+        ]
+
+    def test_detail_cached(self, client, tags):
+        url = f'{self.url}{tags[0].id}/'
+        self.get(client, url)
+
+        response, queries = self.get(client, url)
+
+        assert queries == 0
+        assert response.json()['slug'] == 'tag0'
+        assert self.get(client, f'{self.url}0/')[0].status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_key_ignores_parameter_order(self, client, tags):
+        self.get(client, f'{self.url}?a=1&b=2')
+
+        _, queries = self.get(client, f'{self.url}?b=2&a=1')
+
+        assert queries == 0
+
+    def test_conditional_get(self, client, tags):
+        response, _ = self.get(client, self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response, queries = self.get(
+            client, self.url, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert queries == 0
+
+        response, _ = self.get(
+            client, self.url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_invalidated_by_signals(self, client, tags):
+        etag = self.get(client, self.url)[0]['ETag']
+
+        tags[0].name = 'Завтрак'
+        tags[0].save()
+        response, _ = self.get(client, self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()[0]['name'] == 'Завтрак'
+
+        tags[1].delete()
+        response, _ = self.get(client, self.url)
+        assert len(response.json()) == 2
+
+    def test_invalidated_by_command(self, client, tags):
+        from recipes.models import Tag
+
+        self.get(client, self.url)
+        Tag.objects.filter(id=tags[0].id).update(name='Ужин')
+        assert self.get(client, self.url)[0].json()[0]['name'] == 'Тег 0'
+
+        call_command('clear_reference_cache', 'tags')
+
+        assert self.get(client, self.url)[0].json()[0]['name'] == 'Ужин'
+
+    def test_ingredients_cached(self, client, ingredients):
+        from recipes.models import Ingredient
+
+        url = '/api/ingredients/'
+        assert len(self.get(client, url, {'name': 'я'})[0].json()) == 3
+        Ingredient.objects.filter(name='Сахар').update(name='Ягоды')
+
+        call_command('clear_reference_cache')
+
+        assert len(self.get(client, url, {'name': 'я'})[0].json()) == 4
+
+    def test_changes_within_one_second(self, client, tags):
+        last_modified = self.get(client, self.url)[0]['Last-Modified']
+
+        tags[0].name = 'Обед'
+        tags[0].save()
+        response, _ = self.get(
+            client, self.url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()[0]['name'] == 'Обед'
+
+    def test_expires_without_invalidation(self, client, tags, settings):
+        from recipes.models import Tag
+
+        settings.REFERENCE_CACHE_TIMEOUT = 1
+        # Версии справочников создаются заново уже с коротким сроком.
+        cache.clear()
+        self.get(client, self.url)
+        # Изменение из другого процесса с локальным кэшем: версия здесь
+        # не сдвигается.
+        Tag.objects.filter(id=tags[0].id).update(name='Ужин')
+        time.sleep(1.1)
+
+        assert self.get(client, self.url)[0].json()[0]['name'] == 'Ужин'
+
+    def test_ingredient_index_expires(self, client, ingredients, settings):
+        from recipes.models import Ingredient
+
+        settings.REFERENCE_CACHE_TIMEOUT = 1
+        # Версии справочников создаются заново уже с коротким сроком.
+        cache.clear()
+        url = '/api/ingredients/'
+        self.get(client, url, {'name': 'я'})
+        Ingredient.objects.filter(name='Сахар').update(name='Ягоды')
+        time.sleep(1.1)
+
+        assert len(self.get(client, url, {'name': 'я'})[0].json()) == 4
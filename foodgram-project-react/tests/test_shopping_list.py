@@ -0,0 +1,154 @@
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+
+
+@pytest.mark.django_db
+class TestShoppingList:
+
+    url = '/api/recipes/'
+
+    @pytest.fixture
+    def author_client(self):
+        from rest_framework.test import APIClient
+
+        def author_client(author):
+            client = APIClient()
+            client.force_authenticate(author)
+            return client
+        return author_client
+
+    def get_items(self, user):
+        from recipes.models import ShoppingListItem
+
+        return dict(
+            ShoppingListItem.objects.filter(author=user).values_list(
+                'ingredient__name', 'amount'
+            )
+        )
+
+    def assert_matches_rebuild(self, user):
+        from recipes.models import ShoppingListItem
+
+        items = self.get_items(user)
+        ShoppingListItem.objects.rebuild()
+        assert items == self.get_items(user), (
+            'Список покупок должен совпадать с пересчитанным заново.'
+        )
+        return items
+
+    def add(self, client, recipe):
+        response = client.post(f'{self.url}{recipe.id}/shopping_cart/')
+        assert response.status_code == HTTPStatus.CREATED
+
+    def remove(self, client, recipe):
+        response = client.delete(f'{self.url}{recipe.id}/shopping_cart/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_add_remove_readd(self, user, user_client, make_full_recipes):
+        _, recipes = make_full_recipes(authors_count=1, recipes_count=2)
+
+        self.add(user_client, recipes[0])
+        self.add(user_client, recipes[1])
+        assert self.assert_matches_rebuild(user) == {
+            'Ингредиент 0': 20, 'Ингредиент 1': 20, 'Ингредиент 2': 20,
+        }
+
+        self.remove(user_client, recipes[0])
+        assert self.assert_matches_rebuild(user) == {
+            'Ингредиент 0': 10, 'Ингредиент 1': 10, 'Ингредиент 2': 10,
+        }
+
+        self.remove(user_client, recipes[1])
+        assert self.assert_matches_rebuild(user) == {}
+
+        self.add(user_client, recipes[0])
+        assert self.assert_matches_rebuild(user) == {
+            'Ингредиент 0': 10, 'Ингредиент 1': 10, 'Ингредиент 2': 10,
+        }
+
+    def test_edit_recipe_ingredients(
+        self, user, user_client, author_client, make_full_recipes
+    ):
+        from recipes.models import Ingredient
+
+        authors, recipes = make_full_recipes(authors_count=1, recipes_count=2)
+        self.add(user_client, recipes[0])
+        self.add(user_client, recipes[1])
+        ingredients = {
+            ingredient.name: ingredient.id
+            for ingredient in Ingredient.objects.all()
+        }
+
+        response = author_client(authors[0]).patch(
+            f'{self.url}{recipes[0].id}/',
+            {
+                'ingredients': [
+                    {'id': ingredients['Ингредиент 0'], 'amount': 5},
+                    {'id': ingredients['Ингредиент 3'], 'amount': 7},
+                ],
+                'tags': list(recipes[0].tags.values_list('id', flat=True)),
+            },
+            format='json',
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert self.assert_matches_rebuild(user) == {
+            'Ингредиент 0': 15, 'Ингредиент 1': 10, 'Ингредиент 2': 10,
+            'Ингредиент 3': 7,
+        }
+
+    def test_delete_recipe(
+        self, user, user_client, author_client, make_full_recipes
+    ):
+        authors, recipes = make_full_recipes(authors_count=1, recipes_count=2)
+        self.add(user_client, recipes[0])
+        self.add(user_client, recipes[1])
+
+        response = author_client(authors[0]).delete(
+            f'{self.url}{recipes[0].id}/'
+        )
+
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.assert_matches_rebuild(user) == {
+            'Ингредиент 0': 10, 'Ингредиент 1': 10, 'Ингредиент 2': 10,
+        }
+
+    def test_download(self, user_client, make_full_recipes):
+        from recipes.models import IngredientRecipe
+
+        _, recipes = make_full_recipes(authors_count=1, recipes_count=2)
+        IngredientRecipe.objects.filter(
+            recipe=recipes[1], ingredient__name='Ингредиент 2'
+        ).delete()
+        self.add(user_client, recipes[0])
+        self.add(user_client, recipes[1])
+
+        response = user_client.get(f'{self.url}download_shopping_cart/')
+
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'] == 'text/plain; charset=utf-8'
+        assert 'attachment' in response['Content-Disposition']
+        assert b''.join(response.streaming_content).decode() == (
+            'Ингредиент 2 - 10 г\n'
+            'Ингредиент 0 - 20 г\n'
+            'Ингредиент 1 - 20 г\n'
+        )
+
+    def test_concurrent_add(self, user, make_full_recipes):
+        from recipes.models import ShoppingListItem, ShoppingListItemQuerySet
+
+        _, recipes = make_full_recipes(authors_count=1, recipes_count=2)
+        ShoppingListItem.objects.add_recipe(user, recipes[0])
+
+        # Строки, добавленные параллельным запросом, не видны при чтении.
+        with mock.patch.object(
+            ShoppingListItemQuerySet, 'select_for_update',
+            lambda queryset: queryset.none(),
+        ):
+            ShoppingListItem.objects.add_recipe(user, recipes[1])
+
+        assert self.get_items(user) == {
+            'Ингредиент 0': 20, 'Ингредиент 1': 20, 'Ингредиент 2': 20,
+        }
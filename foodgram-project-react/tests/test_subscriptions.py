@@ -0,0 +1,86 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSubscriptions:
+
+    url = '/api/users/subscriptions/'
+
+    def get_queries(self, client, params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` возвращает статус 200.'
+        )
+        return len(context.captured_queries)
+
+    def test_subscriptions_data(self, user_client, make_subscriptions):
+        make_subscriptions(authors_count=3, recipes_count=4)
+
+        response = user_client.get(self.url, {'recipes_limit': 2})
+
+        results = response.json()['results']
+        assert len(results) == 3
+        for author in results:
+            assert author['is_subscribed'] is True
+            assert author['recipes_count'] == 4, (
+                'Проверьте, что `recipes_count` учитывает все рецепты '
+                'автора, а не только выведенные.'
+            )
+            assert len(author['recipes']) == 2, (
+                'Проверьте, что `recipes_limit` ограничивает число '
+                'рецептов каждого автора.'
+            )
+            cooking_times = [
+                recipe['cooking_time'] for recipe in author['recipes']
+            ]
+            assert cooking_times == [4, 3], (
+                'Проверьте, что выводятся последние рецепты автора.'
+            )
+
+    def test_subscriptions_without_limit(
+        self, user_client, make_subscriptions
+    ):
+        make_subscriptions(authors_count=2, recipes_count=3)
+
+        response = user_client.get(self.url)
+
+        for author in response.json()['results']:
+            assert len(author['recipes']) == 3
+
+    @pytest.mark.parametrize('params', [{}, {'recipes_limit': 3}])
+    def test_subscriptions_queries_do_not_depend_on_page_size(
+        self, user_client, make_subscriptions, params
+    ):
+        make_subscriptions(authors_count=6, recipes_count=5)
+
+        small_page = self.get_queries(user_client, {'limit': 1, **params})
+        full_page = self.get_queries(user_client, {'limit': 6, **params})
+
+        assert small_page == full_page, (
+            'Число запросов к БД для страницы подписок не должно зависеть '
+            f'от числа авторов: {small_page} для 1 автора, '
+            f'{full_page} для 6.'
+        )
+        assert full_page <= 3, (
+            'Страница подписок должна собираться не более чем за 3 запроса '
+            f'(число авторов, авторы, их рецепты), выполнено: {full_page}.'
+        )
+
+    def test_subscribe_response(self, user_client, make_author, make_recipes):
+        author = make_author(1)
+        make_recipes(author, 3)
+
+        response = user_client.post(
+            f'/api/users/{author.id}/subscribe/?recipes_limit=1'
+        )
+
+        assert response.status_code == HTTPStatus.CREATED
+        data = response.json()
+        assert data['is_subscribed'] is True
+        assert data['recipes_count'] == 3
+        assert len(data['recipes']) == 1
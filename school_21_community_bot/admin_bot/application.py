@@ -0,0 +1,47 @@
+import time
+
+from telegram.ext import MessageHandler, filters
+
+from config import METRIC_ROLLUP_INTERVAL, TOKEN_ADMIN
+from admin_bot.conversation import admin_conversation_handler
+from admin_bot.utils import unknown_command
+from service.callback_codec import callback_codec
+from service.metric_rollup import metric_rollup_job
+from service.persistence import SQLAlchemyPersistence
+from service.query_stats import query_stats
+from service.reference_data import reference_data
+from utils.startup import get_application_builder, report_startup
+
+STARTED_AT = time.perf_counter()
+
+
+async def on_startup(application):
+    """
+    Запускает периодическую агрегацию метрик и подписку на изменения
+    справочников.
+    """
+    metric_rollup_job.start(METRIC_ROLLUP_INTERVAL)
+    await reference_data.start_listener()
+    report_startup('Админ-бот', STARTED_AT)
+
+
+async def on_shutdown(application):
+    """Останавливает фоновые задачи админ-бота."""
+    await metric_rollup_job.stop()
+    await reference_data.stop_listener()
+    await callback_codec.stop()
+
+
+def build_admin_application():
+    """Собирает приложение админ-бота."""
+    application = (
+        get_application_builder(TOKEN_ADMIN)
+        .persistence(SQLAlchemyPersistence('admin_bot'))
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
+    application.add_handler(admin_conversation_handler)
+    application.add_handler(MessageHandler(filters.COMMAND, unknown_command))
+    query_stats.instrument_application(application)
+    return application
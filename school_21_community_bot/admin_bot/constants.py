@@ -33,6 +33,8 @@
     SEARCH_TEAM,
     SEARCH_ROLE,
     SEARCH_ALPHABET,
-) = range(34)
+    METRICS_MENU,
+    USER_IMPORT,
+) = range(36)
 
 PAGINATION_SIZE = 10
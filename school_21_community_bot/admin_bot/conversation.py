@@ -14,6 +14,7 @@ from admin_bot.constants import (
     LEVEL_LIST,
     LEVEL_VIEW_USERS,
     MAIN_ADMIN_MENU,
+    METRICS_MENU,
     ROLE_ADD,
     ROLE_DELETE_CONFIRM,
     ROLE_DETAIL,
@@ -39,6 +40,7 @@ from admin_bot.constants import (
     USER_EDIT_LEVEL_INPUT,
     USER_EDIT_ROLE_INPUT,
     USER_EDIT_VALUE,
+    USER_IMPORT,
     USER_LIST,
     USER_MENU,
 )
@@ -54,6 +56,7 @@ from admin_bot.menu import (
     start_admin,
     user_menu_handler,
 )
+from admin_bot.metrics import export_metrics_command, metrics_menu_handler
 from admin_bot.role import (
     role_add_handler,
     role_delete_confirm_handler,
@@ -86,11 +89,14 @@ from admin_bot.user import (
     user_edit_value_handler,
     user_list_handler,
 )
+from admin_bot.user_import import export_users_command, user_import_document
 from admin_bot.utils import unknown_command
 
 admin_conversation_handler = ConversationHandler(
     entry_points=[
         CommandHandler("start", start_admin),
+        CommandHandler("export_metrics", export_metrics_command),
+        CommandHandler("export_users", export_users_command),
         MessageHandler(
             filters.TEXT & filters.Regex("^🍔 Меню$"),
             admin_menu_handler,
@@ -165,6 +171,10 @@ admin_conversation_handler = ConversationHandler(
         USER_DELETE_CONFIRM: [
             CallbackQueryHandler(user_delete_confirm_handler)
         ],
+        USER_IMPORT: [
+            MessageHandler(filters.Document.ALL, user_import_document),
+            CallbackQueryHandler(user_menu_handler),
+        ],
 
         ROLE_LIST: [CallbackQueryHandler(role_list_handler)],
         ROLE_ADD: [MessageHandler(filters.TEXT & ~filters.COMMAND,
@@ -205,7 +215,11 @@ admin_conversation_handler = ConversationHandler(
         SEARCH_ALPHABET: [
             CallbackQueryHandler(search_alphabet_handler)
         ],
+
+        METRICS_MENU: [CallbackQueryHandler(metrics_menu_handler)],
     },
     fallbacks=[MessageHandler(filters.ALL, unknown_command)],
     allow_reentry=True,
+    name="admin",
+    persistent=True,
 )
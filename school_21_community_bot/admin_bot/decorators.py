@@ -1,3 +1,4 @@
+import functools
 import logging
 
 from telegram import Update
@@ -14,6 +15,7 @@ def admin_only(func):
     Декоратор для проверки доступа к админ-боту.
     """
 
+    @functools.wraps(func)
     async def wrapper(
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
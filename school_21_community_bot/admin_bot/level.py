@@ -17,6 +17,7 @@ from admin_bot.utils import main_admin_menu, send_message
 from models.base import async_session
 from models.level import Level
 from models.user import User
+from service.reference_data import reference_data
 
 logger = logging.getLogger(__name__)
 
@@ -130,11 +131,8 @@ async def level_add_handler(
         return LEVEL_ADD
     async with async_session() as session:
         try:
-            existing_level = await session.execute(
-                select(Level).filter(Level.name.ilike(level_name))
-            )
-            existing_level = existing_level.scalar_one_or_none()
-            if existing_level:
+            snapshot = await reference_data.get()
+            if snapshot.find_level(level_name):
                 await update.message.reply_text(
                     "Уровень с таким названием уже существует."
                     "Пожалуйста, введите другое название."
@@ -143,6 +141,7 @@ async def level_add_handler(
             new_level = Level(name=level_name)
             session.add(new_level)
             await session.commit()
+            await reference_data.notify_changed()
             await update.message.reply_text(
                 f"Уровень '{level_name}' добавлен."
             )
@@ -297,6 +296,7 @@ async def level_delete_confirm_handler(
                         return LEVEL_DELETE_CONFIRM
                     await session.delete(level)
                     await session.commit()
+                    await reference_data.notify_changed()
                     await query.edit_message_text("Уровень удален.")
                     logger.info(f"Уровень {level_id} удален.")
                 else:
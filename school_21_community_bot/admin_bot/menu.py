@@ -20,10 +20,13 @@ from admin_bot.conversation import (
 )
 from admin_bot.decorators import admin_only
 from admin_bot.level import show_levels
-from admin_bot.metrics import export_metrics
+from admin_bot.metrics import metrics_menu
+from admin_bot.query_stats import show_query_stats
 from admin_bot.role import show_roles
 from admin_bot.user import show_users
+from admin_bot.user_import import export_users_document, user_import_start
 from admin_bot.utils import main_admin_menu, send_message
+from service.export import EXPORT_FORMATS
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +85,11 @@ async def admin_menu_handler(
     elif data == "levels":
         return await show_levels(update, context, page=0)
     elif data == "metrics":
-        return await export_metrics(update, context)
+        return await metrics_menu(update, context)
+    elif data == "query_stats":
+        return await show_query_stats(update, context)
+    elif data == "back_to_admin_menu":
+        return await main_admin_menu(update, context)
     elif data == "close_menu":
         await send_message(
             update,
@@ -133,6 +140,18 @@ async def user_menu(
                     "Поиск пользователей", callback_data="search_users"
                 )
             ],
+            [
+                InlineKeyboardButton(
+                    "Импорт пользователей", callback_data="import_users"
+                )
+            ],
+            [
+                InlineKeyboardButton(
+                    f"Экспорт · {label}",
+                    callback_data=f"users_export_{export_format}",
+                )
+                for export_format, label in EXPORT_FORMATS.items()
+            ],
             [
                 InlineKeyboardButton(
                     "Назад в меню", callback_data="back_to_admin_menu"
@@ -174,17 +193,25 @@ async def user_menu_handler(
         data = update.message.text
 
     if data == "list_users":
-        return await show_users(update, context, page=0)
+        return await show_users(update, context)
     elif data == "add_user":
         await send_message(update, context, "Введите полное имя пользователя:")
         return USER_ADD_FULL_NAME
     elif data == "delete_user":
-        return await show_users(update, context, page=0, action="delete")
+        return await show_users(update, context, action="delete")
     elif data == "edit_user":
-        return await show_users(update, context, page=0, action="edit")
+        return await show_users(update, context, action="edit")
     elif data == "search_users":
         from admin_bot.search import search_menu
         return await search_menu(update, context)
+    elif data == "import_users":
+        return await user_import_start(update, context)
+    elif data.startswith("users_export_"):
+        return await export_users_document(
+            update, context, data[len("users_export_"):]
+        )
+    elif data == "back_to_user_menu":
+        return await user_menu(update, context)
     elif data == "back_to_admin_menu":
         return await main_admin_menu(update, context)
     elif data == "🍔 Меню":
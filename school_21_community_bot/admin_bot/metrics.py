@@ -1,58 +1,203 @@
 import logging
-import os
+from datetime import datetime, timedelta
 
-import pandas as pd
 from sqlalchemy.future import select
-from telegram import Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
 
-from admin_bot.conversation import MAIN_ADMIN_MENU
-from admin_bot.utils import admin_only, send_message
-from models.base import async_session
+from admin_bot.conversation import MAIN_ADMIN_MENU, METRICS_MENU
+from admin_bot.utils import admin_only, main_admin_menu, send_message
 from models.metric import Metric
+from service.export import EXPORT_FORMATS, export_query
+from service.metric_rollup import get_registration_funnel, metric_rollup_job
 
 logger = logging.getLogger(__name__)
 
+METRIC_EXPORT_COLUMNS = ("ID", "User ID", "Action", "Data", "Timestamp")
+METRIC_EXPORT_PERIODS = (
+    (0, "всё время"),
+    (7, "7 дней"),
+    (30, "30 дней"),
+)
+EXPORT_METRICS_USAGE = (
+    f"Использование: /export_metrics [{'|'.join(EXPORT_FORMATS)}] "
+    "[с ГГГГ-ММ-ДД|-] [по ГГГГ-ММ-ДД|-] [действие]"
+)
+
 
 @admin_only
-async def export_metrics(
+async def metrics_menu(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ):
     """
-    Экспортирует метрики в файл Excel и отправляет его администратору.
+    Отображает меню выбора формата и периода экспорта метрик.
     """
-    try:
-        async with async_session() as session:
-            result = await session.execute(select(Metric))
-            metrics = result.scalars().all()
-
-        data = [
-            {
-                "ID": metric.id,
-                "User ID": metric.user_id,
-                "Action": metric.action,
-                "Data": metric.data,
-                "Timestamp": metric.timestamp,
-            }
-            for metric in metrics
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                f"{label} · {period_label}",
+                callback_data=f"metrics_export_{export_format}_{days}",
+            )
+            for days, period_label in METRIC_EXPORT_PERIODS
         ]
-        df = pd.DataFrame(data)
-        excel_path = "metrics_export.xlsx"
-        df.to_excel(excel_path, index=False)
+        for export_format, label in EXPORT_FORMATS.items()
+    ]
+    keyboard.append(
+        [InlineKeyboardButton("Воронка регистрации",
+                              callback_data="metrics_funnel")]
+    )
+    keyboard.append(
+        [InlineKeyboardButton("Назад в меню",
+                              callback_data="back_to_admin_menu")]
+    )
+    await send_message(
+        update,
+        context,
+        "Выберите формат и период экспорта метрик.\n"
+        f"Для фильтра по действию: {EXPORT_METRICS_USAGE}",
+        reply_markup=InlineKeyboardMarkup(keyboard),
+    )
+    return METRICS_MENU
+
+
+@admin_only
+async def metrics_menu_handler(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Обработчик действий в меню экспорта метрик.
+    """
+    query = update.callback_query
+    await query.answer()
+    data = query.data
+    if data.startswith("metrics_export_"):
+        export_format, days = data.split("_")[2:4]
+        days = int(days)
+        date_from = datetime.utcnow() - timedelta(days=days) if days else None
+        await export_metrics(
+            update, context, export_format, date_from=date_from
+        )
+        return METRICS_MENU
+    elif data == "metrics_funnel":
+        return await show_registration_funnel(update, context)
+    elif data == "back_to_admin_menu":
+        return await main_admin_menu(update, context)
+    await send_message(update, context, "Неизвестная команда.")
+    return METRICS_MENU
+
+
+@admin_only
+async def show_registration_funnel(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Досчитывает агрегаты метрик и отображает конверсию и отток
+    по шагам регистрации.
+    """
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("Обновить", callback_data="metrics_funnel")],
+        [InlineKeyboardButton("Назад в меню",
+                              callback_data="back_to_admin_menu")],
+    ])
+    try:
+        await metric_rollup_job.run()
+        funnel = await get_registration_funnel()
+    except Exception as e:
+        logger.error(f"Ошибка в show_registration_funnel: {e}")
+        await send_message(
+            update, context, "Произошла ошибка при построении воронки."
+        )
+        return METRICS_MENU
+    lines = ["Воронка регистрации:\n"]
+    for step, (title, users, conversion, drop_off) in enumerate(funnel, 1):
+        lines.append(
+            f"{step}. {title}: {users} "
+            f"({conversion:.1f}% от старта, отток {drop_off:.1f}%)"
+        )
+    await send_message(
+        update, context, "\n".join(lines), reply_markup=keyboard
+    )
+    return METRICS_MENU
 
-        with open(excel_path, "rb") as document:
+
+@admin_only
+async def export_metrics_command(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Обработчик команды /export_metrics с фильтрами по датам и действию.
+    """
+    args = context.args or []
+    export_format = args[0] if args else "xlsx"
+    try:
+        date_from, date_to = (
+            datetime.strptime(value, "%Y-%m-%d")
+            if value != "-" else None
+            for value in (args[1:3] + ["-", "-"])[:2]
+        )
+    except ValueError:
+        await send_message(update, context, EXPORT_METRICS_USAGE)
+        return MAIN_ADMIN_MENU
+    action = " ".join(args[3:]) or None
+    return await export_metrics(
+        update, context, export_format, date_from, date_to, action
+    )
+
+
+@admin_only
+async def export_metrics(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    export_format: str = "xlsx",
+    date_from: datetime = None,
+    date_to: datetime = None,
+    action: str = None,
+):
+    """
+    Экспортирует метрики в файл выбранного формата и отправляет
+    его администратору.
+    """
+    if export_format not in EXPORT_FORMATS:
+        await send_message(update, context, EXPORT_METRICS_USAGE)
+        return MAIN_ADMIN_MENU
+    query = select(
+        Metric.id,
+        Metric.user_id,
+        Metric.action,
+        Metric.data,
+        Metric.timestamp,
+    ).order_by(Metric.id)
+    if date_from:
+        query = query.where(Metric.timestamp >= date_from)
+    if date_to:
+        query = query.where(Metric.timestamp < date_to + timedelta(days=1))
+    if action:
+        query = query.where(Metric.action == action)
+    try:
+        document = await export_query(
+            query, METRIC_EXPORT_COLUMNS, export_format
+        )
+        with document:
             await context.bot.send_document(
                 chat_id=update.effective_chat.id,
                 document=document,
-                filename="metrics_export.xlsx",
-                caption="Экспорт метрик в формате Excel.",
+                filename=f"metrics_export.{export_format}",
+                caption=(
+                    "Экспорт метрик в формате "
+                    f"{EXPORT_FORMATS[export_format]}."
+                ),
             )
-        os.remove(excel_path)
         logger.info("Метрики экспортированы и отправлены пользователю.")
-        return MAIN_ADMIN_MENU
+    except ImportError as e:
+        logger.error(f"Формат {export_format} недоступен: {e}")
+        await send_message(
+            update,
+            context,
+            f"Формат {EXPORT_FORMATS[export_format]} недоступен на сервере.",
+        )
     except Exception as e:
         logger.error(f"Ошибка в export_metrics: {e}")
         await send_message(
             update, context, "Произошла ошибка при экспорте метрик."
         )
-        return MAIN_ADMIN_MENU
+    return MAIN_ADMIN_MENU
@@ -0,0 +1,66 @@
+import logging
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes
+
+from admin_bot.constants import MAIN_ADMIN_MENU
+from admin_bot.decorators import admin_only
+from admin_bot.utils import send_message
+from service.query_stats import query_stats
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_HANDLERS = 15
+
+
+def format_window(title, window, handlers):
+    lines = [
+        f"{title} (с {window.started_at:%d.%m %H:%M} UTC):",
+    ]
+    if not handlers:
+        lines.append("Обновлений не было.")
+    for name, stats in handlers:
+        lines.append(
+            f"• {name}: обновлений {stats.calls}, запросов "
+            f"{stats.statements / stats.calls:.1f} в среднем "
+            f"(макс. {stats.max_statements}), "
+            f"БД {stats.db_time / stats.calls * 1000:.1f} мс, "
+            f"обработка {stats.elapsed / stats.calls * 1000:.1f} мс"
+        )
+    lines.append(
+        f"Фоновые запросы: {window.background.statements}, "
+        f"БД {window.background.db_time * 1000:.0f} мс."
+    )
+    lines.append(f"Медленных запросов: {window.slow_queries}.")
+    return "\n".join(lines)
+
+
+@admin_only
+async def show_query_stats(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Отображает число запросов к БД и время их выполнения по
+    обработчикам за текущий и предыдущий интервалы статистики.
+    """
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("Обновить", callback_data="query_stats")],
+        [InlineKeyboardButton("Назад в меню",
+                              callback_data="back_to_admin_menu")],
+    ])
+    try:
+        windows = query_stats.summary(limit=MAX_REPORTED_HANDLERS)
+        text = "\n\n".join(
+            format_window(title, window, handlers)
+            for title, (window, handlers) in zip(
+                ("Текущий интервал", "Предыдущий интервал"), windows
+            )
+        )
+    except Exception as e:
+        logger.error(f"Ошибка в show_query_stats: {e}")
+        await send_message(
+            update, context, "Произошла ошибка при подсчете статистики."
+        )
+        return MAIN_ADMIN_MENU
+    await send_message(update, context, text, reply_markup=keyboard)
+    return MAIN_ADMIN_MENU
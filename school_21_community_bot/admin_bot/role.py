@@ -21,6 +21,7 @@ from admin_bot.utils import main_admin_menu, send_message
 from models.base import async_session
 from models.role import Role
 from models.user import User
+from service.reference_data import reference_data
 
 logger = logging.getLogger(__name__)
 
@@ -133,11 +134,8 @@ async def role_add_handler(
         return ROLE_ADD
     async with async_session() as session:
         try:
-            existing_role = await session.execute(
-                select(Role).filter(Role.name.ilike(role_name))
-            )
-            existing_role = existing_role.scalar_one_or_none()
-            if existing_role:
+            snapshot = await reference_data.get()
+            if snapshot.find_role(role_name):
                 await update.message.reply_text(
                     "Роль с таким названием уже существует. "
                     "Пожалуйста, введите другое название."
@@ -146,6 +144,7 @@ async def role_add_handler(
             new_role = Role(name=role_name)
             session.add(new_role)
             await session.commit()
+            await reference_data.notify_changed()
             await update.message.reply_text(f"Роль '{role_name}' добавлена.")
             logger.info(f"Добавлена новая роль: {role_name}")
         except SQLAlchemyError as e:
@@ -291,6 +290,7 @@ async def role_delete_confirm_handler(
                         return ROLE_DELETE_CONFIRM
                     await session.delete(role)
                     await session.commit()
+                    await reference_data.notify_changed()
                     await send_message(update, context, "Роль удалена.")
                     logger.info(f"Роль {role_id} удалена.")
                 else:
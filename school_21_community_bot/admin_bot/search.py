@@ -185,7 +185,7 @@ async def search_alphabet_handler(
             letter = data.split("_")[1]
             filters = {"alphabet": letter}
             from admin_bot.user import show_users
-            return await show_users(update, context, page=0, filters=filters)
+            return await show_users(update, context, filters=filters)
         elif data == "search_menu":
             return await search_menu(update, context)
         else:
@@ -215,7 +215,7 @@ async def search_nickname_handler(
         return SEARCH_NICKNAME
     filters = {"nickname": nickname}
     from admin_bot.user import show_users
-    return await show_users(update, context, page=0, filters=filters)
+    return await show_users(update, context, filters=filters)
 
 
 @admin_only
@@ -234,7 +234,7 @@ async def search_team_handler(
         return SEARCH_TEAM
     filters = {"team": team}
     from admin_bot.user import show_users
-    return await show_users(update, context, page=0, filters=filters)
+    return await show_users(update, context, filters=filters)
 
 
 @admin_only
@@ -253,4 +253,4 @@ async def search_role_handler(
         return SEARCH_ROLE
     filters = {"role": role}
     from admin_bot.user import show_users
-    return await show_users(update, context, page=0, filters=filters)
+    return await show_users(update, context, filters=filters)
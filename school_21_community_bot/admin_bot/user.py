@@ -27,10 +27,17 @@ from admin_bot.conversation import (
 )
 from admin_bot.decorators import admin_only
 from admin_bot.utils import main_admin_menu, send_message
+from crud.pagination import paginate_by_keyset
+from crud.user import nickname_rank, nickname_search_filter
 from models.base import async_session
 from models.level import Level
 from models.role import Role
-from models.user import User
+from models.user import User, normalize_nickname, rank_nick_search
+from service.callback_codec import (CallbackPayloadExpired, callback_codec,
+                                    split_callback)
+from service.peer_directory import peer_directory
+from service.reference_data import reference_data
+from utils.pagination import decode_peer_cursor, encode_peer_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -224,15 +231,11 @@ async def user_add_project(
                 )
                 from admin_bot.menu import user_menu
                 return await user_menu(update, context)
-            role = await session.execute(
-                select(Role).filter(Role.name.ilike(role_name))
-            )
-            role = role.scalar_one_or_none()
-            if not role:
-                role = Role(name=role_name)
-                session.add(role)
+            snapshot = await reference_data.get()
+            role_name = snapshot.find_role(role_name) or role_name
+            if role_name not in snapshot.roles:
+                session.add(Role(name=role_name))
                 await session.commit()
-                await session.refresh(role)
                 logger.info(f"Создана новая роль: {role_name}")
             level_name = context.user_data.get("new_user_level_input")
             if not level_name:
@@ -241,15 +244,10 @@ async def user_add_project(
                     "создания пользователя заново."
                 )
                 return await user_menu(update, context)
-            level = await session.execute(
-                select(Level).filter(Level.name.ilike(level_name))
-            )
-            level = level.scalar_one_or_none()
-            if not level:
-                level = Level(name=level_name)
-                session.add(level)
+            level_name = snapshot.find_level(level_name) or level_name
+            if level_name not in snapshot.levels:
+                session.add(Level(name=level_name))
                 await session.commit()
-                await session.refresh(level)
                 logger.info(f"Создан новый уровень: {level_name}")
             new_user = User(
                 telegram_id=context.user_data["new_user_telegram_id"],
@@ -258,13 +256,15 @@ async def user_add_project(
                 sberchat_nick=context.user_data["new_user_sberchat_nick"],
                 school21_nick=context.user_data["new_user_school21_nick"],
                 team=context.user_data["new_user_team"],
-                role=role.name,
-                level=level.name,
+                role=role_name,
+                level=level_name,
                 project=project,
                 registration_date=datetime.utcnow(),
             )
             session.add(new_user)
             await session.commit()
+            peer_directory.upsert(new_user)
+            await peer_directory.notify_changed(new_user.id)
             await update.message.reply_text(
                 f"Пользователь '{new_user.full_name}' добавлен."
             )
@@ -290,19 +290,29 @@ async def user_add_project(
 async def show_users(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE,
-    page: int = 0,
+    after: str = None,
+    before: str = None,
     action: str = None,
     filters: dict = None,
 ):
-    """Отображает список пользователей с учетом фильтров и пагинации."""
+    """
+    Отображает список пользователей с учетом фильтров и пагинации.
+    Страница определяется курсором по ключу (school21_nick, id), а при
+    поиске по никнейму — по ключу (ранг совпадения, school21_nick, id).
+    Фильтры и действие списка хранятся в callback_codec, кнопки
+    навигации несут только токен и курсор.
+    """
     try:
+        nickname = normalize_nickname((filters or {}).get("nickname"))
+        ordering = (User.school21_nick, User.id)
         async with async_session() as session:
-            query = select(User).order_by(User.school21_nick.asc())
+            query = select(User)
             if filters:
-                if "nickname" in filters:
+                if nickname:
                     query = query.filter(
-                        User.school21_nick.ilike(f"%{filters['nickname']}%")
+                        nickname_search_filter(session, nickname)
                     )
+                    ordering = (nickname_rank(nickname), *ordering)
                 if "team" in filters:
                     query = query.filter(User.team.ilike(
                         f"%{filters['team']}%"))
@@ -313,9 +323,25 @@ async def show_users(
                     query = query.filter(
                         User.school21_nick.ilike(f"{filters['alphabet']}%")
                     )
-            query = query.offset(page * PAGINATION_SIZE).limit(PAGINATION_SIZE)
-            result = await session.execute(query)
-            users = result.scalars().all()
+            users, has_prev, has_next = await paginate_by_keyset(
+                session,
+                query,
+                ordering,
+                after=decode_peer_cursor(after),
+                before=decode_peer_cursor(before),
+                limit=PAGINATION_SIZE,
+            )
+
+        def user_cursor(user):
+            if not nickname:
+                return encode_peer_cursor(user)
+            return encode_peer_cursor(
+                user, rank_nick_search(user.nick_search or "", nickname)
+            )
+
+        token = callback_codec.store(
+            {"action": action, "filters": filters or {}}
+        )
         keyboard = []
         for user in users:
             display_name = (
@@ -328,7 +354,9 @@ async def show_users(
                     [
                         InlineKeyboardButton(
                             f"Удалить {display_name}",
-                            callback_data=f"delete_user_{user.id}",
+                            callback_data=callback_codec.pack(
+                                "delete_user", argument=user.id
+                            ),
                         )
                     ]
                 )
@@ -337,7 +365,9 @@ async def show_users(
                     [
                         InlineKeyboardButton(
                             f"Редактировать {display_name}",
-                            callback_data=f"edit_user_{user.id}",
+                            callback_data=callback_codec.pack(
+                                "edit_user", argument=user.id
+                            ),
                         )
                     ]
                 )
@@ -345,25 +375,30 @@ async def show_users(
                 keyboard.append(
                     [
                         InlineKeyboardButton(
-                            f"{display_name}", callback_data=f"user_{user.id}"
+                            f"{display_name}",
+                            callback_data=callback_codec.pack(
+                                "user", argument=user.id
+                            ),
                         )
                     ]
                 )
         navigation_buttons = []
-        if page > 0:
+        if has_prev and users:
             navigation_buttons.append(
                 InlineKeyboardButton(
                     "← Назад",
-                    callback_data=(f"users_page_{page - 1}_{action or ''}_"
-                                   f"{serialize_filters(filters)}"),
+                    callback_data=callback_codec.pack(
+                        "users_prev", token, user_cursor(users[0])
+                    ),
                 )
             )
-        if len(users) == PAGINATION_SIZE:
+        if has_next and users:
             navigation_buttons.append(
                 InlineKeyboardButton(
                     "Далее →",
-                    callback_data=(f"users_page_{page + 1}_{action or ''}_"
-                                   f"{serialize_filters(filters)}"),
+                    callback_data=callback_codec.pack(
+                        "users_next", token, user_cursor(users[-1])
+                    ),
                 )
             )
         if navigation_buttons:
@@ -387,25 +422,69 @@ async def show_users(
         return ConversationHandler.END
 
 
-def serialize_filters(filters: dict) -> str:
-    """
-    Сериализует словарь фильтров в строку для передачи в callback_data.
-    Используется разделитель '|'.
-    """
-    if not filters:
-        return "none"
-    return "|".join([f"{key}:{value}" for key, value in filters.items()])
+async def _open_user_detail(update, context, action, token, argument):
+    return await user_detail(update, context, int(argument))
+
+
+async def _open_user_edit(update, context, action, token, argument):
+    context.user_data["edit_user_id"] = int(argument)
+    return await edit_user_field(update, context)
 
 
-def deserialize_filters(filter_string: str) -> dict:
-    """Десериализует строку фильтров обратно в словарь."""
-    if filter_string == "none":
-        return {}
-    filters = {}
-    for item in filter_string.split("|"):
-        key, value = item.split(":", 1)
-        filters[key] = value
-    return filters
+async def _confirm_user_delete(update, context, action, token, argument):
+    context.user_data["delete_user_id"] = int(argument)
+    await update.callback_query.edit_message_text(
+        "Вы уверены, что хотите удалить пользователя? "
+        "Это действие необратимо.",
+        reply_markup=InlineKeyboardMarkup(
+            [
+                [
+                    InlineKeyboardButton(
+                        "Да", callback_data="confirm_delete_user"
+                    )
+                ],
+                [
+                    InlineKeyboardButton(
+                        "Нет", callback_data="cancel_delete_user"
+                    )
+                ],
+            ]
+        ),
+    )
+    return USER_DELETE_CONFIRM
+
+
+async def _show_users_page(update, context, action, token, argument):
+    payload = await callback_codec.load(token)
+    return await show_users(
+        update,
+        context,
+        action=payload["action"],
+        filters=payload["filters"],
+        **{USER_PAGE_BOUNDS[action]: argument},
+    )
+
+
+async def _back_to_user_menu(update, context, action, token, argument):
+    from admin_bot.menu import user_menu
+    return await user_menu(update, context)
+
+
+async def _open_search_menu(update, context, action, token, argument):
+    from admin_bot.search import search_menu
+    return await search_menu(update, context)
+
+
+USER_PAGE_BOUNDS = {"users_prev": "before", "users_next": "after"}
+USER_LIST_ACTIONS = {
+    "user": _open_user_detail,
+    "edit_user": _open_user_edit,
+    "delete_user": _confirm_user_delete,
+    "users_prev": _show_users_page,
+    "users_next": _show_users_page,
+    "back_to_user_menu": _back_to_user_menu,
+    "search_users": _open_search_menu,
+}
 
 
 @admin_only
@@ -417,54 +496,28 @@ async def user_list_handler(
     """
     query = update.callback_query
     await query.answer()
-    data = query.data
+    action, token, argument = split_callback(query.data)
+    handler = USER_LIST_ACTIONS.get(action)
+    if handler is None:
+        await query.edit_message_text("Неизвестная команда.")
+        return USER_LIST
     try:
-        if data.startswith("user_"):
-            user_id = int(data.split("_")[1])
-            return await user_detail(update, context, user_id)
-        elif data.startswith("edit_user_"):
-            user_id = int(data.split("_")[2])
-            context.user_data["edit_user_id"] = user_id
-            return await edit_user_field(update, context)
-        elif data.startswith("delete_user_"):
-            user_id = int(data.split("_")[2])
-            context.user_data["delete_user_id"] = user_id
-            await query.edit_message_text(
-                "Вы уверены, что хотите удалить пользователя? "
-                "Это действие необратимо.",
-                reply_markup=InlineKeyboardMarkup(
+        return await handler(update, context, action, token, argument)
+    except CallbackPayloadExpired:
+        await query.edit_message_text(
+            "Список устарел. Откройте его заново.",
+            reply_markup=InlineKeyboardMarkup(
+                [
                     [
-                        [
-                            InlineKeyboardButton(
-                                "Да", callback_data="confirm_delete_user"
-                            )
-                        ],
-                        [
-                            InlineKeyboardButton(
-                                "Нет", callback_data="cancel_delete_user"
-                            )
-                        ],
+                        InlineKeyboardButton(
+                            "Назад в меню пользователей",
+                            callback_data="back_to_user_menu",
+                        )
                     ]
-                ),
-            )
-            return USER_DELETE_CONFIRM
-        elif data.startswith("users_page_"):
-            parts = data.split("_")
-            page = int(parts[2])
-            action = parts[3] if len(parts) > 3 else None
-            filter_string = parts[4] if len(parts) > 4 else "none"
-            filters = deserialize_filters(filter_string)
-            return await show_users(update, context, page=page,
-                                    action=action, filters=filters)
-        elif data == "back_to_user_menu":
-            from admin_bot.menu import user_menu
-            return await user_menu(update, context)
-        elif data == "search_users":
-            from admin_bot.search import search_menu
-            return await search_menu(update, context)
-        else:
-            await query.edit_message_text("Неизвестная команда.")
-            return USER_LIST
+                ]
+            ),
+        )
+        return USER_LIST
     except Exception as e:
         logger.error(f"Ошибка в user_list_handler: {e}")
         await query.edit_message_text(
@@ -488,16 +541,6 @@ async def user_detail(
             user = result.scalar_one_or_none()
 
             if user:
-                role = await session.execute(
-                    select(Role).filter(Role.name.ilike(user.role))
-                )
-                role = role.scalar_one_or_none()
-
-                level = await session.execute(
-                    select(Level).filter(Level.name.ilike(user.level))
-                )
-                level = level.scalar_one_or_none()
-
                 message = (
                     f"ID: {user.id}\n"
                     f"Telegram ID: {user.telegram_id}\n"
@@ -589,7 +632,7 @@ async def user_detail_handler(
             )
             return USER_DELETE_CONFIRM
         elif data == "back_to_user_list":
-            return await show_users(update, context, page=0)
+            return await show_users(update, context)
         elif data == "back_to_admin_menu":
             return await main_admin_menu(update, context)
         else:
@@ -624,11 +667,13 @@ async def user_delete_confirm_handler(
                 if user:
                     await session.delete(user)
                     await session.commit()
+                    peer_directory.remove(user_id)
+                    await peer_directory.notify_changed(user_id)
                     await query.edit_message_text("Пользователь удален.")
                     logger.info(f"Пользователь {user_id} удален.")
                 else:
                     await query.edit_message_text("Пользователь не найден.")
-            return await show_users(update, context, page=0)
+            return await show_users(update, context)
         elif data == "cancel_delete_user":
             await query.edit_message_text("Удаление отменено.")
             return await user_detail(update, context, user_id)
@@ -770,27 +815,26 @@ async def user_edit_role_input(
     user_id = context.user_data.get("edit_user_id")
     async with async_session() as session:
         try:
-            role = await session.execute(
-                select(Role).filter(Role.name.ilike(role_input))
-            )
-            role = role.scalar_one_or_none()
-            if not role:
-                role = Role(name=role_input)
-                session.add(role)
+            snapshot = await reference_data.get()
+            role_name = snapshot.find_role(role_input) or role_input
+            if role_name not in snapshot.roles:
+                session.add(Role(name=role_name))
                 await session.commit()
-                await session.refresh(role)
+                await reference_data.notify_changed()
                 logger.info(
-                    f"Создана новая роль при редактировании: {role.name}"
+                    f"Создана новая роль при редактировании: {role_name}"
                 )
             user = await session.execute(
                 select(User).filter(User.id == user_id)
             )
             user = user.scalar_one_or_none()
             if user:
-                user.role = role.name
+                user.role = role_name
                 await session.commit()
+                peer_directory.upsert(user)
+                await peer_directory.notify_changed(user_id)
                 logger.info(
-                    f"Пользователь {user_id} обновил роль на '{role.name}'."
+                    f"Пользователь {user_id} обновил роль на '{role_name}'."
                 )
                 await send_message(update, context, "Роль успешно обновлена.")
                 return await user_detail(update, context, user_id)
@@ -836,28 +880,27 @@ async def user_edit_level_input(
     user_id = context.user_data.get("edit_user_id")
     async with async_session() as session:
         try:
-            level = await session.execute(
-                select(Level).filter(Level.name.ilike(level_input))
-            )
-            level = level.scalar_one_or_none()
-            if not level:
-                level = Level(name=level_input)
-                session.add(level)
+            snapshot = await reference_data.get()
+            level_name = snapshot.find_level(level_input) or level_input
+            if level_name not in snapshot.levels:
+                session.add(Level(name=level_name))
                 await session.commit()
-                await session.refresh(level)
+                await reference_data.notify_changed()
                 logger.info(
-                    f"Создан новый уровень при редактировании: {level.name}"
+                    f"Создан новый уровень при редактировании: {level_name}"
                 )
             user = await session.execute(
                 select(User).filter(User.id == user_id)
             )
             user = user.scalar_one_or_none()
             if user:
-                user.level = level.name
+                user.level = level_name
                 await session.commit()
+                peer_directory.upsert(user)
+                await peer_directory.notify_changed(user_id)
                 logger.info(
                     f"Пользователь {user_id} обновил уровень "
-                    f"на '{level.name}'."
+                    f"на '{level_name}'."
                 )
                 await update.message.reply_text("Уровень успешно обновлен.")
                 return await user_detail(update, context, user_id)
@@ -922,6 +965,8 @@ async def user_edit_value_handler(
                         return USER_EDIT_VALUE
                 setattr(user, field, new_value)
                 await session.commit()
+                peer_directory.upsert(user)
+                await peer_directory.notify_changed(user_id)
                 await update.message.reply_text("Поле успешно обновлено.")
                 logger.info(
                     f"Пользователь {user_id} обновил поле {field} "
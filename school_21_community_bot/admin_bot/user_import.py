@@ -0,0 +1,149 @@
+import logging
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes
+
+from admin_bot.conversation import USER_IMPORT, USER_MENU
+from admin_bot.decorators import admin_only
+from admin_bot.utils import send_message
+from config import USER_IMPORT_MAX_SIZE
+from service.export import EXPORT_FORMATS
+from service.user_import import (USER_IMPORT_FIELDS, USER_IMPORT_FORMATS,
+                                 export_users, import_users,
+                                 parse_user_document)
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 20
+EXPORT_USERS_USAGE = (
+    f"Использование: /export_users [{'|'.join(EXPORT_FORMATS)}]"
+)
+
+
+@admin_only
+async def user_import_start(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Запрашивает файл для массового импорта пользователей.
+    """
+    keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("Назад", callback_data="back_to_user_menu")]
+    ])
+    await send_message(
+        update,
+        context,
+        "Отправьте файл CSV или JSON с пользователями. Поля: "
+        f"{', '.join(USER_IMPORT_FIELDS)}.\n"
+        "Пользователи с существующим Telegram ID будут обновлены.",
+        reply_markup=keyboard,
+    )
+    return USER_IMPORT
+
+
+@admin_only
+async def user_import_document(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Импортирует пользователей из присланного файла и отправляет отчет
+    с числом добавленных и обновленных записей и ошибками.
+    """
+    document = update.message.document
+    filename = document.file_name or ""
+    if filename.rsplit(".", 1)[-1].lower() not in USER_IMPORT_FORMATS:
+        await update.message.reply_text(
+            "Поддерживаются только файлы CSV и JSON."
+        )
+        return USER_IMPORT
+    if document.file_size and document.file_size > USER_IMPORT_MAX_SIZE:
+        await update.message.reply_text("Файл слишком большой.")
+        return USER_IMPORT
+    try:
+        file = await document.get_file()
+        content = await file.download_as_bytearray()
+        rows = parse_user_document(bytes(content), filename)
+    except (UnicodeDecodeError, ValueError) as e:
+        await update.message.reply_text(f"Не удалось прочитать файл: {e}")
+        return USER_IMPORT
+    try:
+        result = await import_users(rows)
+    except Exception as e:
+        logger.error(f"Ошибка при импорте пользователей: {e}")
+        await update.message.reply_text(
+            "Произошла ошибка при импорте пользователей. "
+            "Изменения не сохранены."
+        )
+        from admin_bot.menu import user_menu
+        return await user_menu(update, context)
+    logger.info(
+        f"Импорт пользователей: добавлено {result.created}, "
+        f"обновлено {result.updated}, ошибок {len(result.errors)}."
+    )
+    lines = [
+        f"Импорт завершен. Добавлено: {result.created}, "
+        f"обновлено: {result.updated}, ошибок: {len(result.errors)}."
+    ]
+    for number, error_message in result.errors[:MAX_REPORTED_ERRORS]:
+        lines.append(f"Запись {number}: {error_message}")
+    if len(result.errors) > MAX_REPORTED_ERRORS:
+        lines.append(
+            f"И еще ошибок: {len(result.errors) - MAX_REPORTED_ERRORS}."
+        )
+    await update.message.reply_text("\n".join(lines))
+    from admin_bot.menu import user_menu
+    return await user_menu(update, context)
+
+
+@admin_only
+async def export_users_command(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """
+    Обработчик команды /export_users.
+    """
+    args = context.args or []
+    return await export_users_document(
+        update, context, args[0] if args else "csv"
+    )
+
+
+@admin_only
+async def export_users_document(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    export_format: str = "csv",
+):
+    """
+    Выгружает пользователей в файл выбранного формата. Файл CSV
+    можно снова загрузить через импорт пользователей.
+    """
+    if export_format not in EXPORT_FORMATS:
+        await send_message(update, context, EXPORT_USERS_USAGE)
+        return USER_MENU
+    try:
+        document = await export_users(export_format)
+        with document:
+            await context.bot.send_document(
+                chat_id=update.effective_chat.id,
+                document=document,
+                filename=f"users_export.{export_format}",
+                caption=(
+                    "Экспорт пользователей в формате "
+                    f"{EXPORT_FORMATS[export_format]}."
+                ),
+            )
+        logger.info("Пользователи экспортированы и отправлены.")
+    except ImportError as e:
+        logger.error(f"Формат {export_format} недоступен: {e}")
+        await send_message(
+            update,
+            context,
+            f"Формат {EXPORT_FORMATS[export_format]} недоступен на сервере.",
+        )
+    except Exception as e:
+        logger.error(f"Ошибка в export_users_document: {e}")
+        await send_message(
+            update, context, "Произошла ошибка при экспорте пользователей."
+        )
+    return USER_MENU
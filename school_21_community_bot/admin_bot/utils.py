@@ -51,6 +51,8 @@ async def main_admin_menu(
             [InlineKeyboardButton("Роли", callback_data="roles")],
             [InlineKeyboardButton("Уровни", callback_data="levels")],
             [InlineKeyboardButton("Экспорт метрик", callback_data="metrics")],
+            [InlineKeyboardButton("Запросы к БД",
+                                  callback_data="query_stats")],
             [InlineKeyboardButton("Закрыть меню", callback_data="close_menu")],
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
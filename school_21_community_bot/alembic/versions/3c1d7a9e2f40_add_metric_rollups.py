@@ -0,0 +1,56 @@
+"""Add metric rollups and registration funnel
+
+Revision ID: 3c1d7a9e2f40
+Revises:
+Create Date: 2026-10-18 08:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1d7a9e2f40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'metric_rollup',
+        sa.Column('period', sa.String(length=8), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('action', sa.String(length=1000), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('period', 'bucket', 'action'),
+    )
+    op.create_table(
+        'registration_funnel',
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('step', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.create_index(
+        op.f('ix_registration_funnel_step'),
+        'registration_funnel',
+        ['step'],
+    )
+    op.create_table(
+        'rollup_state',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('high_water_mark', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.create_index(op.f('ix_metric_timestamp'), 'metric', ['timestamp'])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_metric_timestamp'), table_name='metric')
+    op.drop_table('rollup_state')
+    op.drop_index(
+        op.f('ix_registration_funnel_step'), table_name='registration_funnel'
+    )
+    op.drop_table('registration_funnel')
+    op.drop_table('metric_rollup')
@@ -0,0 +1,88 @@
+"""Add user nick search
+
+Revision ID: 5b2e8c1f4a7d
+Revises: 3c1d7a9e2f40
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from models.user import NICK_SEARCH_FTS_TABLE
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e8c1f4a7d'
+down_revision = '3c1d7a9e2f40'
+branch_labels = None
+depends_on = None
+
+NICK_SEARCH_EXPRESSION = (
+    "' ' || lower(trim(telegram_nick)) || ' ' || lower(trim(sberchat_nick))"
+    " || ' ' || lower(trim(school21_nick)) || ' '"
+)
+
+
+def upgrade():
+    op.add_column(
+        'user', sa.Column('nick_search', sa.String(length=320), nullable=True)
+    )
+    op.execute(f'UPDATE "user" SET nick_search = {NICK_SEARCH_EXPRESSION}')
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_user_nick_search_trgm',
+            'user',
+            ['nick_search'],
+            postgresql_using='gin',
+            postgresql_ops={'nick_search': 'gin_trgm_ops'},
+        )
+    elif dialect == 'sqlite':
+        op.create_index('ix_user_nick_search_trgm', 'user', ['nick_search'])
+        op.execute(
+            f"CREATE VIRTUAL TABLE {NICK_SEARCH_FTS_TABLE} USING fts5("
+            "nick_search, content='user', content_rowid='id', "
+            "tokenize='trigram')"
+        )
+        op.execute(
+            f'CREATE TRIGGER {NICK_SEARCH_FTS_TABLE}_ai AFTER INSERT '
+            f'ON "user" BEGIN '
+            f'INSERT INTO {NICK_SEARCH_FTS_TABLE}(rowid, nick_search) '
+            f'VALUES (new.id, new.nick_search); END'
+        )
+        op.execute(
+            f'CREATE TRIGGER {NICK_SEARCH_FTS_TABLE}_ad AFTER DELETE '
+            f'ON "user" BEGIN '
+            f'INSERT INTO {NICK_SEARCH_FTS_TABLE}'
+            f'({NICK_SEARCH_FTS_TABLE}, rowid, nick_search) '
+            f"VALUES ('delete', old.id, old.nick_search); END"
+        )
+        op.execute(
+            f'CREATE TRIGGER {NICK_SEARCH_FTS_TABLE}_au AFTER UPDATE '
+            f'OF nick_search ON "user" BEGIN '
+            f'INSERT INTO {NICK_SEARCH_FTS_TABLE}'
+            f'({NICK_SEARCH_FTS_TABLE}, rowid, nick_search) '
+            f"VALUES ('delete', old.id, old.nick_search); "
+            f'INSERT INTO {NICK_SEARCH_FTS_TABLE}(rowid, nick_search) '
+            f'VALUES (new.id, new.nick_search); END'
+        )
+        op.execute(
+            f'INSERT INTO {NICK_SEARCH_FTS_TABLE}({NICK_SEARCH_FTS_TABLE}) '
+            f"VALUES ('rebuild')"
+        )
+    else:
+        op.create_index('ix_user_nick_search_trgm', 'user', ['nick_search'])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(
+                f'DROP TRIGGER IF EXISTS {NICK_SEARCH_FTS_TABLE}_{suffix}'
+            )
+        op.execute(f'DROP TABLE IF EXISTS {NICK_SEARCH_FTS_TABLE}')
+    op.drop_index('ix_user_nick_search_trgm', table_name='user')
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('nick_search')
@@ -0,0 +1,32 @@
+"""Add bot state
+
+Revision ID: 8e4b2d6f1a93
+Revises: 5b2e8c1f4a7d
+Create Date: 2026-10-18 08:35:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4b2d6f1a93'
+down_revision = '5b2e8c1f4a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bot_state',
+        sa.Column('namespace', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('key', sa.String(length=512), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('namespace', 'kind', 'key'),
+    )
+
+
+def downgrade():
+    op.drop_table('bot_state')
@@ -0,0 +1,38 @@
+"""Add callback payload
+
+Revision ID: d27f5c8a4b16
+Revises: 8e4b2d6f1a93
+Create Date: 2026-10-18 08:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd27f5c8a4b16'
+down_revision = '8e4b2d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'callback_payload',
+        sa.Column('token', sa.String(length=16), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('token'),
+    )
+    op.create_index(
+        op.f('ix_callback_payload_expires_at'),
+        'callback_payload',
+        ['expires_at'],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        op.f('ix_callback_payload_expires_at'), table_name='callback_payload'
+    )
+    op.drop_table('callback_payload')
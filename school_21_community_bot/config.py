@@ -13,3 +13,40 @@ ADMIN_USER_IDS = [int(
     user_id.strip()
 ) for user_id in ADMIN_USER_IDS if user_id.strip().isdigit()]
 TOKEN_ADMIN = os.getenv('TOKEN_ADMIN')
+PEER_DIRECTORY_REFRESH_INTERVAL = int(
+    os.getenv('PEER_DIRECTORY_REFRESH_INTERVAL', 300)
+)
+METRIC_BATCH_SIZE = int(os.getenv('METRIC_BATCH_SIZE', 200))
+METRIC_FLUSH_INTERVAL = float(os.getenv('METRIC_FLUSH_INTERVAL', 2))
+METRIC_QUEUE_SIZE = int(os.getenv('METRIC_QUEUE_SIZE', 10000))
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+SEED_CHUNK_SIZE = int(os.getenv('SEED_CHUNK_SIZE', 5000))
+EXPORT_SPOOL_SIZE = int(os.getenv('EXPORT_SPOOL_SIZE', 10 * 1024 * 1024))
+USER_IMPORT_MAX_SIZE = int(
+    os.getenv('USER_IMPORT_MAX_SIZE', 5 * 1024 * 1024)
+)
+METRIC_ROLLUP_INTERVAL = int(os.getenv('METRIC_ROLLUP_INTERVAL', 600))
+METRIC_ROLLUP_LAG = int(os.getenv('METRIC_ROLLUP_LAG', 60))
+MEMBERSHIP_CACHE_TTL = int(os.getenv('MEMBERSHIP_CACHE_TTL', 300))
+REFERENCE_DATA_TTL = int(os.getenv('REFERENCE_DATA_TTL', 300))
+REFERENCE_DATA_CHANNEL = os.getenv('REFERENCE_DATA_CHANNEL', 'reference_data')
+KEYBOARD_CACHE_SIZE = int(os.getenv('KEYBOARD_CACHE_SIZE', 1024))
+SIMILAR_PEERS_LIMIT = int(os.getenv('SIMILAR_PEERS_LIMIT', 30))
+SIMILAR_PEERS_DIMENSIONS = int(os.getenv('SIMILAR_PEERS_DIMENSIONS', 1024))
+CALLBACK_PAYLOAD_TTL = int(os.getenv('CALLBACK_PAYLOAD_TTL', 24 * 60 * 60))
+SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 0.2))
+QUERY_STATS_INTERVAL = int(os.getenv('QUERY_STATS_INTERVAL', 60 * 60))
+INVITE_LINK_TTL = int(os.getenv('INVITE_LINK_TTL', 24 * 60 * 60))
+OUTBOX_GLOBAL_RATE = float(os.getenv('OUTBOX_GLOBAL_RATE', 30))
+OUTBOX_CHAT_RATE = float(os.getenv('OUTBOX_CHAT_RATE', 1))
+OUTBOX_MAX_RETRIES = int(os.getenv('OUTBOX_MAX_RETRIES', 5))
+BOTS_RUN_MODE = os.getenv('BOTS_RUN_MODE', 'combined')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', 1))
+USER_BOT_MODE = os.getenv('USER_BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')
+PERSISTENCE_UPDATE_INTERVAL = int(os.getenv('PERSISTENCE_UPDATE_INTERVAL', 10))
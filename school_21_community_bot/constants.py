@@ -150,6 +150,13 @@ class BotMessage:
     CANT_BACK_TO_LIST_MESSAGE = (
         'Не удалось вернуться к списку. Начните сначала.'
     )
+    SEARCH_EXPIRED_MESSAGE = (
+        'Результаты поиска устарели. Начни поиск заново.'
+    )
+    NO_SIMILAR_PEERS_MESSAGE = (
+        'Пока не нашлось пиров с похожим профилем. Расскажи подробнее, '
+        'над чем ты работаешь, в профиле (/change_profile).'
+    )
     CANT_BACK_TO_PREVIOUS_STEP_MESSAGE = (
         'Не удалось вернуться к предыдущему шагу. Начните сначала.'
     )
@@ -182,6 +189,9 @@ class BotMessage:
     peers_with_role_level_message = (
         'Пиры с ролью {role} и уровнем {display_level}:'
     )
+    SIMILAR_PEERS_MESSAGE = (
+        'Пиры с похожей ролью, уровнем, командой и проектом:'
+    )
 
 
 class MetricMessage:
@@ -204,6 +214,7 @@ class MetricMessage:
     LEVEL_UPDATED = 'Обновлено поле "Уровень квалификации"'
     field_updated = 'Обновлено поле {field_for_edit}'
     SCHOOL_21_NICKNAME_NOT_UNIQUE = 'Никнейм школы 21 уже существует'
+    REGISTRATION_COMPLETED = 'Регистрация завершена'
 
 
 class ButtonText:
@@ -228,6 +239,7 @@ class ButtonText:
     BUTTON_SEARCH_BY_ROLE = 'По роли'
     BUTTON_SEARCH_BY_TEAM_NAME = 'По названию команды'
     BUTTON_SEARCH_BY_NICKNAME = 'По никнейму'
+    BUTTON_SEARCH_SIMILAR = 'Похожие на меня'
     BUTTON_BACK_TO_SEARCH_CRITERIA = 'Назад к критериям поиска'
     BUTTON_BACK_TO_SELECTION = '← Назад к выбору'
 
@@ -0,0 +1,38 @@
+from sqlalchemy import tuple_
+
+from constants import ServiceConstant
+
+
+async def paginate_by_keyset(
+    session,
+    query,
+    columns,
+    after=None,
+    before=None,
+    limit=ServiceConstant.PAGE_SIZE
+):
+    """
+    Выполняет запрос с постраничной выборкой по ключу (keyset).
+
+    Вместо OFFSET используется условие по значениям ключа сортировки
+    на границе страницы, поэтому любая страница стоит столько же, сколько
+    первая. Возвращает элементы страницы и признаки наличия
+    предыдущей и следующей страниц.
+    """
+    key = tuple_(*columns)
+    if before is not None:
+        query = query.where(key < tuple_(*before)).order_by(
+            *(column.desc() for column in columns)
+        )
+    else:
+        if after is not None:
+            query = query.where(key > tuple_(*after))
+        query = query.order_by(*columns)
+    result = await session.execute(query.limit(limit + 1))
+    items = list(result.scalars().all())
+    has_more = len(items) > limit
+    items = items[:limit]
+    if before is not None:
+        items.reverse()
+        return items, has_more, True
+    return items, after is not None, has_more
@@ -0,0 +1,24 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+UPSERT_CHUNK_SIZE = 500
+
+
+def get_insert(session, model):
+    """
+    Возвращает INSERT с поддержкой ON CONFLICT для диалекта БД,
+    к которой привязана сессия.
+    """
+    dialect = session.bind.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(
+        f'Upsert не поддерживается для диалекта "{dialect}"'
+    )
+
+
+def chunked(rows, size=UPSERT_CHUNK_SIZE):
+    """Делит список строк на части для многострочных INSERT."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
@@ -1,110 +1,146 @@
 import logging
 
+from sqlalchemy import case, column, table
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.future import select
 
-from constants import ServiceConstant
+from crud.upsert import get_insert
 from models.base import async_session
 from models.role import Role
-from models.user import User
+from models.user import (NICK_SEARCH_FTS_TABLE, User, build_nick_search,
+                         normalize_nickname)
+from service.peer_directory import peer_directory
+from service.reference_data import reference_data
+from service.user_flags import user_flag_writer
 
 logger = logging.getLogger(__name__)
 
-
-async def get_role_by_name(session, role_name: str) -> Role:
-    try:
-        result = await session.execute(
-            select(Role).where(Role.name == role_name)
+NICK_SEARCH_FTS = table(
+    NICK_SEARCH_FTS_TABLE, column('rowid'), column('nick_search')
+)
+FTS_TRIGRAM_SIZE = 3
+# Поля профиля, которые пользователь заполняет при регистрации.
+USER_PROFILE_FIELDS = (
+    'full_name',
+    'role',
+    'level',
+    'team',
+    'project',
+    'telegram_nick',
+    'sberchat_nick',
+    'school21_nick',
+)
+
+
+def _escape_like(value):
+    return (
+        value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    )
+
+
+def nickname_search_filter(session, nickname):
+    """
+    Условие поиска пользователей по вхождению строки в любой из никнеймов.
+
+    Поиск идет по нормализованному столбцу nick_search. В PostgreSQL
+    условие LIKE обслуживается триграммным GIN-индексом, в SQLite для
+    запросов от трех символов используется FTS5-таблица с триграммным
+    токенизатором.
+    """
+    nickname = normalize_nickname(nickname)
+    if (
+        session.bind.dialect.name == 'sqlite' and
+        len(nickname) >= FTS_TRIGRAM_SIZE
+    ):
+        phrase = '"{}"'.format(nickname.replace('"', '""'))
+        return User.id.in_(
+            select(NICK_SEARCH_FTS.c.rowid).where(
+                NICK_SEARCH_FTS.c.nick_search.op('MATCH')(phrase)
+            )
         )
-        role = result.scalar_one_or_none()
-        return role
-    except SQLAlchemyError:
-        logger.error(f'Ошибка при получении роли "{role_name}"')
-        return None
+    return User.nick_search.like(
+        f'%{_escape_like(nickname)}%', escape='\\'
+    )
 
 
-async def create_role(session, role_name: str) -> Role:
-    try:
-        new_role = Role(name=role_name)
-        session.add(new_role)
-        await session.flush()
-        await session.refresh(new_role)
-        return new_role
-    except SQLAlchemyError:
-        logger.error(f'Ошибка при создании роли "{role_name}"')
-        return None
+def nickname_rank(nickname):
+    """
+    Выражение ранга совпадения для сортировки результатов поиска:
+    сначала точные совпадения, затем совпадения по префиксу.
+    """
+    nickname = _escape_like(normalize_nickname(nickname))
+    return case(
+        (User.nick_search.like(f'% {nickname} %', escape='\\'), 0),
+        (User.nick_search.like(f'% {nickname}%', escape='\\'), 1),
+        else_=2,
+    )
 
 
 async def set_user_invitation_status(user):
-    async with async_session() as session:
-        setattr(user, 'invite_sent', True)
-        session.add(user)
-        await session.commit()
+    """Отмечает отправку приглашения; запись в БД выполняется в фоне."""
+    user.invite_sent = True
+    user_flag_writer.set(user.telegram_id, 'invite_sent', True)
 
 
-async def set_user_membership_status(user):
-    async with async_session() as session:
-        setattr(user, 'is_member', True)
-        session.add(user)
-        await session.commit()
+async def set_user_membership_status(user, is_member=True):
+    """Обновляет флаг членства; запись в БД выполняется в фоне."""
+    user.is_member = is_member
+    user_flag_writer.set(user.telegram_id, 'is_member', is_member)
+    peer_directory.upsert(user)
 
 
 async def create_or_update_user(user_data):
+    """
+    Сохраняет профиль пользователя одним INSERT ... ON CONFLICT по
+    telegram_id с возвратом строки. Роль, которой нет в справочнике,
+    добавляется в той же транзакции через INSERT ... ON CONFLICT DO
+    NOTHING, поэтому одновременные регистрации не конфликтуют.
+    Обновляются только переданные поля профиля; флаги приглашения
+    и членства в сообществе не перезаписываются.
+    """
+    fields = [key for key in USER_PROFILE_FIELDS if key in user_data]
+    values = {key: user_data[key] for key in fields}
+    values['telegram_id'] = user_data['telegram_id']
+    # Core-вставка не вызывает ORM-событие update_nick_search.
+    values['nick_search'] = build_nick_search(
+        values.get('telegram_nick'),
+        values.get('sberchat_nick'),
+        values.get('school21_nick'),
+    )
     try:
+        snapshot = await reference_data.get()
+        reference_changed = values.get('team') not in snapshot.teams
         async with async_session() as session:
             async with session.begin():
-                role_name = user_data.get('role')
-                if role_name:
-                    role = await get_role_by_name(session, role_name)
-                    if not role:
-                        role = await create_role(session, role_name)
-                        if not role:
-                            logger.error(f'Не удалось создать роль: "{role}"')
-                            return False
-                    user_data['role'] = role.name
-                result = await session.execute(
-                    select(User).where(
-                        (User.telegram_id == user_data['telegram_id']) |
-                        (User.telegram_nick == user_data['telegram_nick'])
+                role_name = values.get('role')
+                if role_name and role_name not in snapshot.roles:
+                    result = await session.execute(
+                        get_insert(session, Role)
+                        .values(name=role_name)
+                        .on_conflict_do_nothing(index_elements=[Role.name])
+                        .returning(Role.name)
                     )
+                    reference_changed |= result.first() is not None
+                insert = get_insert(session, User).values(values)
+                user = await session.scalar(
+                    insert.on_conflict_do_update(
+                        index_elements=[User.telegram_id],
+                        set_={
+                            key: insert.excluded[key]
+                            for key in (*fields, 'nick_search')
+                        },
+                    ).returning(User)
                 )
-                if user := result.scalar_one_or_none():
-                    for key, value in user_data.items():
-                        setattr(user, key, value)
-                else:
-                    user = User(**user_data)
-                    session.add(user)
-                await session.commit()
-            return user
-    except SQLAlchemyError:
-        logger.error(f'Ошибка при создании пользователя "{user}"')
-        return None
-
-
-async def get_peers_by_role_and_level(
-    role, level, offset=0, limit=ServiceConstant.PAGE_SIZE
-):
-    """Функция для получения людей по роли и уровню."""
-    async with async_session() as session:
-        query = select(User).filter(User.role == role)
-
-        if level != 'Неважно':
-            query = query.filter(User.level == level)
-        result = await session.execute(query.offset(offset).limit(limit))
-        people = result.scalars().all()
-
-    return people
-
-
-async def get_person_details(telegram_nick):
-    """Функция для получения информации о работнике по никнейму в Телеграме."""
-    async with async_session() as session:
-        result = await session.execute(
-            select(User).filter(User.telegram_nick == telegram_nick)
+        peer_directory.upsert(user)
+        if reference_changed:
+            await reference_data.notify_changed()
+        return user
+    except SQLAlchemyError as e:
+        logger.error(
+            f'Ошибка при сохранении пользователя '
+            f'"{user_data.get("telegram_id")}": {e}'
         )
-        person = result.scalar_one_or_none()
-
-    return person
+        return None
 
 
 async def get_user_by_telegram_id(user_telegram_id):
@@ -116,39 +152,6 @@ async def get_user_by_telegram_id(user_telegram_id):
         return user
 
 
-async def get_people_by_team_name(
-        team, offset=0, limit=ServiceConstant.PAGE_SIZE
-):
-    """Функция для получения пиров по названию команды."""
-    async with async_session() as session:
-        query = select(User).filter(User.team == team)
-
-        if team != 'Неважно':
-            query = query.filter(User.team == team)
-        result = await session.execute(query.offset(offset).limit(limit))
-        people = result.scalars().all()
-
-        return people
-
-
-async def get_people_by_nickname(
-    nickname, offset=0, limit=ServiceConstant.PAGE_SIZE
-):
-    """Функция для получения пиров по никнейму."""
-    async with async_session() as session:
-        try:
-            query = select(User).filter(
-                (User.telegram_nick.ilike(f'%{nickname}%')) |
-                (User.sberchat_nick.ilike(f'%{nickname}%')) |
-                (User.school21_nick.ilike(f'%{nickname}%'))
-            )
-            result = await session.execute(query.offset(offset).limit(limit))
-            people = result.scalars().all()
-            return people
-        except SQLAlchemyError:
-            return []
-
-
 async def get_user_by_school21_nick(school21_nick: str):
     """Возвращает пользователя по никнейму в Школе 21, если он существует."""
     async with async_session() as session:
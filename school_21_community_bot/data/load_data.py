@@ -1,29 +1,39 @@
-import json
 import os
 from datetime import datetime
+from itertools import islice
 
 import sqlalchemy as sa
 
 from alembic import op
 
+from config import SEED_CHUNK_SIZE
+from seed.reader import iter_records
+
 
 def load_data_to_table(file_name, table_name):
+    """
+    Загружает данные из файла в миграции пачками op.bulk_insert,
+    читая файл потоково. Таблица отражается из БД на момент миграции,
+    а не берется из текущих моделей: в старых ревизиях части столбцов
+    еще нет. Вне миграций используйте python -m seed.
+    """
     file_path = os.path.join(os.path.dirname(__file__), file_name)
-    with open(file_path, encoding='utf-8') as f:
-        data = json.load(f)
-
-    if table_name == 'user':
-        data = data["user"]
-
-        for item in data:
-            if 'registration_date' in item:
-                item['registration_date'] = datetime.fromisoformat(
-                    item['registration_date'])
-
     metadata = sa.MetaData()
     table = sa.Table(table_name, metadata, autoload_with=op.get_bind())
-
-    op.bulk_insert(table, data)
+    date_columns = {
+        column.name for column in table.columns
+        if isinstance(column.type, sa.DateTime)
+    }
+
+    def prepare(record):
+        for name in date_columns & record.keys():
+            if isinstance(record[name], str):
+                record[name] = datetime.fromisoformat(record[name])
+        return record
+
+    rows = map(prepare, iter_records(file_path, table_name))
+    while batch := list(islice(rows, SEED_CHUNK_SIZE)):
+        op.bulk_insert(table, batch)
 
 
 def load_levels():
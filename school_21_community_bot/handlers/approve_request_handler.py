@@ -5,6 +5,8 @@ from telegram.ext import ContextTypes
 
 from config import GROUP_ID
 from crud.user import get_user_by_telegram_id, set_user_membership_status
+from service.membership import membership_cache
+from service.outbox import telegram_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -12,20 +14,34 @@ logger = logging.getLogger(__name__)
 async def approve_request(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
-    """Автоматически одобряет заявки на вступление в канал."""
+    """
+    Автоматически одобряет заявки на вступление в канал. Одобрение
+    ставится в очередь исходящих вызовов с ограничением частоты;
+    флаг членства записывается после успешного вызова.
+    """
     request = update.chat_join_request
     if request:
         try:
             user_telegram_id = update.effective_user.id
             user = await get_user_by_telegram_id(user_telegram_id)
             if user:
-                await set_user_membership_status(user)
-                await context.bot.approve_chat_join_request(
+                async def approve():
+                    await context.bot.approve_chat_join_request(
+                        chat_id=GROUP_ID,
+                        user_id=user_telegram_id
+                    )
+                    # Флаг ставится только после успешного одобрения.
+                    await set_user_membership_status(user)
+                    membership_cache.invalidate(user_telegram_id)
+
+                telegram_outbox.submit(
+                    approve,
                     chat_id=GROUP_ID,
-                    user_id=update.effective_user.id
+                    description=f'одобрение заявки {user_telegram_id}',
                 )
                 logger.info(
-                    f'Заявка от {update.effective_user.username} одобрена.')
+                    f'Заявка от {update.effective_user.username} '
+                    'поставлена в очередь на одобрение.')
             else:
                 logger.info(
                     msg=(f'Пользователь {update.effective_user.username} '
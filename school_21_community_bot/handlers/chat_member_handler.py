@@ -0,0 +1,30 @@
+import logging
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from config import GROUP_ID
+from crud.user import get_user_by_telegram_id, set_user_membership_status
+from service.membership import is_member_status, membership_cache
+
+logger = logging.getLogger(__name__)
+
+
+async def track_chat_member(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Синхронизирует флаг членства пользователя с составом сообщества."""
+    chat_member = update.chat_member
+    if str(chat_member.chat.id) != str(GROUP_ID):
+        return
+    user_telegram_id = chat_member.new_chat_member.user.id
+    membership_cache.invalidate(user_telegram_id)
+    is_member = is_member_status(chat_member.new_chat_member)
+    try:
+        user = await get_user_by_telegram_id(user_telegram_id)
+        if user and bool(user.is_member) != is_member:
+            await set_user_membership_status(user, is_member)
+    except Exception as e:
+        logger.info(
+            msg=('Ошибка при обновлении статуса членства для '
+                 f'пользователя {user_telegram_id}: {e}'))
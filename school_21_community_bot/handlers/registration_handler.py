@@ -25,13 +25,13 @@ from constants import (
     BotMessage,
     MetricMessage
 )
-from crud.level import get_levels
 from crud.user import (
     create_or_update_user,
     get_user_by_school21_nick,
     set_user_invitation_status
 )
 from service.metric import log_metric
+from service.reference_data import reference_data
 from utils.keyboards import (
     get_confirmation_keyboard,
     get_fields_keyboard,
@@ -389,8 +389,8 @@ async def update_corrected(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if update.callback_query:
             await update.callback_query.answer()
             level_name = update.callback_query.data
-            level_names = await get_levels()
-            if level_name in level_names:
+            snapshot = await reference_data.get()
+            if level_name in snapshot.levels:
                 context.user_data['level'] = level_name
                 await log_metric(
                     update.effective_user.id,
@@ -450,6 +450,10 @@ async def final_state(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.pop('field_for_edit', None)
     user = await create_or_update_user(context.user_data)
     if user:
+        await log_metric(
+            update.effective_user.id,
+            MetricMessage.REGISTRATION_COMPLETED
+        )
         await update.effective_message.reply_text(
             text=BotMessage.CONGRATS_MESSAGE,
             reply_markup=await get_final_keyboard(context)
@@ -528,5 +532,7 @@ registration_handler = ConversationHandler(
     map_to_parent={
         SEARCH_PEERS: SEARCH_PEERS
     },
-    allow_reentry=True
+    allow_reentry=True,
+    name='registration',
+    persistent=True
 )
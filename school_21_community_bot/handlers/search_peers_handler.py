@@ -1,5 +1,3 @@
-import math
-
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -8,33 +6,40 @@ from telegram import (
 from telegram.ext import (CallbackQueryHandler, CommandHandler, ContextTypes,
                           ConversationHandler, MessageHandler, filters)
 
-from config import GROUP_ID
+from config import SIMILAR_PEERS_LIMIT
 from constants import (CONFIRM_CHANGE, CHOOSE_SELECTION_CRITERIA,
                        CHOOSING_LEVEL, CHOOSING_ROLE, CHOOSING_TEAM,
                        INPUT_NICKNAME, REGISTRATION, SEARCH_PEERS,
                        SHOWING_PEOPLE, BotMessage, ServiceConstant)
-from crud.level import get_levels
-from crud.role import get_roles_from_db
-from crud.team import get_teams_from_db
-from crud.user import (
-    get_people_by_nickname,
-    get_peers_by_role_and_level,
-    get_people_by_team_name,
-    get_person_details,
-    get_user_by_telegram_id,
-    set_user_invitation_status,
-)
+from crud.user import (get_user_by_telegram_id, set_user_invitation_status,
+                       set_user_membership_status)
 from handlers.registration_handler import registration_handler
+from service.callback_codec import CallbackPayloadExpired, callback_codec
+from service.membership import invite_link_cache, membership_cache
+from service.peer_directory import ANY_LEVEL, peer_directory
+from service.reference_data import reference_data
 from utils.keyboards import (
     get_back_to_filter_and_to_criteria_keyboard,
     get_back_to_nickname_and_to_criteria_keyboard,
     get_complete_auth_keyboard, get_confirmation_keyboard,
     get_create_paginated_keyboard, get_fields_keyboard,
     get_join_channel_keyboard, get_peer_keyboard,
-    get_search_criteria_keyboard, get_user_agreement_keyboard)
+    get_search_criteria_keyboard, get_user_agreement_keyboard,
+    keyboard_cache)
+from utils.pagination import decode_peer_cursor, encode_cursor, keyset_page
 from utils.user_card import create_user_card
 
 PAGE_SIZE = ServiceConstant.PAGE_SIZE
+# Поиск пиров по виду контекста из кнопки пагинации.
+PEER_SEARCHES = {
+    'team': lambda team_name: peer_directory.by_team(team_name),
+    'nickname': peer_directory.by_nickname,
+    'role': peer_directory.by_role_and_level,
+    'similar': lambda similar_to: peer_directory.similar_to(
+        similar_to, SIMILAR_PEERS_LIMIT
+    ),
+}
+PAGE_BOUNDS = {'prev': 'before', 'next': 'after'}
 
 
 async def change_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -115,18 +120,15 @@ async def choose_selection_criteria(
         return REGISTRATION
 
     try:
-        member = await context.bot.get_chat_member(
-            chat_id=GROUP_ID, user_id=user_telegram_id
-        )
-        if member.status not in ('member', 'administrator', 'creator'):
-            link = await context.bot.create_chat_invite_link(
-                chat_id=GROUP_ID,
-                creates_join_request=True
-            )
+        is_member = await membership_cache.is_member(context.bot, user)
+        if bool(user.is_member) != is_member:
+            await set_user_membership_status(user, is_member)
+        if not is_member:
+            link = await invite_link_cache.get(context.bot)
             await query.edit_message_text(
                 text=(
                     BotMessage.join_to_community_message.format(
-                        link=link.invite_link)
+                        link=link)
                 ),
                 reply_markup=get_join_channel_keyboard(),
                 parse_mode='HTML'
@@ -155,12 +157,14 @@ async def select_team(
     page=0
 ):
     """Демонстрирует список доступных команд с пагинацией."""
-    teams = await get_teams_from_db()
+    snapshot = await reference_data.get()
     reply_markup = await get_create_paginated_keyboard(
-        teams,
+        snapshot.teams,
         page,
         'team',
-        back_callback='back_to_criteria_selection'
+        back_callback='back_to_criteria_selection',
+        page_prefix='team_',
+        version=snapshot.version
     )
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -184,13 +188,22 @@ async def handle_team_selection(
     await query.answer()
     data = query.data
 
-    team_name = data.split('_', 1)[1]
+    if data.startswith('team_page_'):
+        page = int(data.split('_')[-1])
+        return await select_team(update, context, page=page)
+
+    try:
+        _, payload, _ = await callback_codec.decode(data)
+    except CallbackPayloadExpired:
+        return await select_team(
+            update, context, page=context.user_data.get('last_team_page', 0)
+        )
+    team_name = payload['value']
     context.user_data['last_team_name'] = team_name
 
-    if people := await get_people_by_team_name(team_name):
-        context.user_data['last_page'] = 0
+    if people := peer_directory.by_team(team_name):
         await show_peers_list(
-            update, context, people, team_name=team_name, page=0
+            update, context, people, team_name=team_name
         )
         return SHOWING_PEOPLE
 
@@ -209,14 +222,15 @@ async def select_role(
     update: Update, context: ContextTypes.DEFAULT_TYPE, page=0
 ):
     """Демонстрирует список доступных ролей с пагинацией."""
-    roles = await get_roles_from_db()
+    snapshot = await reference_data.get()
 
     reply_markup = await get_create_paginated_keyboard(
-        roles,
+        snapshot.roles,
         page,
         'role',
         back_callback='back_to_criteria_selection',
-        page_prefix='role_'
+        page_prefix='role_',
+        version=snapshot.version
     )
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -243,14 +257,15 @@ async def handle_role_selection(
         page = int(data.split('_')[-1])
         return await select_role(update, context, page=page)
 
-    if data.startswith('role_'):
-        selected_role = data.split('_', 1)[1]
-        context.user_data['selected_role'] = selected_role
-        return await select_level(update, context, selected_role=selected_role)
-
-    await query.edit_message_text(BotMessage.INCORRECT_CHOOSE_MESSAGE)
-
-    return CHOOSING_ROLE
+    try:
+        _, payload, _ = await callback_codec.decode(data)
+    except CallbackPayloadExpired:
+        return await select_role(
+            update, context, page=context.user_data.get('last_role_page', 0)
+        )
+    selected_role = payload['value']
+    context.user_data['selected_role'] = selected_role
+    return await select_level(update, context, selected_role=selected_role)
 
 
 async def select_level(
@@ -260,15 +275,16 @@ async def select_level(
     page=0
 ):
     """Демонстрирует список доступных уровней с пагинацией."""
-    levels = await get_levels()
-    levels.insert(0, 'Неважно')
+    snapshot = await reference_data.get()
 
     reply_markup = await get_create_paginated_keyboard(
-        levels,
+        [ANY_LEVEL, *snapshot.levels],
         page,
-        callback_prefix=f'level_{selected_role}',
+        'level',
         back_callback='back_to_role_selection',
-        page_prefix=f'level_{selected_role}_'
+        page_prefix='level_',
+        version=snapshot.version,
+        callback_context={'role': selected_role}
     )
     if update.callback_query:
         await update.callback_query.edit_message_text(
@@ -294,52 +310,46 @@ async def handle_level_selection(
     await query.answer()
     data = query.data
 
-    if data.startswith(
-        f'level_{context.user_data.get("selected_role")}_page_'
-    ):
-        parts = data.split('_')
-        page = int(parts[-1])
+    if data.startswith('level_page_'):
+        page = int(data.split('_')[-1])
         selected_role = context.user_data.get("selected_role")
 
         return await select_level(
             update, context, selected_role=selected_role, page=page
         )
-    if data.startswith('level_'):
-        parts = data.split('_', 2)
-        selected_level = parts[2]
-        selected_role = parts[1]
-
-        people = await get_peers_by_role_and_level(
-            selected_role, selected_level
-        )
-        if people:
-            context.user_data['selected_role'] = selected_role
-            context.user_data['selected_level'] = selected_level
-            await show_peers_list(
-                update,
-                context,
-                people,
-                role=selected_role,
-                level=selected_level,
-                page=0
-            )
-            return SHOWING_PEOPLE
-        else:
-            await query.edit_message_text(
-                text=(
-                    BotMessage.nobody_with_set_role_level_message.format(
-                        selected_role=selected_role,
-                        selected_level=selected_level)
-                ),
-                reply_markup=get_back_to_filter_and_to_criteria_keyboard(
-                    'level'
-                )
-            )
-            return CHOOSING_LEVEL
-    else:
-        await query.edit_message_text(BotMessage.INCORRECT_CHOOSE_MESSAGE)
+    try:
+        _, payload, _ = await callback_codec.decode(data)
+    except CallbackPayloadExpired:
+        return await select_level(
+            update,
+            context,
+            selected_role=context.user_data.get('selected_role'),
+            page=context.user_data.get('last_level_page', 0)
+        )
+    selected_role = payload['role']
+    selected_level = payload['value']
 
-        return CHOOSING_LEVEL
+    people = peer_directory.by_role_and_level(selected_role, selected_level)
+    if people:
+        context.user_data['selected_role'] = selected_role
+        context.user_data['selected_level'] = selected_level
+        await show_peers_list(
+            update,
+            context,
+            people,
+            role=selected_role,
+            level=selected_level
+        )
+        return SHOWING_PEOPLE
+    await query.edit_message_text(
+        text=(
+            BotMessage.nobody_with_set_role_level_message.format(
+                selected_role=selected_role,
+                selected_level=selected_level)
+        ),
+        reply_markup=get_back_to_filter_and_to_criteria_keyboard('level')
+    )
+    return CHOOSING_LEVEL
 
 
 async def input_nickname(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -363,12 +373,11 @@ async def handle_nickname_input(
     nickname = update.message.text.strip()
     context.user_data['last_nickname_input'] = nickname
 
-    if people := await get_people_by_nickname(nickname):
+    if people := peer_directory.by_nickname(nickname):
         context.user_data['last_nickname'] = nickname
-        context.user_data['last_page'] = 0
 
         await show_peers_list(
-            update, context, people, nickname=nickname, page=0
+            update, context, people, nickname=nickname
         )
         return SHOWING_PEOPLE
     else:
@@ -379,6 +388,27 @@ async def handle_nickname_input(
         return INPUT_NICKNAME
 
 
+async def search_similar_peers(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+):
+    """Показывает пиров, похожих на пользователя по профилю."""
+    query = update.callback_query
+    await query.answer()
+
+    peer = peer_directory.get_by_telegram_id(update.effective_user.id)
+    if peer and (people := peer_directory.similar_to(
+        peer.id, SIMILAR_PEERS_LIMIT
+    )):
+        await show_peers_list(update, context, people, similar_to=peer.id)
+        return SHOWING_PEOPLE
+
+    await query.edit_message_text(
+        BotMessage.NO_SIMILAR_PEERS_MESSAGE,
+        reply_markup=get_back_to_filter_and_to_criteria_keyboard()
+    )
+    return SHOWING_PEOPLE
+
+
 async def show_peers_list(
     update,
     context,
@@ -387,94 +417,125 @@ async def show_peers_list(
     level=None,
     team_name=None,
     nickname=None,
-    page=0
+    similar_to=None,
+    after=None,
+    before=None
 ):
-    """Демонстриурет список подходящих пиров с пагинацией."""
-    total_pages = math.ceil(len(people) / PAGE_SIZE)
-    page = max(0, min(page, total_pages - 1))
-    people_page = people[page * PAGE_SIZE: (page + 1) * PAGE_SIZE]
-    keyboard = get_peer_keyboard(people_page)
-    navigation_buttons = []
-
-    if page > 0:
-        if team_name:
-            navigation_buttons.append(
-                InlineKeyboardButton(
-                    '← Назад',
-                    callback_data=f'prev_team_{team_name}_{page - 1}'
-                )
-            )
-        elif nickname:
+    """
+    Демонстриурет список подходящих пиров с постраничной навигацией.
+    Страница определяется курсором по ключу (school21_nick, id),
+    для поиска по никнейму — по ключу (ранг совпадения, school21_nick, id),
+    для похожих пиров — по ключу (место в выдаче, school21_nick, id).
+    Список people должен быть результатом поиска в peer_directory:
+    критерии поиска сохраняются в callback_codec, а кнопки навигации
+    несут только токен и курсор. Клавиатура страницы кэшируется по
+    токену, курсору и версии справочника пиров.
+    """
+    if nickname:
+        def page_key(person):
+            return person.nickname_key(nickname)
+    elif similar_to:
+        places = {person.id: place for place, person in enumerate(people)}
+
+        def page_key(person):
+            return (places[person.id], *person.sort_key)
+    else:
+        def page_key(person):
+            return person.sort_key
+
+    if team_name:
+        search = {'kind': 'team', 'team_name': team_name}
+    elif nickname:
+        search = {'kind': 'nickname', 'nickname': nickname}
+    elif similar_to:
+        search = {'kind': 'similar', 'similar_to': similar_to}
+    else:
+        search = {'kind': 'role', 'role': role, 'level': level}
+    token = callback_codec.store(search)
+
+    def build_keyboard():
+        people_page, has_prev, has_next = keyset_page(
+            people,
+            key=page_key,
+            after=decode_peer_cursor(after),
+            before=decode_peer_cursor(before),
+            limit=PAGE_SIZE
+        )
+        keyboard = get_peer_keyboard(people_page)
+        navigation_buttons = []
+
+        if has_prev and people_page:
             navigation_buttons.append(
                 InlineKeyboardButton(
                     '← Назад',
-                    callback_data=f'prev_nickname_{nickname}_{page - 1}'
+                    callback_data=callback_codec.pack(
+                        'prev', token,
+                        encode_cursor(*page_key(people_page[0]))
+                    )
                 )
             )
-        else:
+        if has_next and people_page:
             navigation_buttons.append(
                 InlineKeyboardButton(
-                    '← Назад',
-                    callback_data=f'prev_{role}_{level}_{page - 1}'
+                    'Далее →',
+                    callback_data=callback_codec.pack(
+                        'next', token,
+                        encode_cursor(*page_key(people_page[-1]))
+                    )
                 )
             )
-    if page < total_pages - 1:
+        if navigation_buttons:
+            keyboard.append(navigation_buttons)
         if team_name:
-            navigation_buttons.append(
-                InlineKeyboardButton(
-                    'Далее →',
-                    callback_data=f'next_team_{team_name}_{page + 1}'
-                )
+            keyboard.append(
+                [
+                    InlineKeyboardButton(
+                        '← Назад к выбору команды',
+                        callback_data='back_to_team_selection'
+                    )
+                ]
             )
         elif nickname:
-            navigation_buttons.append(
-                InlineKeyboardButton(
-                    'Далее →',
-                    callback_data=f'next_nickname_{nickname}_{page + 1}'
-                )
+            keyboard.append(
+                [
+                    InlineKeyboardButton(
+                        '← Назад к поиску по никнейму',
+                        callback_data='back_to_nickname_search'
+                    )
+                ]
+            )
+        elif similar_to:
+            keyboard.append(
+                [
+                    InlineKeyboardButton(
+                        '← Назад к критериям поиска',
+                        callback_data='back_to_criteria_selection'
+                    )
+                ]
             )
         else:
-            navigation_buttons.append(
-                InlineKeyboardButton(
-                    'Далее →',
-                    callback_data=f'next_{role}_{level}_{page + 1}'
-                )
+            keyboard.append(
+                [
+                    InlineKeyboardButton(
+                        '← Назад к выбору уровня',
+                        callback_data='back_to_level_selection'
+                    )
+                ]
             )
-    if navigation_buttons:
-        keyboard.append(navigation_buttons)
-    if team_name:
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    '← Назад к выбору команды',
-                    callback_data='back_to_team_selection'
-                )
-            ]
-        )
-    elif nickname:
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    '← Назад к поиску по никнейму',
-                    callback_data='back_to_nickname_search'
-                )
-            ]
-        )
-    else:
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    '← Назад к выбору уровня',
-                    callback_data='back_to_level_selection'
-                )
-            ]
-        )
+        return InlineKeyboardMarkup(keyboard)
+
+    reply_markup = keyboard_cache.get_or_build(
+        ('peers', token, after, before, peer_directory.version),
+        build_keyboard
+    )
 
-    context.user_data['last_page'] = page
+    context.user_data['last_page_after'] = after
+    context.user_data['last_page_before'] = before
     context.user_data.pop('last_team_name', None)
     context.user_data.pop('last_role', None)
     context.user_data.pop('last_level', None)
     context.user_data.pop('last_nickname', None)
+    context.user_data.pop('last_similar_to', None)
 
     if team_name:
         context.user_data['last_team_name'] = team_name
@@ -483,6 +544,9 @@ async def show_peers_list(
         context.user_data['last_nickname'] = nickname
         message = BotMessage.peer_with_nickname_message.format(
             nickname=nickname)
+    elif similar_to:
+        context.user_data['last_similar_to'] = similar_to
+        message = BotMessage.SIMILAR_PEERS_MESSAGE
     else:
         context.user_data['last_role'] = role
         context.user_data['last_level'] = level
@@ -492,11 +556,11 @@ async def show_peers_list(
 
     if update.callback_query:
         await update.callback_query.edit_message_text(
-            message, reply_markup=InlineKeyboardMarkup(keyboard)
+            message, reply_markup=reply_markup
         )
     else:
         await update.effective_message.reply_text(
-            message, reply_markup=InlineKeyboardMarkup(keyboard)
+            message, reply_markup=reply_markup
         )
 
 
@@ -512,7 +576,7 @@ async def show_peer_detail(
 
     keyboard = get_back_to_filter_and_to_criteria_keyboard(keyboard_return=True)
 
-    if person := await get_person_details(telegram_nick):
+    if person := peer_directory.get_by_telegram_nick(telegram_nick):
         level = person.level if person.level else 'Не указано'
         role = person.role if person.role else 'Не указано'
 
@@ -549,37 +613,23 @@ async def handle_pagination_buttons(
     query = update.callback_query
     await query.answer()
 
-    data = query.data
-    parts = data.split('_')
-
-    if parts[1] == 'team':
-        team_name = parts[2]
-        page = int(parts[3])
-
-        all_people = await get_people_by_team_name(team_name)
-
-        await show_peers_list(
-            update, context, all_people, team_name=team_name, page=page
-        )
-    elif parts[1] == 'nickname':
-        nickname = parts[2]
-        page = int(parts[3])
-
-        all_people = await get_people_by_nickname(nickname)
-
-        await show_peers_list(
-            update, context, all_people, nickname=nickname, page=page
+    try:
+        direction, search, cursor = await callback_codec.decode(query.data)
+    except CallbackPayloadExpired:
+        await query.edit_message_text(
+            BotMessage.SEARCH_EXPIRED_MESSAGE,
+            reply_markup=get_back_to_filter_and_to_criteria_keyboard()
         )
-    else:
-        role = parts[1]
-        level = parts[2]
-        page = int(parts[3])
-
-        all_people = await get_peers_by_role_and_level(role, level)
+        return SHOWING_PEOPLE
 
-        await show_peers_list(
-            update, context, all_people, role=role, level=level, page=page
-        )
+    params = {key: value for key, value in search.items() if key != 'kind'}
+    await show_peers_list(
+        update,
+        context,
+        PEER_SEARCHES[search['kind']](**params),
+        **params,
+        **{PAGE_BOUNDS[direction]: cursor}
+    )
     return SHOWING_PEOPLE
 
 
@@ -590,22 +640,36 @@ async def back_to_peers_list(
     query = update.callback_query
     await query.answer()
 
-    page = context.user_data.get('last_page', 0)
+    page_bounds = {
+        'after': context.user_data.get('last_page_after'),
+        'before': context.user_data.get('last_page_before'),
+    }
 
     if 'last_team_name' in context.user_data:
         team_name = context.user_data.get('last_team_name')
-        all_people = await get_people_by_team_name(team_name)
+        all_people = peer_directory.by_team(team_name)
 
         await show_peers_list(
-            update, context, all_people, team_name=team_name, page=page
+            update, context, all_people, team_name=team_name, **page_bounds
         )
         return SHOWING_PEOPLE
     elif 'last_nickname' in context.user_data:
         nickname = context.user_data.get('last_nickname')
-        all_people = await get_people_by_nickname(nickname)
+        all_people = peer_directory.by_nickname(nickname)
+
+        await show_peers_list(
+            update, context, all_people, nickname=nickname, **page_bounds
+        )
+        return SHOWING_PEOPLE
+    elif 'last_similar_to' in context.user_data:
+        similar_to = context.user_data.get('last_similar_to')
+        all_people = peer_directory.similar_to(
+            similar_to, SIMILAR_PEERS_LIMIT
+        )
 
         await show_peers_list(
-            update, context, all_people, nickname=nickname, page=page
+            update, context, all_people, similar_to=similar_to,
+            **page_bounds
         )
         return SHOWING_PEOPLE
     elif 'last_role' in context.user_data and \
@@ -614,10 +678,11 @@ async def back_to_peers_list(
         role = context.user_data.get('last_role')
         level = context.user_data.get('last_level')
 
-        all_people = await get_peers_by_role_and_level(role, level)
+        all_people = peer_directory.by_role_and_level(role, level)
 
         await show_peers_list(
-            update, context, all_people, role=role, level=level, page=page
+            update, context, all_people, role=role, level=level,
+            **page_bounds
         )
         return SHOWING_PEOPLE
     else:
@@ -688,11 +753,14 @@ search_peers_handler = ConversationHandler(
             CallbackQueryHandler(
                 input_nickname, pattern='^search_by_nickname$'
             ),
+            CallbackQueryHandler(
+                search_similar_peers, pattern='^search_similar$'
+            ),
         ],
         REGISTRATION: [registration_handler],
         CHOOSING_TEAM: [
             CallbackQueryHandler(
-                handle_team_selection, pattern='^team_.*|^team_page_.*'
+                handle_team_selection, pattern=r'^team_page_\d+$|^team:'
             ),
             CallbackQueryHandler(
                 back_to_search_filter_selection,
@@ -701,7 +769,7 @@ search_peers_handler = ConversationHandler(
         ],
         CHOOSING_ROLE: [
             CallbackQueryHandler(
-                handle_role_selection, pattern='^role_.*|^role_page_.*'
+                handle_role_selection, pattern=r'^role_page_\d+$|^role:'
             ),
             CallbackQueryHandler(
                 back_to_search_filter_selection,
@@ -710,7 +778,7 @@ search_peers_handler = ConversationHandler(
         ],
         CHOOSING_LEVEL: [
             CallbackQueryHandler(
-                handle_level_selection, pattern='^level_.*|^level_page_.*'
+                handle_level_selection, pattern=r'^level_page_\d+$|^level:'
             ),
             CallbackQueryHandler(
                 back_to_search_filter_selection,
@@ -739,7 +807,7 @@ search_peers_handler = ConversationHandler(
                 show_peer_detail, pattern='^person_.*'
             ),
             CallbackQueryHandler(
-                handle_pagination_buttons, pattern='^(prev|next)_.*'
+                handle_pagination_buttons, pattern='^(prev|next):'
             ),
             CallbackQueryHandler(
                 back_to_peers_list,
@@ -756,5 +824,7 @@ search_peers_handler = ConversationHandler(
         ],
     },
     fallbacks=[CommandHandler('change_profile', change_profile)],
-    allow_reentry=True
+    allow_reentry=True,
+    name='search_peers',
+    persistent=True
 )
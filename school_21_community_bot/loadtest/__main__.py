@@ -0,0 +1,205 @@
+"""
+Нагрузочный тест пользовательского бота.
+
+Запускает настоящее приложение бота с заглушкой Bot API, заполняет БД
+синтетическими пользователями и воспроизводит сценарии регистрации
+и поиска с заданной частотой. Выводит перцентили задержки обработки
+обновлений и число запросов к БД на обновление. Ошибкой считается как
+исключение при обработке обновления, так и запись уровня ERROR в логе;
+при ошибках процесс завершается с кодом 1.
+
+Запуск на отдельной (тестовой) БД из DATABASE_URL:
+    python -m loadtest --users 5000 --sessions 500 --rate 20
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+
+from loadtest.fake_bot_api import FakeBotRequest
+from loadtest.fixtures import LOAD_TEST_NAMESPACE, cleanup, seed_users
+from loadtest.scenarios import (UpdateFactory, registration_session,
+                                search_session)
+from models.base import engine
+from service.persistence import SQLAlchemyPersistence
+from service.query_stats import UpdateQueries, current_update_queries
+from user_bot import build_application
+from utils.keyboards import keyboard_cache
+from utils.startup import start_application, stop_application
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorLogCounter(logging.Handler):
+    """
+    Считает записи лога уровня ERROR. Обработчики бота часто
+    перехватывают исключения и только пишут их в лог, поэтому одних
+    исключений недостаточно, чтобы заметить сбой.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class LoadStats:
+    """Задержки и число запросов к БД по шагам сценариев."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.background_queries = 0
+        self.exceptions = 0
+        self.logged_errors = ErrorLogCounter()
+
+    @property
+    def errors(self):
+        return self.exceptions + self.logged_errors.count
+
+    def count_query(self, *args):
+        if current_update_queries.get() is None:
+            self.background_queries += 1
+
+    async def on_error(self, update, context):
+        # Запись попадает в logged_errors.
+        logger.error(f'Ошибка при обработке обновления: {context.error}')
+
+    def add(self, step, latency, queries):
+        self.latencies[step].append(latency)
+        self.queries[step].append(queries)
+
+    def report(self, elapsed, api_calls):
+        rows = [(step, self.latencies[step], self.queries[step])
+                for step in sorted(self.latencies)]
+        rows.append((
+            'всего',
+            [value for values in self.latencies.values() for value in values],
+            [value for values in self.queries.values() for value in values],
+        ))
+        print(f'{"шаг":<28}{"n":>7}{"p50, мс":>10}{"p95, мс":>10}'
+              f'{"p99, мс":>10}{"запросов":>10}')
+        for step, latencies, queries in rows:
+            p50, p95, p99 = percentiles(latencies)
+            print(f'{step:<28}{len(latencies):>7}{p50:>10.1f}{p95:>10.1f}'
+                  f'{p99:>10.1f}{statistics.mean(queries):>10.2f}')
+        updates = len(rows[-1][1])
+        print(f'\nОбновлений: {updates} за {elapsed:.1f} с '
+              f'({updates / elapsed:.1f} в секунду), ошибок: {self.errors} '
+              f'(исключений: {self.exceptions}, записей ERROR в логе: '
+              f'{self.logged_errors.count}).')
+        print(f'Фоновых запросов к БД: {self.background_queries}.')
+        cache = keyboard_cache.stats()
+        print(f'Кэш клавиатур: попаданий {cache["hits"]}, промахов '
+              f'{cache["misses"]} ({cache["hit_rate"]:.0%}), '
+              f'записей {cache["size"]}.')
+        print('Вызовы Bot API: ' + ', '.join(
+            f'{method}={count}' for method, count in api_calls.most_common()
+        ))
+
+
+def percentiles(values):
+    """Возвращает p50, p95 и p99 в миллисекундах."""
+    if len(values) < 2:
+        value = values[0] * 1000 if values else 0
+        return value, value, value
+    quantiles = statistics.quantiles(values, n=100, method='inclusive')
+    return tuple(quantiles[index] * 1000 for index in (49, 94, 98))
+
+
+async def run_session(application, factory, stats, user, steps):
+    """Отправляет шаги сценария по очереди, как живой пользователь."""
+    for step, kind, value in steps:
+        update = factory.build(user, kind, value)
+        record = UpdateQueries(step)
+        token = current_update_queries.set(record)
+        started = time.perf_counter()
+        try:
+            await application.process_update(update)
+        except Exception:
+            stats.exceptions += 1
+        finally:
+            current_update_queries.reset(token)
+        stats.add(step, time.perf_counter() - started, record.statements)
+
+
+async def run(args):
+    if args.cleanup:
+        await cleanup()
+    users = await seed_users(args.users, args.teams)
+    print(f'Добавлено пользователей: {len(users)}.')
+
+    stats = LoadStats()
+    logging.getLogger().addHandler(stats.logged_errors)
+    event.listen(engine.sync_engine, 'before_cursor_execute',
+                 stats.count_query)
+    request = FakeBotRequest(latency=args.api_latency / 1000)
+    application = build_application(
+        request=request,
+        persistence=SQLAlchemyPersistence(LOAD_TEST_NAMESPACE),
+    )
+    application.add_error_handler(stats.on_error)
+    await start_application(application, polling=False)
+    factory = UpdateFactory(application.bot)
+    rng = random.Random(args.seed)
+
+    sessions = []
+    started = time.perf_counter()
+    try:
+        for number in range(args.sessions):
+            if rng.random() < args.registration_share:
+                user, steps = registration_session(number)
+            else:
+                user, steps = search_session(users, rng)
+            sessions.append(asyncio.create_task(
+                run_session(application, factory, stats, user, steps)
+            ))
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.gather(*sessions)
+        elapsed = time.perf_counter() - started
+    finally:
+        await stop_application(application)
+        event.remove(engine.sync_engine, 'before_cursor_execute',
+                     stats.count_query)
+        logging.getLogger().removeHandler(stats.logged_errors)
+        if args.cleanup:
+            await cleanup()
+    stats.report(elapsed, request.calls)
+    return stats
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m loadtest',
+        description='Нагрузочный тест пользовательского бота.',
+    )
+    parser.add_argument('--users', type=int, default=5000,
+                        help='число синтетических пользователей в БД')
+    parser.add_argument('--teams', type=int, default=50,
+                        help='число команд синтетических пользователей')
+    parser.add_argument('--sessions', type=int, default=500,
+                        help='число воспроизводимых сценариев')
+    parser.add_argument('--rate', type=float, default=20,
+                        help='число новых сценариев в секунду')
+    parser.add_argument('--registration-share', type=float, default=0.2,
+                        help='доля сценариев регистрации')
+    parser.add_argument('--api-latency', type=float, default=0,
+                        help='имитируемая задержка Bot API, мс')
+    parser.add_argument('--seed', type=int, default=21,
+                        help='начальное значение генератора сценариев')
+    parser.add_argument('--cleanup', action='store_true',
+                        help='удалить данные теста до и после запуска')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    if asyncio.run(run(parse_args())).errors:
+        sys.exit(1)
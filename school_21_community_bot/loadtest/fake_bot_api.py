@@ -0,0 +1,85 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from http import HTTPStatus
+
+from telegram.request import BaseRequest
+
+BOT_USER = {
+    'id': 1,
+    'is_bot': True,
+    'first_name': 'Load test bot',
+    'username': 'load_test_bot',
+}
+MESSAGE_METHODS = ('sendMessage', 'editMessageText', 'sendDocument')
+
+
+class FakeBotRequest(BaseRequest):
+    """
+    Заглушка Bot API для нагрузочного тестирования: отвечает на запросы
+    бота без обращения к сети, считает вызовы методов и при
+    необходимости имитирует сетевую задержку.
+    """
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.calls = Counter()
+        self._message_ids = itertools.count(1)
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(
+        self,
+        url,
+        method,
+        request_data=None,
+        read_timeout=None,
+        write_timeout=None,
+        connect_timeout=None,
+        pool_timeout=None,
+    ):
+        api_method = url.rsplit('/', 1)[-1]
+        self.calls[api_method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        parameters = request_data.parameters if request_data else {}
+        body = {'ok': True, 'result': self._result(api_method, parameters)}
+        return HTTPStatus.OK, json.dumps(body).encode()
+
+    def _result(self, api_method, parameters):
+        if api_method == 'getMe':
+            return BOT_USER
+        if api_method in MESSAGE_METHODS:
+            return {
+                'message_id': parameters.get(
+                    'message_id', next(self._message_ids)
+                ),
+                'date': int(time.time()),
+                'chat': {'id': parameters.get('chat_id'), 'type': 'private'},
+                'from': BOT_USER,
+                'text': parameters.get('text', ''),
+            }
+        if api_method == 'getChatMember':
+            return {
+                'status': 'member',
+                'user': {
+                    'id': parameters.get('user_id'),
+                    'is_bot': False,
+                    'first_name': 'Peer',
+                },
+            }
+        if api_method == 'createChatInviteLink':
+            return {
+                'invite_link': 'https://t.me/+load_test',
+                'creator': BOT_USER,
+                'creates_join_request': True,
+                'is_primary': False,
+                'is_revoked': False,
+            }
+        return True
@@ -0,0 +1,124 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import delete
+
+from crud.upsert import chunked, get_insert
+from models.base import async_session
+from models.bot_state import BotState
+from models.level import Level
+from models.metric import Metric
+from models.metric_rollup import RegistrationFunnel
+from models.role import Role
+from models.user import User, build_nick_search
+
+DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
+# Идентификаторы синтетических пользователей начинаются с этого значения,
+# чтобы не пересекаться с реальными пользователями Telegram, и остаются
+# меньше 2**31, так как metric.user_id — Integer.
+LOAD_TEST_ID_BASE = 2_000_000_000
+REGISTERED_ID_OFFSET = 100_000_000
+LOAD_TEST_NAMESPACE = 'load_test'
+SEEDED_PREFIX = 'lt'
+REGISTERED_PREFIX = 'reg'
+
+
+def load_fixture(name):
+    with open(DATA_DIR / name, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def number_to_letters(number):
+    """Кодирует число буквами a-j, так как ник в Школе 21 — только буквы."""
+    return ''.join(chr(ord('a') + int(digit)) for digit in str(number))
+
+
+def seeded_user_id(number):
+    return LOAD_TEST_ID_BASE + number
+
+
+def registered_user_id(number):
+    return LOAD_TEST_ID_BASE + REGISTERED_ID_OFFSET + number
+
+
+def build_users(count, teams):
+    """
+    Размножает пользователей из data/user.json до count записей
+    с уникальными идентификаторами и никнеймами.
+    """
+    templates = load_fixture('user.json')['user']
+    registration_date = datetime.utcnow()
+    for number in range(count):
+        template = templates[number % len(templates)]
+        telegram_nick = (
+            f'{SEEDED_PREFIX}_{template["telegram_nick"]}_{number}'
+        )
+        sberchat_nick = f'{template["sberchat_nick"]}_{number}'
+        school21_nick = f'{SEEDED_PREFIX}{number_to_letters(number)}'
+        yield {
+            'id': seeded_user_id(number),
+            'telegram_id': seeded_user_id(number),
+            'full_name': template['full_name'],
+            'role': template['role'],
+            'level': template['level'],
+            'team': f'{template["team"]}_{number % teams}',
+            'project': template['project'],
+            'telegram_nick': telegram_nick,
+            'sberchat_nick': sberchat_nick,
+            'school21_nick': school21_nick,
+            # Core-вставка не вызывает ORM-событие update_nick_search.
+            'nick_search': build_nick_search(
+                telegram_nick, sberchat_nick, school21_nick
+            ),
+            'registration_date': registration_date,
+            'invite_sent': True,
+            'is_member': True,
+        }
+
+
+async def seed_users(count, teams):
+    """
+    Заполняет справочники ролей и уровней из data/*.json и добавляет
+    count синтетических пользователей. Возвращает список пользователей.
+    """
+    users = list(build_users(count, teams))
+    roles = {role['name'] for role in load_fixture('roles.json')}
+    roles.update(user['role'] for user in users)
+    levels = {level['name'] for level in load_fixture('levels.json')}
+    levels.update(user['level'] for user in users)
+    async with async_session() as session:
+        async with session.begin():
+            for model, names in ((Role, roles), (Level, levels)):
+                insert = get_insert(session, model)
+                await session.execute(
+                    insert.values([{'name': name} for name in sorted(names)])
+                    .on_conflict_do_nothing(index_elements=[model.name])
+                )
+            for chunk in chunked(users):
+                insert = get_insert(session, User).values(chunk)
+                await session.execute(insert.on_conflict_do_nothing(
+                    index_elements=[User.telegram_id]
+                ))
+    return users
+
+
+async def cleanup():
+    """Удаляет данные, созданные нагрузочным тестом."""
+    async with async_session() as session:
+        async with session.begin():
+            await session.execute(
+                delete(User).where(User.telegram_id >= LOAD_TEST_ID_BASE)
+            )
+            await session.execute(
+                delete(Metric).where(Metric.user_id >= LOAD_TEST_ID_BASE)
+            )
+            await session.execute(
+                delete(RegistrationFunnel)
+                .where(RegistrationFunnel.user_id >= LOAD_TEST_ID_BASE)
+            )
+            await session.execute(
+                delete(BotState).where(
+                    BotState.namespace == LOAD_TEST_NAMESPACE
+                )
+            )
@@ -0,0 +1,118 @@
+import itertools
+import random
+import time
+
+from telegram import Update
+
+from loadtest.fixtures import (REGISTERED_PREFIX, number_to_letters,
+                               registered_user_id)
+from utils.keyboards import get_selection_callback
+
+MESSAGE = 'message'
+CALLBACK = 'callback'
+
+
+class UpdateFactory:
+    """Собирает синтетические обновления от имени пользователей."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def build(self, user, kind, value):
+        chat = {'id': user['id'], 'type': 'private'}
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': chat,
+        }
+        data = {'update_id': next(self._update_ids)}
+        if kind == MESSAGE:
+            message.update({'from': user, 'text': value})
+            if value.startswith('/'):
+                message['entities'] = [{
+                    'type': 'bot_command',
+                    'offset': 0,
+                    'length': len(value.split()[0]),
+                }]
+            data['message'] = message
+        else:
+            message.update({'from': self.bot.bot.to_dict(), 'text': '…'})
+            data['callback_query'] = {
+                'id': str(data['update_id']),
+                'from': user,
+                'chat_instance': str(user['id']),
+                'message': message,
+                'data': value,
+            }
+        return Update.de_json(data, self.bot)
+
+
+def telegram_user(telegram_id, username):
+    return {
+        'id': telegram_id,
+        'is_bot': False,
+        'first_name': 'Load',
+        'last_name': 'Test',
+        'username': username,
+    }
+
+
+def registration_session(number):
+    """
+    Сценарий регистрации нового пользователя: от /start до
+    сохранения профиля. Возвращает пользователя и шаги
+    (название шага, тип обновления, данные).
+    """
+    user = telegram_user(
+        registered_user_id(number), f'{REGISTERED_PREFIX}_user_{number}'
+    )
+    steps = [
+        ('start', MESSAGE, '/start'),
+        ('criteria', CALLBACK, 'continue'),
+        ('authenticate', CALLBACK, 'authenticate'),
+        ('school21_nick', MESSAGE,
+         f'{REGISTERED_PREFIX}{number_to_letters(number)}'),
+        ('sberchat_nick', MESSAGE, f'{REGISTERED_PREFIX}sber{number}'),
+        ('telegram_nick', CALLBACK, 'show_my_tg_nickname'),
+        ('team', MESSAGE, 'load test team'),
+        ('role', MESSAGE, 'Developer'),
+        ('level', CALLBACK, 'Junior'),
+        ('project', CALLBACK, 'skip_job'),
+        ('confirm', CALLBACK, 'confirm'),
+        ('save', CALLBACK, 'continue'),
+    ]
+    return user, [('registration.' + step, *rest) for step, *rest in steps]
+
+
+def search_session(users, rng=random):
+    """
+    Сценарий поиска зарегистрированным пользователем: по никнейму,
+    по команде с листанием списка команд и открытием карточки пира,
+    по роли и уровню и подбор похожих пиров.
+    """
+    searcher = rng.choice(users)
+    peer = rng.choice(users)
+    user = telegram_user(searcher['telegram_id'], searcher['telegram_nick'])
+    nickname = peer['telegram_nick']
+    steps = [
+        ('start', MESSAGE, '/start'),
+        ('criteria', CALLBACK, 'continue'),
+        ('by_nickname', CALLBACK, 'search_by_nickname'),
+        ('nickname', MESSAGE, nickname[:rng.randint(3, len(nickname))]),
+        ('back', CALLBACK, 'back_to_criteria_selection'),
+        ('by_team', CALLBACK, 'search_by_team_name'),
+        ('team_page', CALLBACK, 'team_page_1'),
+        ('team', CALLBACK, get_selection_callback('team', peer['team'])),
+        ('peer_card', CALLBACK, f'person_{nickname}'),
+        ('back', CALLBACK, 'back_to_criteria_selection'),
+        ('by_role', CALLBACK, 'search_by_role'),
+        ('role', CALLBACK, get_selection_callback('role', peer['role'])),
+        ('level', CALLBACK, get_selection_callback(
+            'level', peer['level'], role=peer['role']
+        )),
+        ('back', CALLBACK, 'back_to_criteria_selection'),
+        ('similar', CALLBACK, 'search_similar'),
+    ]
+    return user, [('search.' + step, *rest) for step, *rest in steps]
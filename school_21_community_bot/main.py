@@ -1,4 +1,10 @@
 import asyncio
+import signal
+import time
+
+from config import BOTS_RUN_MODE, USER_BOT_MODE
+
+STARTED_AT = time.perf_counter()
 
 
 async def run_script(path):
@@ -6,11 +12,68 @@ async def run_script(path):
     await proc.communicate()
 
 
-async def main():
+async def run_separate():
+    """Запускает ботов отдельными процессами."""
     await asyncio.gather(
         run_script('user_bot.py'), run_script('admin_bot.py')
     )
 
 
+async def run_combined():
+    """
+    Запускает обоих ботов в одном цикле событий. Боты используют общий
+    движок БД с одним пулом соединений и общие кэши процесса.
+    """
+    from admin_bot.application import build_admin_application
+    from service.webhook import (check_webhook_config, create_webhook_server,
+                                 set_webhook)
+    from user_bot import ALLOWED_UPDATES, build_application
+    from utils.startup import (report_startup, start_application,
+                               stop_application)
+
+    webhook = USER_BOT_MODE == 'webhook'
+    if webhook:
+        check_webhook_config()
+    user_application = build_application()
+    admin_application = build_admin_application()
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    started = []
+    waiters = [asyncio.create_task(stop_event.wait())]
+    server = None
+    try:
+        started.append(user_application)
+        await start_application(
+            user_application, ALLOWED_UPDATES, polling=not webhook
+        )
+        started.append(admin_application)
+        await start_application(admin_application)
+        if webhook:
+            server = create_webhook_server(user_application)
+            await set_webhook(user_application, ALLOWED_UPDATES)
+            waiters.append(asyncio.create_task(server.serve()))
+        report_startup('Боты', STARTED_AT)
+        await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        if server is not None:
+            server.should_exit = True
+        waiters[0].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        for application in reversed(started):
+            await stop_application(application)
+
+
 if __name__ == '__main__':
-    asyncio.run(main())
+    if BOTS_RUN_MODE == 'separate':
+        asyncio.run(run_separate())
+    else:
+        try:
+            asyncio.run(run_combined())
+        except KeyboardInterrupt:
+            pass
@@ -1,5 +1,8 @@
 from .base import Base, get_async_session  # noqa
+from .bot_state import BotState  # noqa
+from .callback_payload import CallbackPayload  # noqa
 from .level import Level  # noqa
 from .metric import Metric  # noqa
+from .metric_rollup import MetricRollup, RegistrationFunnel, RollupState  # noqa
 from .role import Role  # noqa
 from .user import User  # noqa
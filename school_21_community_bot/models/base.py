@@ -3,10 +3,12 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from config import DATABASE_URL
+from service.query_stats import query_stats
 
 Base = declarative_base()
 
 engine = create_async_engine(DATABASE_URL, echo=False)
+query_stats.install(engine.sync_engine)
 
 async_session = sessionmaker(
     bind=engine,
@@ -17,3 +19,8 @@ async_session = sessionmaker(
 async def get_async_session():
     async with async_session() as session:
         yield session
+
+
+def get_pool_status():
+    """Возвращает описание состояния пула соединений с БД."""
+    return engine.pool.status()
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, LargeBinary, String
+
+from models.base import Base
+
+
+class BotState(Base):
+    __tablename__ = 'bot_state'
+
+    namespace = Column(String(32), primary_key=True)
+    kind = Column(String(16), primary_key=True)
+    key = Column(String(512), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
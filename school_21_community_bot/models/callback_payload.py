@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, String, Text
+
+from models.base import Base
+
+
+class CallbackPayload(Base):
+    __tablename__ = 'callback_payload'
+
+    token = Column(String(16), primary_key=True)
+    data = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
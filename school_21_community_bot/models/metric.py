@@ -12,4 +12,4 @@ class Metric(Base):
     user_id = Column(Integer)
     action = Column(String(1000))
     data = Column(String(1000))
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
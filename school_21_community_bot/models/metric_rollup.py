@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from models.base import Base
+
+
+class MetricRollup(Base):
+    __tablename__ = 'metric_rollup'
+
+    period = Column(String(8), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    action = Column(String(1000), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class RegistrationFunnel(Base):
+    __tablename__ = 'registration_funnel'
+
+    user_id = Column(BigInteger, primary_key=True)
+    step = Column(Integer, nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RollupState(Base):
+    __tablename__ = 'rollup_state'
+
+    name = Column(String(64), primary_key=True)
+    high_water_mark = Column(DateTime, nullable=False)
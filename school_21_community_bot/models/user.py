@@ -1,13 +1,23 @@
 from datetime import datetime
 
-from sqlalchemy import (Boolean, Column, DateTime,
-                        ForeignKey, BigInteger, String)
+from sqlalchemy import (Boolean, Column, DateTime, event,
+                        ForeignKey, BigInteger, Index, String)
 
 from models.base import Base
 
+NICK_SEARCH_FTS_TABLE = 'user_nick_fts'
+
 
 class User(Base):
     __tablename__ = 'user'
+    __table_args__ = (
+        Index(
+            'ix_user_nick_search_trgm',
+            'nick_search',
+            postgresql_using='gin',
+            postgresql_ops={'nick_search': 'gin_trgm_ops'},
+        ),
+    )
 
     id = Column(BigInteger, primary_key=True)
     telegram_id = Column(BigInteger, unique=True, nullable=False)
@@ -21,6 +31,41 @@ class User(Base):
     telegram_nick = Column(String(32), nullable=False)
     sberchat_nick = Column(String(256), nullable=False)
     school21_nick = Column(String(16), nullable=False)
+    nick_search = Column(String(320))
     registration_date = Column(DateTime, default=datetime.utcnow)
     invite_sent = Column(Boolean, default=False)
     is_member = Column(Boolean, default=False)
+
+
+def normalize_nickname(nickname):
+    return (nickname or '').strip().lower()
+
+
+def build_nick_search(telegram_nick, sberchat_nick, school21_nick):
+    """
+    Собирает строку поиска по никнеймам: никнеймы в нижнем регистре,
+    разделенные и обрамленные пробелами, чтобы точное совпадение и
+    совпадение по префиксу проверялись шаблонами ' ник ' и ' ник'.
+    """
+    nicknames = (telegram_nick, sberchat_nick, school21_nick)
+    return f' {" ".join(normalize_nickname(nick) for nick in nicknames)} '
+
+
+def rank_nick_search(nick_search, nickname):
+    """
+    Ранг совпадения никнейма: 0 — точное совпадение с одним из
+    никнеймов, 1 — совпадение по префиксу, 2 — вхождение подстроки.
+    """
+    if f' {nickname} ' in nick_search:
+        return 0
+    if f' {nickname}' in nick_search:
+        return 1
+    return 2
+
+
+@event.listens_for(User, 'before_insert')
+@event.listens_for(User, 'before_update')
+def update_nick_search(mapper, connection, target):
+    target.nick_search = build_nick_search(
+        target.telegram_nick, target.sberchat_nick, target.school21_nick
+    )
@@ -0,0 +1,89 @@
+"""
+Загрузка и восстановление данных из JSON/NDJSON-выгрузок.
+
+Файлы читаются потоково, поэтому объем выгрузки не ограничен памятью.
+В PostgreSQL строки загружаются через COPY, в остальных СУБД —
+пачками executemany. Каждый файл загружается в одной транзакции.
+Таблица определяется по имени файла (roles.json -> role) или задается
+через --table. Без аргументов загружаются примеры из data/.
+
+Восстановление справочников и пользователей из выгрузки:
+    python -m seed backup/levels.ndjson backup/roles.ndjson \\
+        backup/user.ndjson --replace
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+from config import SEED_CHUNK_SIZE
+from models.base import engine
+from seed.loader import load_file
+from seed.reader import table_name_from_path
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'
+)
+# Справочники загружаются раньше пользователей из-за внешних ключей.
+DEFAULT_FILES = [
+    os.path.join(DATA_DIR, name)
+    for name in ('levels.json', 'roles.json', 'user.json')
+]
+
+
+async def run(args):
+    if args.table and len(args.files) > 1:
+        raise SystemExit('--table можно указать только для одного файла.')
+    reports = []
+    try:
+        for path in args.files or DEFAULT_FILES:
+            report = await load_file(
+                path,
+                args.table or table_name_from_path(path),
+                prefix=args.prefix,
+                chunk_size=args.chunk_size,
+                replace=args.replace,
+                use_copy=not args.no_copy,
+            )
+            print(report)
+            reports.append(report)
+    finally:
+        await engine.dispose()
+    rows = sum(report.rows for report in reports)
+    elapsed = sum(report.elapsed for report in reports)
+    if elapsed:
+        print(
+            f'Всего: {rows} строк за {elapsed:.2f} с '
+            f'({rows / elapsed:.0f} строк/с).'
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m seed',
+        description='Потоковая загрузка данных из JSON/NDJSON в БД.',
+    )
+    parser.add_argument('files', nargs='*',
+                        help='файлы .json, .ndjson или .jsonl')
+    parser.add_argument('--table',
+                        help='таблица, если она не следует из имени файла')
+    parser.add_argument('--prefix',
+                        help='путь к массиву записей в JSON в нотации ijson, '
+                             'например user.item')
+    parser.add_argument('--chunk-size', type=int, default=SEED_CHUNK_SIZE,
+                        help='число строк в одной пачке')
+    parser.add_argument('--replace', action='store_true',
+                        help='удалить строки таблицы перед загрузкой')
+    parser.add_argument('--no-copy', action='store_true',
+                        help='не использовать COPY в PostgreSQL')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO,
+        stream=sys.stdout,
+    )
+    asyncio.run(run(parse_args()))
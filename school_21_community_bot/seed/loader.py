@@ -0,0 +1,203 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain, islice
+
+from sqlalchemy import DateTime, delete, insert, text
+
+from config import SEED_CHUNK_SIZE
+from models import Base
+from models.base import engine
+from models.user import User, build_nick_search
+from seed.reader import iter_records
+
+logger = logging.getLogger(__name__)
+
+# Столбцы, которые не хранятся в выгрузке и вычисляются по строке:
+# Core-вставка не вызывает ORM-событие update_nick_search.
+DERIVED_COLUMNS = {
+    User.__tablename__: {
+        'nick_search': lambda row: build_nick_search(
+            row.get('telegram_nick'),
+            row.get('sberchat_nick'),
+            row.get('school21_nick'),
+        ),
+    },
+}
+
+
+@dataclass
+class SeedReport:
+    table: str
+    rows: int
+    elapsed: float
+    method: str
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0
+
+    def __str__(self):
+        return (
+            f'{self.table}: {self.rows} строк за {self.elapsed:.2f} с '
+            f'({self.rows_per_second:.0f} строк/с, {self.method})'
+        )
+
+
+def get_table(table_name):
+    try:
+        return Base.metadata.tables[table_name]
+    except KeyError:
+        raise ValueError(f'Неизвестная таблица "{table_name}"') from None
+
+
+def _default(column):
+    default = column.default
+    if default is None or default.is_sequence or default.is_clause_element:
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+def _reset_sequence_sql(table):
+    """
+    Запрос, сдвигающий последовательность первичного ключа PostgreSQL
+    за максимальный загруженный id, чтобы новые строки не конфликтовали
+    с восстановленными.
+    """
+    quoted = f'"{table.name}"'
+    return (
+        f"SELECT setval(pg_get_serial_sequence('{quoted}', 'id'), max(id)) "
+        f'FROM {quoted}'
+    )
+
+
+class RowPreparer:
+    """
+    Приводит записи выгрузки к строкам таблицы: набор столбцов
+    определяется по первой записи, отсутствующие значения заполняются
+    значениями по умолчанию модели, даты из ISO-строк преобразуются
+    в datetime, вычисляемые столбцы дополняются.
+    """
+
+    def __init__(self, table, first_record):
+        self.derived = {
+            name: build
+            for name, build in DERIVED_COLUMNS.get(table.name, {}).items()
+            if name not in first_record
+        }
+        self.columns = [
+            column for column in table.columns
+            if column.name in first_record or
+            column.name in self.derived or
+            column.default is not None
+        ]
+        self.names = [column.name for column in self.columns]
+
+    def __call__(self, record):
+        row = {}
+        for column in self.columns:
+            if column.name in self.derived:
+                continue
+            if column.name in record:
+                value = record[column.name]
+                if isinstance(value, str) and isinstance(
+                    column.type, DateTime
+                ):
+                    value = datetime.fromisoformat(value)
+            else:
+                value = _default(column)
+            row[column.name] = value
+        for name, build in self.derived.items():
+            row[name] = build(row)
+        return row
+
+
+def _batches(rows, size):
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+async def _copy_to_postgres(table, preparer, rows, chunk_size, replace):
+    """
+    Загружает строки через COPY asyncpg в одной транзакции. Транзакция
+    открывается на соединении драйвера: SQLAlchemy на этом соединении
+    запросов не выполняет.
+    """
+    async with engine.connect() as connection:
+        raw_connection = await connection.get_raw_connection()
+        driver = raw_connection.driver_connection
+        loaded = 0
+        async with driver.transaction():
+            if replace:
+                await driver.execute(f'DELETE FROM "{table.name}"')
+            for batch in _batches(rows, chunk_size):
+                await driver.copy_records_to_table(
+                    table.name,
+                    records=[
+                        tuple(row[name] for name in preparer.names)
+                        for row in batch
+                    ],
+                    columns=preparer.names,
+                )
+                loaded += len(batch)
+                logger.info(f'{table.name}: загружено {loaded} строк.')
+            if 'id' in preparer.names and loaded:
+                await driver.execute(_reset_sequence_sql(table))
+    return loaded
+
+
+async def _insert_chunks(table, preparer, rows, chunk_size, replace):
+    """Загружает строки пачками executemany в одной транзакции."""
+    loaded = 0
+    async with engine.begin() as connection:
+        if replace:
+            await connection.execute(delete(table))
+        for batch in _batches(rows, chunk_size):
+            await connection.execute(insert(table), batch)
+            loaded += len(batch)
+            logger.info(f'{table.name}: загружено {loaded} строк.')
+        if (
+            engine.dialect.name == 'postgresql' and
+            'id' in preparer.names and loaded
+        ):
+            await connection.execute(text(_reset_sequence_sql(table)))
+    return loaded
+
+
+async def load_file(
+    path,
+    table_name,
+    prefix=None,
+    chunk_size=SEED_CHUNK_SIZE,
+    replace=False,
+    use_copy=True,
+):
+    """
+    Потоково загружает записи из JSON/NDJSON-файла в таблицу.
+    Для PostgreSQL используется COPY, для остальных СУБД — executemany
+    пачками по chunk_size строк. При replace существующие строки
+    таблицы удаляются в той же транзакции. Возвращает SeedReport.
+    """
+    table = get_table(table_name)
+    records = iter_records(path, table_name, prefix)
+    started = time.perf_counter()
+    first_record = next(records, None)
+    if first_record is None:
+        return SeedReport(table.name, 0, 0, 'пусто')
+    preparer = RowPreparer(table, first_record)
+    rows = map(preparer, chain((first_record,), records))
+
+    if use_copy and engine.dialect.name == 'postgresql':
+        method = 'COPY'
+        loaded = await _copy_to_postgres(
+            table, preparer, rows, chunk_size, replace
+        )
+    else:
+        method = 'executemany'
+        loaded = await _insert_chunks(
+            table, preparer, rows, chunk_size, replace
+        )
+    return SeedReport(
+        table.name, loaded, time.perf_counter() - started, method
+    )
@@ -0,0 +1,42 @@
+import json
+import os
+
+import ijson
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+
+def _array_prefix(file, table_name):
+    """
+    Определяет, где в JSON лежит массив записей: в корне документа
+    (roles.json) или под ключом с именем таблицы (user.json).
+    """
+    char = file.read(1)
+    while char.isspace():
+        char = file.read(1)
+    file.seek(0)
+    return 'item' if char == b'[' else f'{table_name}.item'
+
+
+def iter_records(path, table_name, prefix=None):
+    """
+    Последовательно читает записи из JSON или NDJSON, не загружая файл
+    в память целиком. NDJSON (.ndjson, .jsonl) содержит по объекту
+    на строку; в JSON записи берутся из массива по пути prefix
+    в нотации ijson.
+    """
+    if path.endswith(NDJSON_EXTENSIONS):
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    with open(path, 'rb') as file:
+        prefix = prefix or _array_prefix(file, table_name)
+        yield from ijson.items(file, prefix, use_float=True)
+
+
+def table_name_from_path(path):
+    """Имя таблицы по имени файла: roles.json -> role, user.ndjson -> user."""
+    name = os.path.basename(path).split('.', 1)[0]
+    return name[:-1] if name.endswith('s') else name
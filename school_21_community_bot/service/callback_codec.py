@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.future import select
+
+from config import CALLBACK_PAYLOAD_TTL
+from crud.upsert import chunked, get_insert
+from models.base import async_session
+from models.callback_payload import CallbackPayload
+from service.query_stats import create_background_task
+
+logger = logging.getLogger(__name__)
+
+CALLBACK_DATA_LIMIT = 64
+CALLBACK_SEPARATOR = ':'
+TOKEN_SIZE = 8
+PAYLOAD_CACHE_SIZE = 4096
+FLUSH_INTERVAL = 1
+
+
+class CallbackPayloadExpired(LookupError):
+    """Контекст кнопки удален по истечении срока хранения."""
+
+
+def split_callback(data):
+    """
+    Разбирает callback_data вида действие:токен:аргумент. Для данных
+    без разделителя (статических кнопок) действием считается вся строка.
+    """
+    action, _, rest = data.partition(CALLBACK_SEPARATOR)
+    token, _, argument = rest.partition(CALLBACK_SEPARATOR)
+    return action, token, argument
+
+
+def make_token(payload):
+    """
+    Возвращает токен контекста: base64url от хеша канонического JSON.
+    Одинаковые контексты получают одинаковый токен, поэтому повторный
+    поиск не создает новых записей.
+    """
+    raw = json.dumps(
+        payload, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    )
+    digest = hashlib.blake2b(raw.encode(), digest_size=TOKEN_SIZE).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip('='), raw
+
+
+class CallbackCodec:
+    """
+    Компактные callback_data для кнопок, которым нужен контекст поиска.
+
+    Контекст (критерии поиска, фильтры) хранится в таблице
+    callback_payload ограниченное время, а кнопка несет только действие,
+    короткий токен и необязательный аргумент (например, курсор
+    страницы). Это снимает ограничение Telegram в 64 байта для длинных
+    названий команд и фильтров. Недавние контексты кэшируются в памяти
+    процесса, а новые записываются в БД пачкой в фоне (write-behind),
+    не задерживая обработку обновления.
+    """
+
+    def __init__(
+        self,
+        ttl=CALLBACK_PAYLOAD_TTL,
+        cache_size=PAYLOAD_CACHE_SIZE,
+        flush_interval=FLUSH_INTERVAL,
+    ):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._flush_task = None
+        self._purged_at = time.monotonic()
+
+    def _remember(self, token, payload, expires_at):
+        self._cache[token] = (payload, expires_at)
+        self._cache.move_to_end(token)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def store(self, payload):
+        """
+        Запоминает контекст и возвращает его токен. Запись в БД
+        выполняется в фоне; срок хранения продлевается, если до его
+        окончания осталось меньше половины.
+        """
+        token, raw = make_token(payload)
+        now = datetime.utcnow()
+        cached = self._cache.get(token)
+        if cached is not None and (
+            cached[1] - now > timedelta(seconds=self.ttl / 2)
+        ):
+            self._cache.move_to_end(token)
+            return token
+        expires_at = now + timedelta(seconds=self.ttl)
+        self._remember(token, payload, expires_at)
+        self._pending[token] = {
+            'token': token, 'data': raw, 'expires_at': expires_at
+        }
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = create_background_task(self._flush_later())
+        return token
+
+    async def load(self, token):
+        """Возвращает контекст по токену или CallbackPayloadExpired."""
+        now = datetime.utcnow()
+        cached = self._cache.get(token)
+        if cached is not None and cached[1] > now:
+            self._cache.move_to_end(token)
+            return cached[0]
+        async with async_session() as session:
+            result = await session.execute(
+                select(CallbackPayload.data, CallbackPayload.expires_at)
+                .where(CallbackPayload.token == token)
+            )
+            row = result.first()
+        if row is None or row.expires_at <= now:
+            raise CallbackPayloadExpired(token)
+        payload = json.loads(row.data)
+        self._remember(token, payload, row.expires_at)
+        return payload
+
+    def pack(self, action, token='', argument=''):
+        """Собирает callback_data и проверяет ограничение длины."""
+        data = CALLBACK_SEPARATOR.join((action, token, str(argument)))
+        if len(data.encode()) > CALLBACK_DATA_LIMIT:
+            raise ValueError(f'callback_data длиннее 64 байт: {data}')
+        return data
+
+    def encode(self, action, payload, argument=''):
+        """Сохраняет контекст и возвращает callback_data кнопки."""
+        return self.pack(action, self.store(payload), argument)
+
+    async def decode(self, data):
+        """Возвращает действие, контекст и аргумент кнопки."""
+        action, token, argument = split_callback(data)
+        return action, await self.load(token), argument
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        # Остановка не должна прерывать уже начатую запись.
+        await asyncio.shield(self.flush())
+
+    async def flush(self):
+        """Записывает накопленные контексты одним многострочным upsert."""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    for chunk in chunked(list(pending.values())):
+                        insert = get_insert(session, CallbackPayload)
+                        insert = insert.values(chunk)
+                        await session.execute(insert.on_conflict_do_update(
+                            index_elements=[CallbackPayload.token],
+                            set_={'expires_at': insert.excluded.expires_at},
+                        ))
+        except Exception as e:
+            logger.error(
+                f'Ошибка при записи {len(pending)} контекстов кнопок: {e}'
+            )
+        await self._purge_expired()
+
+    async def stop(self):
+        """Останавливает фоновую запись и сохраняет накопленное."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def _purge_expired(self):
+        # Удаление просроченных контекстов не чаще раза за срок хранения.
+        if time.monotonic() - self._purged_at < self.ttl:
+            return
+        self._purged_at = time.monotonic()
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    await session.execute(
+                        delete(CallbackPayload).where(
+                            CallbackPayload.expires_at <= datetime.utcnow()
+                        )
+                    )
+        except Exception as e:
+            logger.error(f'Ошибка при удалении устаревших контекстов: {e}')
+
+
+callback_codec = CallbackCodec()
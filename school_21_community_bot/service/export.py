@@ -0,0 +1,125 @@
+import asyncio
+import csv
+import importlib.util
+import io
+import tempfile
+
+from config import EXPORT_CHUNK_SIZE, EXPORT_SPOOL_SIZE
+from models.base import async_session
+
+EXPORT_FORMATS = {
+    'csv': 'CSV',
+    'xlsx': 'Excel',
+}
+# pyarrow не входит в requirements.txt: Parquet предлагается,
+# только если пакет установлен.
+if importlib.util.find_spec('pyarrow') is not None:
+    EXPORT_FORMATS['parquet'] = 'Parquet'
+
+
+class CsvExportWriter:
+    def __init__(self, buffer, columns):
+        self._stream = io.TextIOWrapper(
+            buffer, encoding='utf-8-sig', newline=''
+        )
+        self._writer = csv.writer(self._stream)
+        self._writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._stream.flush()
+        self._stream.detach()
+
+
+class XlsxExportWriter:
+    def __init__(self, buffer, columns):
+        from openpyxl import Workbook
+
+        self._buffer = buffer
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(columns)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self._sheet.append(list(row))
+
+    def close(self):
+        self._workbook.save(self._buffer)
+
+
+class ParquetExportWriter:
+    def __init__(self, buffer, columns):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._buffer = buffer
+        self._columns = columns
+        self._schema = None
+        self._writer = None
+
+    def write_rows(self, rows):
+        data = [dict(zip(self._columns, row)) for row in rows]
+        if self._writer is None:
+            schema = self._pyarrow.Table.from_pylist(data).schema
+            self._schema = self._pyarrow.schema([
+                field.with_type(self._pyarrow.string())
+                if self._pyarrow.types.is_null(field.type) else field
+                for field in schema
+            ])
+            self._writer = self._parquet.ParquetWriter(
+                self._buffer, self._schema
+            )
+        self._writer.write_table(
+            self._pyarrow.Table.from_pylist(data, schema=self._schema)
+        )
+
+    def close(self):
+        if self._writer is None:
+            self._parquet.write_table(
+                self._pyarrow.table({column: [] for column in self._columns}),
+                self._buffer
+            )
+        else:
+            self._writer.close()
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'xlsx': XlsxExportWriter,
+    'parquet': ParquetExportWriter,
+}
+
+
+async def export_query(query, columns, export_format):
+    """
+    Выгружает результат запроса в файл выбранного формата.
+
+    Строки читаются из БД порциями через серверный курсор и
+    дописываются в файл в отдельном потоке, поэтому ни таблица целиком,
+    ни запись файла не блокируют цикл событий. Файл собирается во
+    временном буфере, который хранится в памяти до EXPORT_SPOOL_SIZE
+    байт и затем переносится на диск. Возвращает буфер,
+    установленный на начало.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    try:
+        writer = await asyncio.to_thread(
+            EXPORT_WRITERS[export_format], buffer, columns
+        )
+        async with async_session() as session:
+            result = await session.stream(
+                query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+            )
+            async for rows in result.partitions():
+                await asyncio.to_thread(writer.write_rows, rows)
+        await asyncio.to_thread(writer.close)
+    except BaseException:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from config import GROUP_ID, INVITE_LINK_TTL, MEMBERSHIP_CACHE_TTL
+from service.outbox import telegram_outbox
+
+MEMBER_STATUSES = ('member', 'administrator', 'creator')
+
+
+def is_member_status(chat_member):
+    """
+    Состоит ли участник в сообществе. Ограниченный участник
+    (restricted) остается в сообществе, если у него is_member.
+    """
+    if chat_member.status == 'restricted':
+        return bool(getattr(chat_member, 'is_member', True))
+    return chat_member.status in MEMBER_STATUSES
+
+
+class MembershipCache:
+    """
+    Кэш проверок членства в сообществе с ограниченным временем жизни,
+    ключ — telegram_id пользователя. Позволяет не обращаться к
+    Bot API при каждом открытии поиска.
+    """
+
+    def __init__(self, ttl):
+        self._ttl = ttl
+        self._entries = {}
+
+    def get(self, telegram_id):
+        entry = self._entries.get(telegram_id)
+        if entry is None:
+            return None
+        is_member, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[telegram_id]
+            return None
+        return is_member
+
+    def set(self, telegram_id, is_member):
+        self._entries[telegram_id] = (
+            is_member, time.monotonic() + self._ttl
+        )
+
+    def invalidate(self, telegram_id):
+        self._entries.pop(telegram_id, None)
+
+    async def is_member(self, bot, user):
+        """
+        Проверяет, состоит ли пользователь в сообществе.
+
+        Сначала используется флаг User.is_member: его ставит одобрение
+        заявки после успешного вызова Bot API и поддерживает обработчик
+        изменений участников. Если флаг не установлен, используется
+        результат запроса get_chat_member, хранящийся в кэше не дольше
+        TTL.
+        """
+        if user.is_member:
+            return True
+        is_member = self.get(user.telegram_id)
+        if is_member is None:
+            member = await telegram_outbox.call(
+                lambda: bot.get_chat_member(
+                    chat_id=GROUP_ID, user_id=user.telegram_id
+                ),
+                chat_id=GROUP_ID,
+                description='проверка членства',
+            )
+            is_member = is_member_status(member)
+            self.set(user.telegram_id, is_member)
+        return is_member
+
+
+class InviteLinkCache:
+    """
+    Общая ссылка-приглашение в сообщество с заявкой на вступление.
+    Заявки одобряет бот, поэтому одна ссылка подходит всем
+    пользователям и создается не чаще раза за INVITE_LINK_TTL.
+    """
+
+    def __init__(self, ttl):
+        self._ttl = ttl
+        self._link = None
+        self._expires_at = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self, bot):
+        if self._link is None or self._expires_at < time.monotonic():
+            async with self._lock:
+                if self._link is None or self._expires_at < time.monotonic():
+                    link = await telegram_outbox.call(
+                        lambda: bot.create_chat_invite_link(
+                            chat_id=GROUP_ID, creates_join_request=True
+                        ),
+                        chat_id=GROUP_ID,
+                        description='создание ссылки-приглашения',
+                    )
+                    self._link = link.invite_link
+                    self._expires_at = time.monotonic() + self._ttl
+        return self._link
+
+
+membership_cache = MembershipCache(MEMBERSHIP_CACHE_TTL)
+invite_link_cache = InviteLinkCache(INVITE_LINK_TTL)
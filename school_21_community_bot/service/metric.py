@@ -1,9 +1,116 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from config import METRIC_BATCH_SIZE, METRIC_FLUSH_INTERVAL, METRIC_QUEUE_SIZE
 from models.base import async_session
 from models.metric import Metric
+from service.query_stats import create_background_task
+
+logger = logging.getLogger(__name__)
+
+STOP_TIMEOUT = 10
+WRITE_ATTEMPTS = 3
+RETRY_DELAY = 1
+
+
+class MetricWriter:
+    """
+    Буферизует метрики в памяти и записывает их в БД одним
+    многострочным INSERT по достижении размера пачки или по таймеру.
+    Очередь ограничена: при ее заполнении вызывающий код ждет
+    освобождения места. Неудачная запись пачки повторяется
+    WRITE_ATTEMPTS раз с растущей паузой.
+    """
+
+    def __init__(self, batch_size, flush_interval, max_queue_size):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task = None
+        self._batch = []
+
+    def start(self):
+        """Запускает фоновую запись метрик в текущем цикле событий."""
+        if self._task is None:
+            self._task = create_background_task(self._run())
+
+    async def stop(self, timeout=STOP_TIMEOUT):
+        """Дожидается записи накопленных метрик и останавливает запись."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                'Не записано метрик: '
+                f'{self._queue.qsize() + len(self._batch)}.'
+            )
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def put(self, row):
+        self.start()
+        await self._queue.put(row)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._batch = batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), timeout)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+            self._batch = []
+
+    async def _write(self, batch):
+        try:
+            for attempt in range(1, WRITE_ATTEMPTS + 1):
+                try:
+                    async with async_session() as session:
+                        async with session.begin():
+                            await session.execute(
+                                insert(Metric).values(batch)
+                            )
+                    return
+                except Exception as e:
+                    if attempt == WRITE_ATTEMPTS:
+                        logger.error(
+                            f'Метрики не записаны ({len(batch)} шт.) '
+                            f'после {attempt} попыток: {e}'
+                        )
+                    else:
+                        logger.warning(
+                            f'Ошибка при записи {len(batch)} метрик, '
+                            f'попытка {attempt}: {e}'
+                        )
+                        await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+metric_writer = MetricWriter(
+    METRIC_BATCH_SIZE, METRIC_FLUSH_INTERVAL, METRIC_QUEUE_SIZE
+)
 
 
 async def log_metric(user_id, action, data=None):
-    async with async_session() as session:
-        async with session.begin():
-            metric = Metric(user_id=user_id, action=action, data=data)
-            session.add(metric)
+    """Ставит метрику в очередь на запись, не дожидаясь обращения к БД."""
+    await metric_writer.put({
+        'user_id': user_id,
+        'action': action,
+        'data': data,
+        'timestamp': datetime.utcnow(),
+    })
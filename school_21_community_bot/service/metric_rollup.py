@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func
+from sqlalchemy.future import select
+
+from config import EXPORT_CHUNK_SIZE, METRIC_ROLLUP_LAG
+from constants import MetricMessage
+from crud.upsert import chunked, get_insert
+from models.base import async_session
+from models.metric import Metric
+from models.metric_rollup import MetricRollup, RegistrationFunnel, RollupState
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_STATE_NAME = 'metric'
+ROLLUP_HOUR = 'hour'
+ROLLUP_DAY = 'day'
+
+REGISTRATION_FUNNEL_STEPS = (
+    ('Старт регистрации', (MetricMessage.REGISTRATION_STARTED,)),
+    ('Ник в Школе 21', (MetricMessage.SCHOOL_21_NICKNAME_ENTERED,)),
+    ('Имя в Сберчате', (MetricMessage.SBERCHAT_NICKNAME_ENTERED,)),
+    ('Ник в Telegram', (MetricMessage.TELEGRAM_NICKNAME_ENTERED,)),
+    ('Команда', (MetricMessage.TEAM_NAME_ENTERED,)),
+    ('Роль', (MetricMessage.USER_ROLE_ENTERED,)),
+    ('Уровень', (MetricMessage.ROLE_LEVEL_ENTERED,)),
+    ('Проект', (
+        MetricMessage.PROJECT_ENTERED,
+        MetricMessage.PROJECT_NOT_SPECIFIED,
+    )),
+    ('Регистрация завершена', (MetricMessage.REGISTRATION_COMPLETED,)),
+)
+FUNNEL_STEP_BY_ACTION = {
+    action: step
+    for step, (_, actions) in enumerate(REGISTRATION_FUNNEL_STEPS)
+    for action in actions
+}
+
+
+class MetricRollupJob:
+    """
+    Инкрементальная агрегация метрик: почасовые и посуточные счетчики
+    действий и максимальный пройденный шаг регистрации для каждого
+    пользователя. Каждый запуск обрабатывает только метрики после
+    сохраненной отметки (high-water mark).
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    async def run(self):
+        """
+        Агрегирует метрики от предыдущей отметки до текущего момента
+        за вычетом METRIC_ROLLUP_LAG секунд, чтобы не пропустить метрики,
+        которые еще лежат в буфере записи.
+        """
+        async with self._lock:
+            upper = datetime.utcnow() - timedelta(seconds=METRIC_ROLLUP_LAG)
+            async with async_session() as session:
+                async with session.begin():
+                    processed = await self._run(session, upper)
+            if processed:
+                logger.info(f'Агрегировано метрик: {processed}.')
+            return processed
+
+    async def _run(self, session, upper):
+        high_water_mark = await session.scalar(
+            select(RollupState.high_water_mark)
+            .where(RollupState.name == ROLLUP_STATE_NAME)
+            .with_for_update()
+        )
+        if high_water_mark is not None and high_water_mark >= upper:
+            return 0
+
+        query = select(
+            Metric.user_id, Metric.action, Metric.timestamp
+        ).where(Metric.timestamp < upper)
+        if high_water_mark is not None:
+            query = query.where(Metric.timestamp >= high_water_mark)
+
+        counts = Counter()
+        steps = {}
+        processed = 0
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        async for rows in result.partitions():
+            for user_id, action, timestamp in rows:
+                processed += 1
+                hour = timestamp.replace(minute=0, second=0, microsecond=0)
+                counts[ROLLUP_HOUR, hour, action] += 1
+                counts[ROLLUP_DAY, hour.replace(hour=0), action] += 1
+                step = FUNNEL_STEP_BY_ACTION.get(action)
+                if step is not None and user_id is not None:
+                    steps[user_id] = max(steps.get(user_id, step), step)
+
+        await self._upsert_counts(session, counts)
+        await self._upsert_funnel(session, steps)
+
+        insert = get_insert(session, RollupState)
+        await session.execute(
+            insert.values(name=ROLLUP_STATE_NAME, high_water_mark=upper)
+            .on_conflict_do_update(
+                index_elements=[RollupState.name],
+                set_={'high_water_mark': upper},
+            )
+        )
+        return processed
+
+    async def _upsert_counts(self, session, counts):
+        rows = [
+            {'period': period, 'bucket': bucket, 'action': action,
+             'count': count}
+            for (period, bucket, action), count in counts.items()
+        ]
+        for chunk in chunked(rows):
+            insert = get_insert(session, MetricRollup).values(chunk)
+            await session.execute(insert.on_conflict_do_update(
+                index_elements=[
+                    MetricRollup.period,
+                    MetricRollup.bucket,
+                    MetricRollup.action,
+                ],
+                set_={'count': MetricRollup.count + insert.excluded.count},
+            ))
+
+    async def _upsert_funnel(self, session, steps):
+        now = datetime.utcnow()
+        rows = [
+            {'user_id': user_id, 'step': step, 'updated_at': now}
+            for user_id, step in steps.items()
+        ]
+        for chunk in chunked(rows):
+            insert = get_insert(session, RegistrationFunnel).values(chunk)
+            await session.execute(insert.on_conflict_do_update(
+                index_elements=[RegistrationFunnel.user_id],
+                set_={
+                    'step': case(
+                        (
+                            insert.excluded.step > RegistrationFunnel.step,
+                            insert.excluded.step,
+                        ),
+                        else_=RegistrationFunnel.step,
+                    ),
+                    'updated_at': insert.excluded.updated_at,
+                },
+            ))
+
+    def start(self, interval):
+        """Запускает периодическую агрегацию метрик."""
+        if interval and self._task is None:
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self, interval):
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f'Ошибка при агрегации метрик: {e}')
+            await asyncio.sleep(interval)
+
+
+metric_rollup_job = MetricRollupJob()
+
+
+async def get_registration_funnel():
+    """
+    Возвращает воронку регистрации: для каждого шага название,
+    число пользователей, дошедших до него, конверсию от старта
+    и отток относительно предыдущего шага в процентах.
+    """
+    async with async_session() as session:
+        result = await session.execute(
+            select(RegistrationFunnel.step, func.count())
+            .group_by(RegistrationFunnel.step)
+        )
+        users_by_step = dict(result.all())
+
+    funnel = []
+    reached = 0
+    for step in reversed(range(len(REGISTRATION_FUNNEL_STEPS))):
+        reached += users_by_step.get(step, 0)
+        funnel.append(reached)
+    funnel.reverse()
+
+    started = funnel[0]
+    report = []
+    for step, (title, _) in enumerate(REGISTRATION_FUNNEL_STEPS):
+        previous = funnel[step - 1] if step else started
+        conversion = funnel[step] / started * 100 if started else 0
+        drop_off = (
+            (previous - funnel[step]) / previous * 100 if previous else 0
+        )
+        report.append((title, funnel[step], conversion, drop_off))
+    return report
@@ -0,0 +1,235 @@
+import asyncio
+import itertools
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from config import OUTBOX_CHAT_RATE, OUTBOX_GLOBAL_RATE, OUTBOX_MAX_RETRIES
+from service.query_stats import create_background_task
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4
+BACKOFF_BASE = 1
+STOP_TIMEOUT = 10
+# Вызовы, результата которых ждет обработчик, выполняются раньше
+# фоновых.
+PRIORITY_CALL = 0
+PRIORITY_SUBMIT = 1
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты «ведро с токенами»: rate запросов в секунду
+    с допустимым всплеском до capacity запросов.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while (delay := self.try_acquire()) > 0:
+                await asyncio.sleep(delay)
+
+    def try_acquire(self):
+        """
+        Берет токен без ожидания. Возвращает 0, если токен взят, иначе
+        время в секундах до появления токена.
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+
+@dataclass
+class OutboxJob:
+    call: object
+    chat_id: int = None
+    description: str = ''
+    future: asyncio.Future = None
+    attempts: int = 0
+    priority: int = PRIORITY_SUBMIT
+
+
+class TelegramOutbox:
+    """
+    Очередь исходящих вызовов Bot API, которые не должны задерживать
+    ответ пользователю: одобрение заявок, создание ссылок-приглашений,
+    проверки членства.
+
+    Вызовы ограничиваются общим ведром токенов и ведром на чат, чтобы
+    укладываться в лимиты Telegram. Вызов, для чата которого лимит
+    исчерпан, откладывается до появления токена и не занимает
+    обработчик. Вызовы через call() выполняются раньше поставленных
+    через submit(), поэтому обработчики не ждут накопившихся фоновых
+    вызовов. При RetryAfter очередь приостанавливается на указанное
+    время, при сетевых ошибках вызов повторяется с экспоненциальной
+    задержкой.
+    """
+
+    def __init__(self, global_rate, chat_rate, max_retries, workers=WORKERS):
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+        self.workers = workers
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._queue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._tasks = []
+        self._delayed = set()
+        self._paused_until = 0
+
+    def start(self):
+        """Запускает обработчики очереди в текущем цикле событий."""
+        if not self._tasks:
+            self._tasks = [
+                create_background_task(self._worker())
+                for _ in range(self.workers)
+            ]
+
+    async def stop(self, timeout=STOP_TIMEOUT):
+        """Дожидается выполнения поставленных вызовов и останавливает
+        очередь."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(
+                'Не выполнено вызовов Bot API: '
+                f'{self._queue.qsize() + len(self._delayed)}.'
+            )
+        for task in (*self._tasks, *self._delayed):
+            task.cancel()
+        await asyncio.gather(
+            *self._tasks, *self._delayed, return_exceptions=True
+        )
+        self._tasks = []
+        self._delayed = set()
+
+    async def _drain(self):
+        # Отложенные вызовы возвращаются в очередь позже.
+        while True:
+            await self._queue.join()
+            if not self._delayed:
+                return
+            await asyncio.wait(self._delayed)
+
+    def submit(self, call, chat_id=None, description='', future=None,
+               priority=PRIORITY_SUBMIT):
+        """
+        Ставит вызов в очередь, не дожидаясь выполнения. call —
+        функция без аргументов, возвращающая корутину вызова Bot API.
+        """
+        self.start()
+        self._put(
+            OutboxJob(call, chat_id, description, future, priority=priority)
+        )
+
+    async def call(self, call, chat_id=None, description=''):
+        """
+        Выполняет вызов через очередь вне очереди фоновых вызовов
+        и возвращает его результат.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.submit(call, chat_id, description, future, PRIORITY_CALL)
+        return await future
+
+    def _put(self, job):
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        return bucket
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f'Ошибка в очереди Bot API: {e}')
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if job.chat_id is not None:
+            delay = self._chat_bucket(job.chat_id).try_acquire()
+            if delay > 0:
+                self._requeue(job, delay)
+                return
+        await self._global_bucket.acquire()
+        job.attempts += 1
+        try:
+            result = await job.call()
+        except BadRequest as e:
+            # Ошибка в самом запросе: повтор не поможет.
+            self._fail(job, e)
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + retry_after
+            )
+            self._retry(job, retry_after, e)
+        except NetworkError as e:
+            delay = BACKOFF_BASE * 2 ** (job.attempts - 1)
+            self._retry(job, delay * (1 + random.random()), e)
+        except Exception as e:
+            self._fail(job, e)
+        else:
+            if job.future is not None and not job.future.done():
+                job.future.set_result(result)
+
+    def _retry(self, job, delay, error):
+        if job.attempts > self.max_retries:
+            self._fail(job, error)
+            return
+        self._requeue(job, delay)
+
+    def _requeue(self, job, delay):
+        task = create_background_task(self._requeue_later(job, delay))
+        self._delayed.add(task)
+        task.add_done_callback(self._delayed.discard)
+
+    async def _requeue_later(self, job, delay):
+        await asyncio.sleep(delay)
+        self._put(job)
+
+    @staticmethod
+    def _fail(job, error):
+        logger.error(
+            f'Вызов Bot API не выполнен ({job.description}), '
+            f'попыток: {job.attempts}: {error}'
+        )
+        if job.future is not None and not job.future.done():
+            job.future.set_exception(error)
+
+
+telegram_outbox = TelegramOutbox(
+    OUTBOX_GLOBAL_RATE, OUTBOX_CHAT_RATE, OUTBOX_MAX_RETRIES
+)
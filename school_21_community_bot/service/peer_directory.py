@@ -0,0 +1,313 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy.future import select
+
+from config import SIMILAR_PEERS_DIMENSIONS
+from crud.upsert import chunked
+from models.base import async_session
+from models.user import (User, build_nick_search, normalize_nickname,
+                         rank_nick_search)
+from service.peer_similarity import PeerSimilarity
+from service.query_stats import create_background_task
+from service.reference_data import reference_data
+
+logger = logging.getLogger(__name__)
+
+ANY_LEVEL = 'Неважно'
+TRIGRAM_SIZE = 3
+PEERS_CHANGED_PREFIX = 'peers:'
+# Payload NOTIFY в PostgreSQL ограничен 8000 байт.
+NOTIFY_CHUNK_SIZE = 300
+
+
+@dataclass(frozen=True)
+class Peer:
+    """Снимок данных пользователя, необходимых для поиска пиров."""
+
+    id: int
+    telegram_id: int
+    telegram_nick: str
+    sberchat_nick: str
+    school21_nick: str
+    team: str
+    role: str
+    level: str
+    project: str
+    is_member: bool
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            telegram_nick=user.telegram_nick,
+            sberchat_nick=user.sberchat_nick,
+            school21_nick=user.school21_nick,
+            team=user.team,
+            role=user.role,
+            level=user.level,
+            project=user.project,
+            is_member=bool(user.is_member),
+        )
+
+    @property
+    def nicknames(self):
+        return tuple(
+            nick.lower() for nick in (
+                self.telegram_nick, self.sberchat_nick, self.school21_nick
+            ) if nick
+        )
+
+    @property
+    def sort_key(self):
+        return (self.school21_nick or '', self.id)
+
+    def nickname_key(self, nickname):
+        """Ключ сортировки результатов поиска по никнейму."""
+        nick_search = build_nick_search(
+            self.telegram_nick, self.sberchat_nick, self.school21_nick
+        )
+        return (rank_nick_search(nick_search, nickname), *self.sort_key)
+
+
+def _trigrams(value):
+    return {
+        value[index:index + TRIGRAM_SIZE]
+        for index in range(len(value) - TRIGRAM_SIZE + 1)
+    }
+
+
+class PeerDirectory:
+    """
+    Индекс пиров в памяти процесса: по команде, по роли и уровню,
+    по триграммам никнеймов и по похожести профилей. Загружается из БД
+    при старте бота и обновляется при изменении пользователей.
+
+    Изменения из других процессов (например, из админ-бота при
+    BOTS_RUN_MODE=separate) приходят через канал оповещений справочников
+    PostgreSQL. Для других СУБД они видны только после периодической
+    перезагрузки индекса.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.similarity = PeerSimilarity(SIMILAR_PEERS_DIMENSIONS)
+        # Увеличивается при каждом изменении индекса; по версии
+        # инвалидируются закэшированные клавиатуры со списками пиров.
+        self.version = 0
+        self._refresh_task = None
+        self._reload_task = None
+        self._changed = set()
+        self._reset()
+
+    def _reset(self):
+        self._peers = {}
+        self._by_telegram_nick = {}
+        self._by_telegram_id = {}
+        self._by_team = {}
+        self._by_role = {}
+        self._by_role_and_level = {}
+        self._by_trigram = {}
+        self.similarity.reset()
+
+    async def load(self):
+        """Полностью перестраивает индекс по данным из БД."""
+        async with async_session() as session:
+            result = await session.execute(select(User))
+            users = result.scalars().all()
+        self._reset()
+        for user in users:
+            self._add(Peer.from_user(user))
+        self.loaded = True
+        self.version += 1
+        logger.info(f'Справочник пиров загружен: {len(self._peers)} записей.')
+
+    def start_refresh(self, interval):
+        """
+        Подписывается на оповещения об изменении пользователей и запускает
+        периодическую перезагрузку индекса из БД.
+        """
+        reference_data.add_handler(self._on_notification)
+        if interval and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(
+                self._refresh_loop(interval)
+            )
+
+    async def stop(self):
+        reference_data.remove_handler(self._on_notification)
+        for task in (self._refresh_task, self._reload_task):
+            if task is not None:
+                task.cancel()
+        self._refresh_task = self._reload_task = None
+
+    async def _refresh_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f'Ошибка при обновлении справочника пиров: {e}')
+
+    async def notify_changed(self, *user_ids):
+        """
+        Оповещает процессы ботов об изменении или удалении пользователей
+        user_ids: получатели перечитывают их из БД. Кэш справочников
+        при этом тоже инвалидируется, так как могла измениться команда.
+        """
+        for chunk in chunked(list(user_ids), NOTIFY_CHUNK_SIZE):
+            await reference_data.notify_changed(
+                PEERS_CHANGED_PREFIX + ','.join(map(str, chunk))
+            )
+
+    def _on_notification(self, payload):
+        if not self.loaded or not payload.startswith(PEERS_CHANGED_PREFIX):
+            return
+        self._changed.update(
+            int(user_id)
+            for user_id in payload[len(PEERS_CHANGED_PREFIX):].split(',')
+        )
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = create_background_task(
+                self._reload_changed()
+            )
+
+    async def _reload_changed(self):
+        while self._changed:
+            user_ids, self._changed = self._changed, set()
+            try:
+                async with async_session() as session:
+                    result = await session.execute(
+                        select(User).where(User.id.in_(user_ids))
+                    )
+                    users = {user.id: user for user in result.scalars()}
+            except Exception as e:
+                # Пропущенные изменения подхватит периодическая перезагрузка.
+                logger.error(f'Ошибка при обновлении пиров {user_ids}: {e}')
+                continue
+            for user_id in user_ids:
+                if user_id in users:
+                    self.upsert(users[user_id])
+                else:
+                    self.remove(user_id)
+
+    def upsert(self, user):
+        """Добавляет или обновляет пользователя в индексе."""
+        if not self.loaded or user is None:
+            return
+        self._discard(user.id)
+        self._add(Peer.from_user(user))
+        self.version += 1
+
+    def remove(self, user_id):
+        """Удаляет пользователя из индекса."""
+        if self.loaded:
+            self._discard(user_id)
+            self.version += 1
+
+    def _add(self, peer):
+        self._peers[peer.id] = peer
+        self._by_telegram_nick[peer.telegram_nick] = peer.id
+        self._by_telegram_id[peer.telegram_id] = peer.id
+        self._by_team.setdefault(peer.team, set()).add(peer.id)
+        self._by_role.setdefault(peer.role, set()).add(peer.id)
+        self._by_role_and_level.setdefault(
+            (peer.role, peer.level), set()
+        ).add(peer.id)
+        for nickname in peer.nicknames:
+            for trigram in _trigrams(nickname):
+                self._by_trigram.setdefault(trigram, set()).add(peer.id)
+        self.similarity.add(peer)
+
+    def _discard(self, peer_id):
+        peer = self._peers.pop(peer_id, None)
+        if peer is None:
+            return
+        if self._by_telegram_nick.get(peer.telegram_nick) == peer_id:
+            del self._by_telegram_nick[peer.telegram_nick]
+        if self._by_telegram_id.get(peer.telegram_id) == peer_id:
+            del self._by_telegram_id[peer.telegram_id]
+        _discard_from(self._by_team, peer.team, peer_id)
+        _discard_from(self._by_role, peer.role, peer_id)
+        _discard_from(
+            self._by_role_and_level, (peer.role, peer.level), peer_id
+        )
+        for nickname in peer.nicknames:
+            for trigram in _trigrams(nickname):
+                _discard_from(self._by_trigram, trigram, peer_id)
+        self.similarity.discard(peer_id)
+
+    def _sorted(self, peer_ids, key=lambda peer: peer.sort_key):
+        return sorted(
+            (self._peers[peer_id] for peer_id in peer_ids), key=key
+        )
+
+    def teams(self):
+        """Возвращает отсортированный список команд."""
+        return sorted(self._by_team)
+
+    def by_team(self, team):
+        """Возвращает пиров из указанной команды."""
+        return self._sorted(self._by_team.get(team, ()))
+
+    def by_role_and_level(self, role, level):
+        """Возвращает пиров с указанной ролью и уровнем."""
+        if level == ANY_LEVEL:
+            return self._sorted(self._by_role.get(role, ()))
+        return self._sorted(self._by_role_and_level.get((role, level), ()))
+
+    def by_nickname(self, nickname):
+        """
+        Возвращает пиров, у которых любой из никнеймов
+        содержит переданную подстроку без учета регистра.
+        Сначала идут точные совпадения, затем совпадения по префиксу.
+        """
+        nickname = normalize_nickname(nickname)
+        if len(nickname) < TRIGRAM_SIZE:
+            candidates = self._peers.keys()
+        else:
+            postings = sorted(
+                (self._by_trigram.get(trigram, set())
+                 for trigram in _trigrams(nickname)),
+                key=len
+            )
+            candidates = set.intersection(*postings)
+        return self._sorted(
+            (peer_id for peer_id in candidates
+             if any(nickname in nick
+                    for nick in self._peers[peer_id].nicknames)),
+            key=lambda peer: peer.nickname_key(nickname)
+        )
+
+    def get_by_telegram_nick(self, telegram_nick):
+        """Возвращает пира по никнейму в Телеграме."""
+        peer_id = self._by_telegram_nick.get(telegram_nick)
+        return self._peers.get(peer_id)
+
+    def get_by_telegram_id(self, telegram_id):
+        """Возвращает пира по идентификатору в Телеграме."""
+        peer_id = self._by_telegram_id.get(telegram_id)
+        return self._peers.get(peer_id)
+
+    def similar_to(self, peer_id, limit):
+        """
+        Возвращает до limit пиров, похожих на указанного, в порядке
+        убывания похожести.
+        """
+        return [
+            self._peers[similar_id]
+            for similar_id, _ in self.similarity.similar(peer_id, limit)
+        ]
+
+
+def _discard_from(index, key, peer_id):
+    peer_ids = index.get(key)
+    if peer_ids is None:
+        return
+    peer_ids.discard(peer_id)
+    if not peer_ids:
+        del index[key]
+
+
+peer_directory = PeerDirectory()
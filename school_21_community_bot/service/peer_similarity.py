@@ -0,0 +1,206 @@
+import re
+import zlib
+
+import numpy as np
+
+NO_PROJECT = 'Не указано'
+INITIAL_CAPACITY = 256
+MIN_TOKEN_LENGTH = 2
+NO_CODE = -1
+# Доля изменения числа пиров, после которой idf пересчитывается целиком.
+REWEIGHT_DRIFT = 0.05
+# Вклад признаков в итоговую оценку похожести.
+PROJECT_WEIGHT = 1.0
+ROLE_BONUS = 0.3
+LEVEL_BONUS = 0.15
+TEAM_BONUS = 0.2
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Разбивает описание проекта на слова в нижнем регистре."""
+    if not text or text == NO_PROJECT:
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) >= MIN_TOKEN_LENGTH
+    ]
+
+
+class PeerSimilarity:
+    """
+    Индекс похожести пиров по роли, уровню, команде и описанию проекта.
+
+    Описания проектов хранятся в матрице NumPy: строка на пира, столбец
+    на хеш слова (feature hashing), значения — 1 + log(tf). Вместе с
+    матрицей поддерживаются частоты слов по документам, из которых
+    вычисляется idf. Добавление и удаление пира меняет одну строку,
+    а при первом запросе после изменения пересчитываются только idf
+    затронутых слов и нормы строк, в которых они встречаются. Полный
+    пересчет выполняется, когда число пиров изменилось больше чем на
+    REWEIGHT_DRIFT с прошлого пересчета. Оценка — косинус TF-IDF
+    векторов плюс бонусы за совпадение роли, уровня и команды; top-k
+    выбирается argpartition без сортировки всех пиров.
+    """
+
+    def __init__(self, dimensions, capacity=INITIAL_CAPACITY):
+        self.dimensions = dimensions
+        self._initial_capacity = capacity
+        self.reset()
+
+    def reset(self):
+        capacity = self._initial_capacity
+        self._tf = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        self._codes = np.full((capacity, 3), NO_CODE, dtype=np.int32)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._document_frequency = np.zeros(self.dimensions, dtype=np.int32)
+        self._rows = {}
+        self._peer_ids = {}
+        self._free_rows = []
+        self._vocabularies = ({}, {}, {})
+        self._idf_squared = None
+        self._norms_squared = None
+        self._idf_documents = 0
+        self._dirty_columns = set()
+        self._dirty_rows = set()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _code(self, index, value):
+        if not value:
+            return NO_CODE
+        vocabulary = self._vocabularies[index]
+        return vocabulary.setdefault(value, len(vocabulary))
+
+    def _vectorize(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(text):
+            vector[zlib.crc32(token.encode()) % self.dimensions] += 1
+        present = vector > 0
+        vector[present] = 1 + np.log(vector[present])
+        return vector
+
+    def _allocate_row(self):
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = len(self._rows)
+        capacity = len(self._active)
+        if row >= capacity:
+            self._tf = np.vstack(
+                (self._tf, np.zeros_like(self._tf))
+            )
+            self._codes = np.vstack(
+                (self._codes, np.full_like(self._codes, NO_CODE))
+            )
+            self._active = np.concatenate(
+                (self._active, np.zeros(capacity, dtype=bool))
+            )
+            if self._norms_squared is not None:
+                self._norms_squared = np.concatenate(
+                    (self._norms_squared,
+                     np.zeros(capacity, dtype=np.float32))
+                )
+        return row
+
+    def _mark_dirty(self, row, vector):
+        self._dirty_columns.update(np.flatnonzero(vector).tolist())
+        self._dirty_rows.add(row)
+
+    def add(self, peer):
+        """Добавляет или обновляет строку пира."""
+        self.discard(peer.id)
+        row = self._allocate_row()
+        vector = self._vectorize(peer.project)
+        self._tf[row] = vector
+        self._codes[row] = (
+            self._code(0, peer.role),
+            self._code(1, peer.level),
+            self._code(2, peer.team),
+        )
+        self._active[row] = True
+        self._document_frequency += vector > 0
+        self._rows[peer.id] = row
+        self._peer_ids[row] = peer.id
+        self._mark_dirty(row, vector)
+
+    def discard(self, peer_id):
+        """Удаляет строку пира, если она есть."""
+        row = self._rows.pop(peer_id, None)
+        if row is None:
+            return
+        del self._peer_ids[row]
+        self._document_frequency -= self._tf[row] > 0
+        self._mark_dirty(row, self._tf[row])
+        self._tf[row] = 0
+        self._codes[row] = NO_CODE
+        self._active[row] = False
+        self._free_rows.append(row)
+
+    def _idf_squared_for(self, document_frequency):
+        idf = np.log(
+            (1 + self._idf_documents) / (1 + document_frequency)
+        ).astype(np.float32) + 1
+        return idf * idf
+
+    def _reweight(self):
+        documents = len(self._rows)
+        if self._idf_squared is None or abs(
+            documents - self._idf_documents
+        ) > REWEIGHT_DRIFT * self._idf_documents:
+            self._idf_documents = documents
+            self._idf_squared = self._idf_squared_for(
+                self._document_frequency
+            )
+            self._norms_squared = (self._tf * self._tf) @ self._idf_squared
+        elif self._dirty_columns or self._dirty_rows:
+            columns = np.fromiter(self._dirty_columns, dtype=np.intp)
+            idf_squared = self._idf_squared_for(
+                self._document_frequency[columns]
+            )
+            tf = self._tf[:, columns]
+            self._norms_squared += (tf * tf) @ (
+                idf_squared - self._idf_squared[columns]
+            )
+            self._idf_squared[columns] = idf_squared
+            rows = np.fromiter(self._dirty_rows, dtype=np.intp)
+            tf = self._tf[rows]
+            self._norms_squared[rows] = (tf * tf) @ self._idf_squared
+        self._dirty_columns.clear()
+        self._dirty_rows.clear()
+        return self._idf_squared, np.sqrt(
+            np.maximum(self._norms_squared, 0)
+        )
+
+    def similar(self, peer_id, limit):
+        """
+        Возвращает до limit пар (id пира, оценка) в порядке убывания
+        похожести. Пиры без общих признаков не возвращаются.
+        """
+        row = self._rows.get(peer_id)
+        if row is None or limit <= 0:
+            return []
+        idf_squared, norms = self._reweight()
+        scores = self._tf @ (self._tf[row] * idf_squared)
+        denominator = norms * norms[row]
+        np.divide(
+            scores, denominator, out=scores, where=denominator > 0
+        )
+        scores *= PROJECT_WEIGHT
+        codes = self._codes[row]
+        for column, bonus in enumerate((ROLE_BONUS, LEVEL_BONUS, TEAM_BONUS)):
+            if codes[column] != NO_CODE:
+                scores += bonus * (self._codes[:, column] == codes[column])
+        scores[~self._active] = 0
+        scores[row] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [
+            (self._peer_ids[int(index)], float(scores[index]))
+            for index in candidates
+        ]
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import pickle
+from datetime import datetime
+
+from sqlalchemy import delete, tuple_
+from sqlalchemy.future import select
+from telegram.ext import BasePersistence, PersistenceInput
+
+from config import PERSISTENCE_UPDATE_INTERVAL
+from crud.upsert import chunked, get_insert
+from models.base import async_session
+from models.bot_state import BotState
+from service.query_stats import create_background_task
+
+logger = logging.getLogger(__name__)
+
+USER_DATA = 'user_data'
+CHAT_DATA = 'chat_data'
+BOT_DATA = 'bot_data'
+CONVERSATION = 'conversation'
+
+
+class SQLAlchemyPersistence(BasePersistence):
+    """
+    Хранит состояние бота (user_data, chat_data, bot_data и состояния
+    ConversationHandler) в таблице bot_state через общий async-движок.
+
+    Данные читаются из БД один раз при запуске бота. Изменения
+    накапливаются в памяти и записываются одной транзакцией после
+    очередного цикла сохранения Application (write-behind). Записываются
+    только значения, которые отличаются от последних сохраненных.
+    """
+
+    def __init__(self, namespace, update_interval=PERSISTENCE_UPDATE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(callback_data=False),
+            update_interval=update_interval,
+        )
+        self.namespace = namespace
+        self._data = None
+        self._snapshots = {}
+        self._pending = {}
+        self._lock = asyncio.Lock()
+        self._flush_task = None
+
+    async def _load(self):
+        if self._data is None:
+            async with async_session() as session:
+                result = await session.execute(
+                    select(BotState.kind, BotState.key, BotState.data)
+                    .where(BotState.namespace == self.namespace)
+                )
+                rows = result.all()
+            self._data = {}
+            for kind, key, data in rows:
+                self._snapshots[kind, key] = data
+                self._data.setdefault(kind, {})[key] = pickle.loads(data)
+        return self._data
+
+    async def get_user_data(self):
+        data = await self._load()
+        return {
+            int(user_id): user_data
+            for user_id, user_data in data.get(USER_DATA, {}).items()
+        }
+
+    async def get_chat_data(self):
+        data = await self._load()
+        return {
+            int(chat_id): chat_data
+            for chat_id, chat_data in data.get(CHAT_DATA, {}).items()
+        }
+
+    async def get_bot_data(self):
+        data = await self._load()
+        return data.get(BOT_DATA, {}).get('', {})
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        data = await self._load()
+        conversations = {}
+        for key, state in data.get(CONVERSATION, {}).items():
+            conversation_name, *conversation_key = json.loads(key)
+            if conversation_name == name:
+                conversations[tuple(conversation_key)] = state
+        return conversations
+
+    async def update_conversation(self, name, key, new_state):
+        self._write(CONVERSATION, json.dumps([name, *key]), new_state)
+
+    async def update_user_data(self, user_id, data):
+        self._write(USER_DATA, str(user_id), data)
+
+    async def update_chat_data(self, chat_id, data):
+        self._write(CHAT_DATA, str(chat_id), data)
+
+    async def update_bot_data(self, data):
+        self._write(BOT_DATA, '', data)
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_user_data(self, user_id):
+        self._write(USER_DATA, str(user_id), None)
+
+    async def drop_chat_data(self, chat_id):
+        self._write(CHAT_DATA, str(chat_id), None)
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    def _write(self, kind, key, value):
+        """
+        Ставит значение в очередь на запись; None означает удаление.
+        Значения, совпадающие с сохраненными в БД, пропускаются.
+        """
+        data = None if value is None else pickle.dumps(
+            value, protocol=pickle.HIGHEST_PROTOCOL
+        )
+        if self._snapshots.get((kind, key)) == data:
+            self._pending.pop((kind, key), None)
+            return
+        self._pending[kind, key] = data
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = create_background_task(self._flush_pending())
+
+    async def _flush_pending(self):
+        # Даем Application поставить в очередь остальные изменения
+        # текущего цикла сохранения, чтобы записать их одной транзакцией.
+        await asyncio.sleep(0)
+        async with self._lock:
+            while self._pending:
+                pending, self._pending = self._pending, {}
+                try:
+                    await self._write_batch(pending)
+                except Exception as e:
+                    for item_key, data in pending.items():
+                        self._pending.setdefault(item_key, data)
+                    logger.error(f'Ошибка при сохранении состояния бота: {e}')
+                    return
+                for item_key, data in pending.items():
+                    if data is None:
+                        self._snapshots.pop(item_key, None)
+                    else:
+                        self._snapshots[item_key] = data
+
+    async def _write_batch(self, pending):
+        now = datetime.utcnow()
+        deleted = [item_key for item_key, data in pending.items()
+                   if data is None]
+        rows = [
+            {'namespace': self.namespace, 'kind': kind, 'key': key,
+             'data': data, 'updated_at': now}
+            for (kind, key), data in pending.items() if data is not None
+        ]
+        async with async_session() as session:
+            async with session.begin():
+                if deleted:
+                    await session.execute(
+                        delete(BotState).where(
+                            BotState.namespace == self.namespace,
+                            tuple_(BotState.kind, BotState.key).in_(deleted),
+                        )
+                    )
+                for chunk in chunked(rows):
+                    insert = get_insert(session, BotState).values(chunk)
+                    await session.execute(insert.on_conflict_do_update(
+                        index_elements=[
+                            BotState.namespace, BotState.kind, BotState.key
+                        ],
+                        set_={
+                            'data': insert.excluded.data,
+                            'updated_at': insert.excluded.updated_at,
+                        },
+                    ))
+
+    async def flush(self):
+        """Записывает все накопленные изменения при остановке бота."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._flush_pending()
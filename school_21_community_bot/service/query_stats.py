@@ -0,0 +1,210 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import event
+from telegram.ext import ConversationHandler
+
+from config import QUERY_STATS_INTERVAL, SLOW_QUERY_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND = 'фоновые задачи'
+MAX_LOGGED_STATEMENT = 1000
+
+current_update_queries = contextvars.ContextVar(
+    'current_update_queries', default=None
+)
+
+
+def create_background_task(coroutine):
+    """
+    Запускает фоновую задачу вне контекста текущего обработчика:
+    иначе задача унаследовала бы его UpdateQueries, и ее запросы
+    попали бы в уже учтенную запись вместо фоновых.
+    """
+    context = contextvars.copy_context()
+    context.run(current_update_queries.set, None)
+    return asyncio.create_task(coroutine, context=context)
+
+
+@dataclass
+class UpdateQueries:
+    """
+    Запросы к БД, выполненные при обработке одного обновления. Запросы
+    учитываются и во внешней записи parent, например, в записи
+    нагрузочного теста, охватывающей обработку обновления целиком.
+    """
+
+    handler: str
+    statements: int = 0
+    db_time: float = 0
+    parent: 'UpdateQueries' = None
+
+
+@dataclass
+class HandlerStats:
+    calls: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    db_time: float = 0
+    elapsed: float = 0
+
+    def add(self, statements, db_time, elapsed=0):
+        self.calls += 1
+        self.statements += statements
+        self.max_statements = max(self.max_statements, statements)
+        self.db_time += db_time
+        self.elapsed += elapsed
+
+
+@dataclass
+class QueryStatsWindow:
+    started_at: datetime
+    handlers: dict = field(default_factory=dict)
+    background: HandlerStats = field(default_factory=HandlerStats)
+    slow_queries: int = 0
+
+
+class QueryStats:
+    """
+    Счетчики запросов к БД по обработчикам обновлений.
+
+    События движка SQLAlchemy считают запросы и время их выполнения,
+    а обертки обработчиков относят их к обновлению через contextvar.
+    Запросы вне обработчиков учитываются как фоновые. Статистика
+    собирается за интервал QUERY_STATS_INTERVAL; после его окончания
+    текущий интервал становится предыдущим.
+    """
+
+    def __init__(self, interval, slow_query_threshold):
+        self.interval = interval
+        self.slow_query_threshold = slow_query_threshold
+        self.previous = None
+        self._start_window()
+
+    def _start_window(self):
+        self.current = QueryStatsWindow(datetime.utcnow())
+        self._window_started = time.monotonic()
+
+    def _window(self):
+        if time.monotonic() - self._window_started >= self.interval:
+            self.previous = self.current
+            self._start_window()
+        return self.current
+
+    def install(self, sync_engine):
+        """Подключает подсчет запросов к движку."""
+        event.listen(
+            sync_engine, 'before_cursor_execute', self._before_execute
+        )
+        event.listen(sync_engine, 'after_cursor_execute', self._after_execute)
+
+    def _before_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        context._query_started = time.perf_counter()
+
+    def _after_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - context._query_started
+        record = current_update_queries.get()
+        window = self._window()
+        if record is None:
+            window.background.add(1, elapsed)
+        parent = record
+        while parent is not None:
+            parent.statements += 1
+            parent.db_time += elapsed
+            parent = parent.parent
+        if elapsed >= self.slow_query_threshold:
+            window.slow_queries += 1
+            self._log_slow_query(statement, parameters, elapsed, record)
+
+    @staticmethod
+    def _log_slow_query(statement, parameters, elapsed, record):
+        # Значения параметров могут содержать персональные данные,
+        # поэтому в лог попадает только их количество.
+        if isinstance(parameters, (list, tuple)):
+            count = len(parameters)
+        else:
+            count = len(parameters or {})
+        statement = re.sub(r'\s+', ' ', statement)[:MAX_LOGGED_STATEMENT]
+        logger.warning(
+            f'Медленный запрос {elapsed * 1000:.0f} мс '
+            f'({record.handler if record else BACKGROUND}): {statement} '
+            f'[параметров: {count}, значения скрыты]'
+        )
+
+    def instrument(self, callback):
+        """
+        Оборачивает обработчик: запросы, выполненные им, и время
+        обработки обновления учитываются под его именем.
+        """
+        if getattr(callback, '_query_stats', False):
+            return callback
+        name = callback.__qualname__
+
+        @functools.wraps(callback)
+        async def wrapper(update, context, *args, **kwargs):
+            record = UpdateQueries(name, parent=current_update_queries.get())
+            token = current_update_queries.set(record)
+            started = time.perf_counter()
+            try:
+                return await callback(update, context, *args, **kwargs)
+            finally:
+                current_update_queries.reset(token)
+                self._window().handlers.setdefault(
+                    name, HandlerStats()
+                ).add(
+                    record.statements,
+                    record.db_time,
+                    time.perf_counter() - started,
+                )
+
+        wrapper._query_stats = True
+        return wrapper
+
+    def instrument_handlers(self, handlers):
+        """Оборачивает обработчики, включая вложенные в диалоги."""
+        for handler in handlers:
+            if isinstance(handler, ConversationHandler):
+                self.instrument_handlers(handler.entry_points)
+                for state_handlers in handler.states.values():
+                    self.instrument_handlers(state_handlers)
+                self.instrument_handlers(handler.fallbacks)
+            elif hasattr(handler, 'callback'):
+                handler.callback = self.instrument(handler.callback)
+
+    def instrument_application(self, application):
+        for handlers in application.handlers.values():
+            self.instrument_handlers(handlers)
+
+    def summary(self, limit=None):
+        """
+        Возвращает текущий и предыдущий интервалы; обработчики
+        отсортированы по суммарному числу запросов.
+        """
+        windows = [self._window()]
+        if self.previous is not None:
+            windows.append(self.previous)
+        return [
+            (
+                window,
+                sorted(
+                    window.handlers.items(),
+                    key=lambda item: item[1].statements,
+                    reverse=True,
+                )[:limit],
+            )
+            for window in windows
+        ]
+
+
+query_stats = QueryStats(QUERY_STATS_INTERVAL, SLOW_QUERY_THRESHOLD)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from config import REFERENCE_DATA_CHANNEL, REFERENCE_DATA_TTL
+from crud.level import get_levels
+from crud.role import get_roles_from_db
+from crud.team import get_teams_from_db
+from models.base import engine
+
+logger = logging.getLogger(__name__)
+
+
+def _find(names, name):
+    name = (name or '').strip().lower()
+    return next((value for value in names if value.lower() == name), None)
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """
+    Неизменяемый снимок справочников. Версия увеличивается при каждом
+    изменении данных и подходит для ключей кэшей, построенных по
+    справочникам (например, клавиатур).
+    """
+
+    version: int
+    roles: tuple
+    levels: tuple
+    teams: tuple
+
+    def find_role(self, name):
+        """Название роли в справочнике без учета регистра или None."""
+        return _find(self.roles, name)
+
+    def find_level(self, name):
+        """Название уровня в справочнике без учета регистра или None."""
+        return _find(self.levels, name)
+
+
+class ReferenceDataCache:
+    """
+    Кэш ролей, уровней и команд в памяти процесса.
+
+    Снимок перечитывается из БД после инвалидации или по истечении
+    REFERENCE_DATA_TTL секунд. Изменения справочников в одном процессе
+    доходят до других через канал LISTEN/NOTIFY PostgreSQL; для других
+    СУБД остается перечитывание по TTL. Через тот же канал другие службы
+    могут рассылать собственные оповещения с непустым payload.
+    """
+
+    def __init__(self, ttl=REFERENCE_DATA_TTL, channel=REFERENCE_DATA_CHANNEL):
+        self.ttl = ttl
+        self.channel = channel
+        self._snapshot = None
+        self._loaded_at = 0
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self._listener = None
+        self._handlers = []
+
+    def _is_fresh(self):
+        return (
+            self._snapshot is not None and
+            not self._stale and
+            time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    async def get(self):
+        """Возвращает актуальный снимок справочников."""
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    await self._reload()
+        return self._snapshot
+
+    async def _reload(self):
+        # Инвалидация во время загрузки должна привести к повторной.
+        self._stale = False
+        try:
+            roles = tuple(await get_roles_from_db())
+            levels = tuple(await get_levels())
+            teams = tuple(sorted(await get_teams_from_db()))
+        except Exception as e:
+            self._stale = True
+            if self._snapshot is None:
+                raise
+            logger.error(f'Ошибка при обновлении справочников: {e}')
+            return
+        snapshot = self._snapshot
+        if snapshot is None:
+            version = 1
+        elif (roles, levels, teams) == (
+            snapshot.roles, snapshot.levels, snapshot.teams
+        ):
+            version = snapshot.version
+        else:
+            version = snapshot.version + 1
+        self._snapshot = ReferenceSnapshot(version, roles, levels, teams)
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Помечает снимок устаревшим; он перечитается при обращении."""
+        self._stale = True
+
+    async def notify_changed(self, payload=''):
+        """
+        Инвалидирует кэш после изменения справочников и оповещает
+        другие процессы бота. Непустой payload передается обработчикам,
+        зарегистрированным через add_handler.
+        """
+        self.invalidate()
+        if engine.dialect.name != 'postgresql':
+            return
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(
+                    select(func.pg_notify(self.channel, payload))
+                )
+                await connection.commit()
+        except Exception as e:
+            logger.error(
+                f'Ошибка при оповещении об изменении справочников: {e}'
+            )
+
+    def add_handler(self, handler):
+        """Регистрирует обработчик непустых payload оповещений."""
+        self._handlers.append(handler)
+
+    def remove_handler(self, handler):
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        self.invalidate()
+        if not payload:
+            return
+        for handler in self._handlers:
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f'Ошибка при обработке оповещения: {e}')
+
+    async def start_listener(self):
+        """
+        Подписывает процесс на оповещения об изменении справочников.
+        Для подписки из пула выделяется отдельное соединение.
+        """
+        if engine.dialect.name != 'postgresql' or self._listener is not None:
+            return
+        connection = await engine.connect()
+        try:
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.add_listener(
+                self.channel, self._on_notification
+            )
+        except Exception:
+            await connection.close()
+            raise
+        self._listener = connection
+        # Изменения, пропущенные до подписки, подхватываются перечитыванием.
+        self.invalidate()
+
+    async def stop_listener(self):
+        if self._listener is None:
+            return
+        connection, self._listener = self._listener, None
+        try:
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.remove_listener(
+                self.channel, self._on_notification
+            )
+        finally:
+            await connection.close()
+
+
+reference_data = ReferenceDataCache()
@@ -0,0 +1,57 @@
+import asyncio
+
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обрабатывает обновления разных пользователей параллельно, а обновления
+    одного пользователя — строго по очереди, чтобы состояние
+    ConversationHandler оставалось согласованным.
+    """
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        self._locks = {}
+        self._waiters = {}
+
+    @staticmethod
+    def _get_key(update):
+        user = getattr(update, 'effective_user', None)
+        if user is not None:
+            return user.id
+        chat = getattr(update, 'effective_chat', None)
+        if chat is not None:
+            return chat.id
+        return None
+
+    async def process_update(self, update, coroutine):
+        """
+        Сначала дожидается очереди пользователя и только затем занимает
+        место в семафоре: иначе серия обновлений одного пользователя
+        держала бы места в ожидании блокировки и задерживала остальных.
+        Базовый метод помечен @final только для проверки типов.
+        """
+        key = self._get_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                await super().process_update(update, coroutine)
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._locks[key]
+
+    async def do_process_update(self, update, coroutine):
+        await coroutine
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
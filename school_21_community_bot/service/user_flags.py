@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy import update
+
+from crud.upsert import chunked
+from models.base import async_session
+from models.user import User
+from service.query_stats import create_background_task
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 1
+
+
+class UserFlagWriter:
+    """
+    Буферизует изменения флагов пользователей (invite_sent, is_member)
+    и записывает их в фоне: по одному UPDATE ... WHERE telegram_id IN
+    на каждую пару (флаг, значение). Для одного пользователя
+    сохраняется последнее значение флага.
+    """
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._flush_task = None
+
+    def set(self, telegram_id, field, value):
+        self._pending[field, telegram_id] = value
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = create_background_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        # Остановка не должна прерывать уже начатую запись.
+        await asyncio.shield(self.flush())
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        groups = defaultdict(list)
+        for (field, telegram_id), value in pending.items():
+            groups[field, value].append(telegram_id)
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    for (field, value), telegram_ids in groups.items():
+                        for chunk in chunked(telegram_ids):
+                            await session.execute(
+                                update(User)
+                                .where(User.telegram_id.in_(chunk))
+                                .values({field: value})
+                            )
+        except Exception as e:
+            logger.error(
+                f'Ошибка при записи {len(pending)} флагов пользователей: {e}'
+            )
+
+    async def stop(self):
+        """Останавливает фоновую запись и сохраняет накопленное."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+
+user_flag_writer = UserFlagWriter()
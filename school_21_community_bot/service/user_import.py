@@ -0,0 +1,265 @@
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import or_
+from sqlalchemy.future import select
+
+from crud.upsert import chunked, get_insert
+from models.base import async_session
+from models.level import Level
+from models.role import Role
+from models.user import User, build_nick_search
+from service.export import export_query
+from service.peer_directory import peer_directory
+from service.reference_data import reference_data
+from utils.validators import (validate_nickname_sber,
+                              validate_nickname_school21,
+                              validate_nickname_telegram,
+                              validate_project_description,
+                              validate_role_name, validate_team_name)
+
+USER_IMPORT_FORMATS = ('csv', 'json')
+USER_IMPORT_FIELDS = (
+    'telegram_id',
+    'full_name',
+    'telegram_nick',
+    'sberchat_nick',
+    'school21_nick',
+    'team',
+    'role',
+    'level',
+    'project',
+)
+USER_EXPORT_COLUMNS = USER_IMPORT_FIELDS + (
+    'registration_date', 'invite_sent', 'is_member'
+)
+USER_FIELD_TITLES = {
+    'telegram_id': 'Telegram ID',
+    'full_name': 'Полное имя',
+    'telegram_nick': 'Ник в Telegram',
+    'sberchat_nick': 'Ник в СберЧате',
+    'school21_nick': 'Ник в Школе 21',
+    'team': 'Команда',
+    'role': 'Роль',
+    'level': 'Уровень',
+    'project': 'Проект',
+}
+USER_FIELD_VALIDATORS = (
+    ('telegram_nick', validate_nickname_telegram),
+    ('sberchat_nick', validate_nickname_sber),
+    ('school21_nick', validate_nickname_school21),
+    ('team', validate_team_name),
+    ('role', validate_role_name),
+    ('project', validate_project_description),
+)
+# Поля, которые импорт обновляет у существующих пользователей.
+USER_UPDATED_FIELDS = USER_IMPORT_FIELDS[1:] + ('nick_search',)
+MAX_FULL_NAME_LENGTH = 256
+MAX_LEVEL_LENGTH = 50
+
+
+@dataclass
+class UserImportResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+
+def parse_user_document(content, filename):
+    """
+    Читает пользователей из CSV-файла с заголовком или из JSON-файла
+    со списком объектов (или объектом с ключом "user", как в
+    data/user.json). Возвращает список словарей.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower()
+    text = content.decode('utf-8-sig')
+    if extension == 'csv':
+        return list(csv.DictReader(io.StringIO(text, newline='')))
+    if extension == 'json':
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get('user')
+        if not isinstance(data, list) or not all(
+            isinstance(row, dict) for row in data
+        ):
+            raise ValueError('Ожидается список пользователей.')
+        return data
+    raise ValueError(f'Неподдерживаемый формат файла: {filename}')
+
+
+def _validate_row(row):
+    values = {
+        name: str(row.get(name) or '').strip() for name in USER_IMPORT_FIELDS
+    }
+    if not values['telegram_id'].isdigit():
+        return None, 'Telegram ID должен быть числом.'
+    if len(values['full_name']) > MAX_FULL_NAME_LENGTH:
+        return None, 'Полное имя не может превышать 256 символов.'
+    values['telegram_nick'] = values['telegram_nick'].lstrip('@')
+    for name, validator in USER_FIELD_VALIDATORS:
+        if name == 'project' and not values[name]:
+            continue
+        is_valid, error_message = validator(values[name])
+        if not is_valid:
+            return None, f'{USER_FIELD_TITLES[name]}: {error_message}'
+    if not values['level'] or len(values['level']) > MAX_LEVEL_LENGTH:
+        return None, 'Уровень должен быть указан и не длиннее 50 символов.'
+    values['telegram_id'] = int(values['telegram_id'])
+    # Регистрация в боте полное имя не заполняет, как и выгрузка.
+    values['full_name'] = values['full_name'] or None
+    values['project'] = values['project'] or None
+    return values, None
+
+
+def validate_user_rows(rows):
+    """
+    Проверяет строки импорта теми же валидаторами, что и регистрация.
+    Возвращает корректные записи и список ошибок (номер записи, текст).
+    Повторы Telegram ID и ника в Школе 21 внутри файла считаются ошибкой.
+    """
+    users = []
+    errors = []
+    seen_telegram_ids = set()
+    seen_school21_nicks = set()
+    for number, row in enumerate(rows, 1):
+        user, error_message = _validate_row(row)
+        if user is None:
+            errors.append((number, error_message))
+        elif user['telegram_id'] in seen_telegram_ids:
+            errors.append((number, 'Telegram ID повторяется в файле.'))
+        elif user['school21_nick'] in seen_school21_nicks:
+            errors.append((number, 'Ник в Школе 21 повторяется в файле.'))
+        else:
+            seen_telegram_ids.add(user['telegram_id'])
+            seen_school21_nicks.add(user['school21_nick'])
+            users.append((number, user))
+    return users, errors
+
+
+async def _resolve_names(session, model, names, find):
+    """
+    Сопоставляет названия ролей или уровней с существующими без учета
+    регистра по кэшированному снимку справочников (find — его метод
+    find_role или find_level) и добавляет недостающие.
+    Возвращает словарь: название в нижнем регистре -> название в БД.
+    """
+    resolved = {}
+    new_names = {}
+    for name in names:
+        existing = find(name)
+        if existing is not None:
+            resolved[name.lower()] = existing
+        else:
+            new_names.setdefault(name.lower(), name)
+    if new_names:
+        insert = get_insert(session, model)
+        await session.execute(
+            insert.values([{'name': name} for name in new_names.values()])
+            .on_conflict_do_nothing(index_elements=[model.name])
+        )
+        resolved.update(new_names)
+    return resolved
+
+
+async def _get_existing(session, users):
+    """
+    Возвращает Telegram ID уже сохраненных пользователей из файла и
+    владельцев ников в Школе 21, указанных в файле.
+    """
+    existing_ids = set()
+    school21_owners = {}
+    for chunk in chunked(users):
+        result = await session.execute(
+            select(User.telegram_id, User.school21_nick).where(or_(
+                User.telegram_id.in_(
+                    [user['telegram_id'] for _, user in chunk]
+                ),
+                User.school21_nick.in_(
+                    [user['school21_nick'] for _, user in chunk]
+                ),
+            ))
+        )
+        for telegram_id, school21_nick in result.all():
+            existing_ids.add(telegram_id)
+            school21_owners[school21_nick] = telegram_id
+    return existing_ids, school21_owners
+
+
+async def import_users(rows):
+    """
+    Импортирует пользователей одной транзакцией: роли и уровни
+    сопоставляются с кэшированными справочниками, пользователи
+    вставляются многострочными INSERT ... ON CONFLICT по Telegram ID.
+    Ошибочные записи пропускаются и возвращаются в результате.
+    """
+    users, errors = validate_user_rows(rows)
+    result = UserImportResult(errors=errors)
+    if not users:
+        return result
+
+    saved = []
+    snapshot = await reference_data.get()
+    async with async_session() as session:
+        async with session.begin():
+            existing_ids, school21_owners = await _get_existing(
+                session, users
+            )
+            accepted = []
+            for number, user in users:
+                owner = school21_owners.get(user['school21_nick'])
+                if owner is not None and owner != user['telegram_id']:
+                    result.errors.append(
+                        (number, 'Ник в Школе 21 занят другим пользователем.')
+                    )
+                else:
+                    accepted.append(user)
+            roles = await _resolve_names(
+                session, Role, {user['role'] for user in accepted},
+                snapshot.find_role,
+            )
+            levels = await _resolve_names(
+                session, Level, {user['level'] for user in accepted},
+                snapshot.find_level,
+            )
+            now = datetime.utcnow()
+            for user in accepted:
+                user['role'] = roles[user['role'].lower()]
+                user['level'] = levels[user['level'].lower()]
+                # Core-вставка не вызывает ORM-событие update_nick_search.
+                user['nick_search'] = build_nick_search(
+                    user['telegram_nick'],
+                    user['sberchat_nick'],
+                    user['school21_nick'],
+                )
+                user['registration_date'] = now
+            for chunk in chunked(accepted):
+                insert = get_insert(session, User).values(chunk)
+                saved.extend(await session.scalars(
+                    insert.on_conflict_do_update(
+                        index_elements=[User.telegram_id],
+                        set_={
+                            name: insert.excluded[name]
+                            for name in USER_UPDATED_FIELDS
+                        },
+                    ).returning(User)
+                ))
+    for user in saved:
+        if user.telegram_id in existing_ids:
+            result.updated += 1
+        else:
+            result.created += 1
+        peer_directory.upsert(user)
+    await peer_directory.notify_changed(*(user.id for user in saved))
+    result.errors.sort()
+    return result
+
+
+async def export_users(export_format):
+    """Выгружает всех пользователей в файл выбранного формата."""
+    query = select(
+        *(getattr(User, column) for column in USER_EXPORT_COLUMNS)
+    ).order_by(User.id)
+    return await export_query(query, USER_EXPORT_COLUMNS, export_format)
@@ -0,0 +1,103 @@
+import hmac
+import logging
+import re
+from http import HTTPStatus
+
+from telegram import Update
+
+from config import (WEBHOOK_HOST, WEBHOOK_PATH, WEBHOOK_PORT,
+                    WEBHOOK_SECRET_TOKEN, WEBHOOK_URL)
+from utils.startup import start_application, stop_application
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# Допустимый формат secret_token в Bot API.
+SECRET_TOKEN_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,256}')
+
+
+def check_webhook_config():
+    """
+    Проверяет настройки режима webhook до запуска бота: без публичного
+    адреса Telegram некуда отправлять обновления, а без секретного
+    токена endpoint примет поддельные обновления от кого угодно.
+    """
+    if not WEBHOOK_URL:
+        raise RuntimeError('Для режима webhook укажите WEBHOOK_URL.')
+    if not WEBHOOK_SECRET_TOKEN:
+        raise RuntimeError('Для режима webhook укажите WEBHOOK_SECRET_TOKEN.')
+    if not SECRET_TOKEN_PATTERN.fullmatch(WEBHOOK_SECRET_TOKEN):
+        raise RuntimeError(
+            'WEBHOOK_SECRET_TOKEN должен состоять из 1-256 символов '
+            'A-Z, a-z, 0-9, _ и -.'
+        )
+
+
+def create_webhook_app(application):
+    """
+    Создает ASGI-приложение, которое принимает обновления от Telegram
+    и передает их в очередь обновлений бота. Запросы без заголовка
+    с секретным токеном WEBHOOK_SECRET_TOKEN отклоняются.
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse, Response
+    from starlette.routing import Route
+
+    async def telegram_webhook(request):
+        secret_token = request.headers.get(SECRET_TOKEN_HEADER, '')
+        if not hmac.compare_digest(
+            secret_token.encode(), WEBHOOK_SECRET_TOKEN.encode()
+        ):
+            return Response(status_code=HTTPStatus.FORBIDDEN)
+        try:
+            data = await request.json()
+        except ValueError:
+            return Response(status_code=HTTPStatus.BAD_REQUEST)
+        await application.update_queue.put(
+            Update.de_json(data, application.bot)
+        )
+        return Response()
+
+    async def health(request):
+        return PlainTextResponse('ok')
+
+    return Starlette(routes=[
+        Route(WEBHOOK_PATH, telegram_webhook, methods=['POST']),
+        Route('/health', health, methods=['GET']),
+    ])
+
+
+def create_webhook_server(application):
+    """Создает сервер uvicorn для webhook-приложения."""
+    import uvicorn
+
+    check_webhook_config()
+
+    return uvicorn.Server(uvicorn.Config(
+        create_webhook_app(application),
+        host=WEBHOOK_HOST,
+        port=WEBHOOK_PORT,
+        log_level='warning',
+    ))
+
+
+async def set_webhook(application, allowed_updates=None):
+    """Регистрирует адрес webhook в Telegram."""
+    await application.bot.set_webhook(
+        url=f'{WEBHOOK_URL.rstrip("/")}{WEBHOOK_PATH}',
+        allowed_updates=allowed_updates,
+        secret_token=WEBHOOK_SECRET_TOKEN,
+    )
+    logger.info(f'Webhook установлен на {WEBHOOK_URL}{WEBHOOK_PATH}')
+
+
+async def run_webhook(application, allowed_updates=None):
+    """Запускает бота в режиме webhook до остановки сервера."""
+    check_webhook_config()
+    server = create_webhook_server(application)
+    await start_application(application, polling=False)
+    try:
+        await set_webhook(application, allowed_updates)
+        await server.serve()
+    finally:
+        await stop_application(application)
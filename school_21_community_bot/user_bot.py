@@ -1,12 +1,30 @@
+import asyncio
 import logging
+import time
 from logging.handlers import TimedRotatingFileHandler
 
-from telegram.ext import ApplicationBuilder, ChatJoinRequestHandler
+from telegram.ext import ChatJoinRequestHandler, ChatMemberHandler
 
-from config import TOKEN
+from config import PEER_DIRECTORY_REFRESH_INTERVAL, TOKEN, USER_BOT_MODE
 from handlers.approve_request_handler import approve_request
+from handlers.chat_member_handler import track_chat_member
 from handlers.registration_handler import registration_handler
 from handlers.search_peers_handler import search_peers_handler
+from service.callback_codec import callback_codec
+from service.metric import metric_writer
+from service.outbox import telegram_outbox
+from service.peer_directory import peer_directory
+from service.persistence import SQLAlchemyPersistence
+from service.query_stats import query_stats
+from service.reference_data import reference_data
+from service.user_flags import user_flag_writer
+from service.webhook import run_webhook
+from utils.startup import get_application_builder, report_startup
+
+STARTED_AT = time.perf_counter()
+ALLOWED_UPDATES = [
+    'chat_join_request', 'chat_member', 'message', 'callback_query'
+]
 
 logging.basicConfig(
     level=logging.ERROR,
@@ -21,15 +39,57 @@ logging.basicConfig(
         ),
     ]
 )
+# Медленные запросы должны попадать в лог и при уровне ERROR.
+logging.getLogger('service.query_stats').setLevel(logging.WARNING)
 
 logger = logging.getLogger(__name__)
 
-application = ApplicationBuilder().token(TOKEN).build()
 
-application.add_handler(search_peers_handler)
-application.add_handler(registration_handler)
-application.add_handler(ChatJoinRequestHandler(approve_request))
+async def on_startup(application):
+    """Загружает справочник пиров перед началом обработки обновлений."""
+    await peer_directory.load()
+    peer_directory.start_refresh(PEER_DIRECTORY_REFRESH_INTERVAL)
+    await reference_data.start_listener()
+    metric_writer.start()
+    telegram_outbox.start()
+    report_startup('Пользовательский бот', STARTED_AT)
 
-application.run_polling(
-    allowed_updates=['chat_join_request', 'message', 'callback_query']
-)
+
+async def on_shutdown(application):
+    """Останавливает фоновые задачи и записывает накопленные метрики."""
+    await peer_directory.stop()
+    await metric_writer.stop()
+    await reference_data.stop_listener()
+    await callback_codec.stop()
+    await telegram_outbox.stop()
+    await user_flag_writer.stop()
+
+
+def build_application(request=None, persistence=None):
+    """
+    Собирает приложение пользовательского бота. Параметры позволяют
+    подменить клиент Bot API и хранилище состояния, например,
+    при нагрузочном тестировании.
+    """
+    application = (
+        get_application_builder(TOKEN, request)
+        .persistence(persistence or SQLAlchemyPersistence('user_bot'))
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
+    application.add_handler(search_peers_handler)
+    application.add_handler(registration_handler)
+    application.add_handler(ChatJoinRequestHandler(approve_request))
+    application.add_handler(
+        ChatMemberHandler(track_chat_member, ChatMemberHandler.CHAT_MEMBER)
+    )
+    query_stats.instrument_application(application)
+    return application
+
+
+if __name__ == '__main__':
+    if USER_BOT_MODE == 'webhook':
+        asyncio.run(run_webhook(build_application(), ALLOWED_UPDATES))
+    else:
+        build_application().run_polling(allowed_updates=ALLOWED_UPDATES)
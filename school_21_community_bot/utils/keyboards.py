@@ -1,19 +1,72 @@
 import math
+from collections import OrderedDict
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
-from config import GROUP_ID
-from crud.level import get_levels
+from config import KEYBOARD_CACHE_SIZE
 from constants import ButtonText, ServiceConstant
+from service.callback_codec import callback_codec
+from service.membership import invite_link_cache
+from service.reference_data import reference_data
+
+
+class KeyboardCache:
+    """
+    LRU-кэш готовых клавиатур. Ключ включает вид клавиатуры, страницу
+    и версию данных, по которым она построена, поэтому после изменения
+    справочников или списка пиров клавиатуры строятся заново, а
+    устаревшие вытесняются. InlineKeyboardMarkup неизменяем, и один
+    объект можно отправлять в разные чаты.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get_or_build(self, key, build):
+        """Возвращает клавиатуру из кэша или строит ее функцией build."""
+        markup = self._entries.get(key)
+        if markup is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return markup
+        self.misses += 1
+        markup = build()
+        if self.maxsize:
+            self._entries[key] = markup
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return markup
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """Счетчики попаданий и промахов и текущий размер кэша."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0,
+            'size': len(self._entries),
+        }
+
+
+keyboard_cache = KeyboardCache(KEYBOARD_CACHE_SIZE)
 
 
 async def get_level_keyboard():
     """Выводит клавиатуру с уровнями квалификации из базы данных."""
-    levels = await get_levels()
-    keyboard = [
-        [InlineKeyboardButton(level.capitalize(), callback_data=level)]
-        for level in levels]
-    return InlineKeyboardMarkup(keyboard)
+    snapshot = await reference_data.get()
+
+    def build():
+        return InlineKeyboardMarkup([
+            [InlineKeyboardButton(level.capitalize(), callback_data=level)]
+            for level in snapshot.levels])
+
+    return keyboard_cache.get_or_build(('level', 0, snapshot.version), build)
 
 
 def get_skip_keyboard():
@@ -107,13 +160,11 @@ def get_join_channel_keyboard():
 
 async def get_final_keyboard(context):
     """Выводит клавиатуру с кнопками 'Присоединиться к коммьюинити' и 'Поиск пиров'."""
-    link = await context.bot.create_chat_invite_link(
-        chat_id=GROUP_ID, creates_join_request=True
-    )
+    link = await invite_link_cache.get(context.bot)
     keyboard = [
         [
             InlineKeyboardButton(
-                ButtonText.BUTTON_JOIN_COMMUNITY, url=link.invite_link)
+                ButtonText.BUTTON_JOIN_COMMUNITY, url=link)
         ],
         [
             InlineKeyboardButton(
@@ -181,6 +232,11 @@ def get_search_criteria_keyboard():
             InlineKeyboardButton(
                 ButtonText.BUTTON_SEARCH_BY_NICKNAME,
                 callback_data='search_by_nickname')
+        ],
+        [
+            InlineKeyboardButton(
+                ButtonText.BUTTON_SEARCH_SIMILAR,
+                callback_data='search_similar')
         ]]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
@@ -215,22 +271,70 @@ def get_back_to_filter_and_to_criteria_keyboard(
         return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+def get_selection_callback(action, value, **context):
+    """
+    callback_data кнопки выбора из списка: значение и контекст
+    хранятся в callback_codec, кнопка несет только короткий токен.
+    """
+    return callback_codec.encode(action, {**context, 'value': value})
+
+
 async def get_create_paginated_keyboard(
     items,
     page,
-    callback_prefix,
+    callback_action,
     item_per_page=ServiceConstant.PAGE_SIZE,
     back_callback=None,
-    page_prefix=''
+    page_prefix='',
+    version=None,
+    callback_context=None
 ):
-    """Выводит клавиатуру с кнопками для элементов списка и навигацией."""
+    """
+    Выводит клавиатуру с кнопками для элементов списка и навигацией.
+    Если передана версия данных, клавиатура берется из кэша.
+    """
+    callback_context = callback_context or {}
     total_pages = math.ceil(len(items) / item_per_page)
     page = max(0, min(page, total_pages - 1))
     items_page = items[page * item_per_page: (page + 1) * item_per_page]
+    # Токены детерминированы, поэтому повторное сохранение продлевает
+    # срок хранения и для кнопок клавиатуры из кэша.
+    callbacks = [
+        get_selection_callback(callback_action, item, **callback_context)
+        for item in items_page
+    ]
+    if version is None:
+        return _build_paginated_keyboard(
+            items_page, callbacks, page, total_pages, back_callback,
+            page_prefix
+        )
+    key = (
+        ('paginated', callback_action,
+         tuple(sorted(callback_context.items())), page_prefix,
+         back_callback, item_per_page),
+        page,
+        version,
+    )
+    return keyboard_cache.get_or_build(
+        key,
+        lambda: _build_paginated_keyboard(
+            items_page, callbacks, page, total_pages, back_callback,
+            page_prefix
+        )
+    )
+
 
+def _build_paginated_keyboard(
+    items_page,
+    callbacks,
+    page,
+    total_pages,
+    back_callback,
+    page_prefix
+):
     keyboard = [
-        [InlineKeyboardButton(item, callback_data=f'{callback_prefix}_{item}')]
-        for item in items_page]
+        [InlineKeyboardButton(item, callback_data=callback_data)]
+        for item, callback_data in zip(items_page, callbacks)]
 
     navigation_buttons = []
     if page > 0:
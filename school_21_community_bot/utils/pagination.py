@@ -0,0 +1,62 @@
+import base64
+from bisect import bisect_left, bisect_right
+
+from constants import ServiceConstant
+
+CURSOR_SEPARATOR = '\x1f'
+# Курсор передается аргументом в callback_data вида действие:токен:курсор
+# (callback_codec.CALLBACK_SEPARATOR, split_callback). Алфавит base64
+# с альтернативными символами '-' и '.' не содержит ':', поэтому
+# split_callback не разобьет курсор на части.
+CURSOR_ALTCHARS = b'-.'
+
+
+def encode_cursor(*values):
+    """Кодирует значения ключа сортировки в компактную строку для кнопки."""
+    raw = CURSOR_SEPARATOR.join(str(value) for value in values).encode()
+    return base64.b64encode(raw, altchars=CURSOR_ALTCHARS).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Декодирует строку курсора обратно в список значений ключа."""
+    if not cursor:
+        return None
+    padding = '=' * (-len(cursor) % 4)
+    raw = base64.b64decode(cursor + padding, altchars=CURSOR_ALTCHARS)
+    return raw.decode().split(CURSOR_SEPARATOR)
+
+
+def encode_peer_cursor(peer, rank=None):
+    """
+    Возвращает курсор по ключу (school21_nick, id), а для результатов
+    поиска по никнейму — по ключу (ранг, school21_nick, id).
+    """
+    if rank is None:
+        return encode_cursor(peer.school21_nick or '', peer.id)
+    return encode_cursor(rank, peer.school21_nick or '', peer.id)
+
+
+def decode_peer_cursor(cursor):
+    """Возвращает ключ пира из курсора."""
+    values = decode_cursor(cursor)
+    if values is None:
+        return None
+    *rank, school21_nick, peer_id = values
+    return (*map(int, rank), school21_nick, int(peer_id))
+
+
+def keyset_page(
+    items, key, after=None, before=None, limit=ServiceConstant.PAGE_SIZE
+):
+    """
+    Возвращает страницу отсортированного списка, следующую за ключом
+    after или предшествующую ключу before, а также признаки наличия
+    предыдущей и следующей страниц.
+    """
+    if before is not None:
+        end = bisect_left(items, before, key=key)
+        start = max(0, end - limit)
+    else:
+        start = 0 if after is None else bisect_right(items, after, key=key)
+        end = start + limit
+    return items[start:end], start > 0, end < len(items)
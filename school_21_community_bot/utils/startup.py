@@ -0,0 +1,65 @@
+import logging
+import time
+
+from telegram.ext import ApplicationBuilder
+
+from config import TELEGRAM_API_URL, UPDATE_CONCURRENCY
+from models.base import get_pool_status
+from service.update_processor import PerUserUpdateProcessor
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+def get_application_builder(token, request=None):
+    """
+    Возвращает ApplicationBuilder с общими настройками ботов: адресом
+    Bot API (например, локальной заглушкой для тестов) и параллельной
+    обработкой обновлений с сохранением порядка для каждого пользователя.
+
+    Если передан request (например, заглушка Bot API для нагрузочного
+    тестирования), он используется вместо HTTP-клиента по умолчанию.
+    """
+    builder = ApplicationBuilder().token(token)
+    if request is not None:
+        builder = builder.request(request).get_updates_request(request)
+    if TELEGRAM_API_URL:
+        api_url = TELEGRAM_API_URL.rstrip('/')
+        builder = builder.base_url(f'{api_url}/bot').base_file_url(
+            f'{api_url}/file/bot'
+        )
+    if UPDATE_CONCURRENCY > 1:
+        builder = builder.concurrent_updates(
+            PerUserUpdateProcessor(UPDATE_CONCURRENCY)
+        )
+    return builder
+
+
+async def start_application(application, allowed_updates=None, polling=True):
+    """Запускает приложение без блокировки цикла событий."""
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    if polling:
+        await application.updater.start_polling(
+            allowed_updates=allowed_updates
+        )
+    await application.start()
+
+
+async def stop_application(application):
+    if application.updater and application.updater.running:
+        await application.updater.stop()
+    if application.running:
+        await application.stop()
+    await application.shutdown()
+    if application.post_shutdown:
+        await application.post_shutdown(application)
+
+
+def report_startup(name, started_at):
+    """Записывает в лог время запуска и состояние пула соединений."""
+    logger.info(
+        f'{name}: запуск за {time.perf_counter() - started_at:.2f} с. '
+        f'Пул соединений: {get_pool_status()}'
+    )